@@ -1,92 +1,148 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import Counter
-from typing import List, Tuple, Dict
+from itertools import compress
+from operator import attrgetter, not_
+from typing import List, Tuple, Dict, Iterable
 
-def calculate_daily_completion(goals: List[Tuple]) -> int:
-    if not goals:
+from models import Goal, day_iso
+
+# NumPy is optional and slow to import, so it is loaded on first GoalColumns use.
+np = None
+_numpy_tried = False
+
+def _load_numpy():
+    global np, _numpy_tried
+    if not _numpy_tried:
+        _numpy_tried = True
+        try:
+            import numpy
+        except ImportError:  # the array-module path below gives the same results
+            numpy = None
+        np = numpy
+    return np
+
+# Most functions below work on per-day aggregates: (date_str, total, completed).
+# database.py produces these with GROUP BY, so analytics never needs every goal.
+DayTotals = Tuple[str, int, int]
+
+def summarize_days(goals: List[Goal]) -> List[DayTotals]:
+    """Reduces goals to per-day totals, oldest first."""
+    return GoalColumns(goals).day_rows()
+
+def daily_completion(total: int, completed: int) -> int:
+    if not total:
         return 0
-    completed = sum(1 for g in goals if g[3] == 1) # Index 3 is 'completed'
-    return int((completed / len(goals)) * 100)
+    return int((completed / total) * 100)
+
+def calculate_daily_completion(goals: List[Goal]) -> int:
+    completed = sum(1 for g in goals if g.completed == 1)
+    return daily_completion(len(goals), completed)
 
-def get_weekly_summary(all_goals: List[Tuple]) -> Dict[str, float]:
-    today = datetime.now().date()
+def weekly_summary_from_days(days: Iterable[DayTotals], today: date = None) -> Dict[str, float]:
+    today = today or datetime.now().date()
     dates = [(today - timedelta(days=i)).isoformat() for i in range(6, -1, -1)]
-    
+
     summary = {d: 0.0 for d in dates}
-    
-    for d in dates:
-        day_goals = [g for g in all_goals if g[2] == d]
-        if day_goals:
-            completed = sum(1 for g in day_goals if g[3] == 1)
-            summary[d] = (completed / len(day_goals)) * 100
-        else:
-            summary[d] = 0.0
-            
+
+    for d, total, completed in days:
+        if d in summary and total:
+            summary[d] = (completed / total) * 100
+
     return summary
 
-def calculate_streak(all_goals: List[Tuple]) -> int:
-    """Standard Activity Streak: Days with at least 1 completed goal."""
-    goals_by_date = {}
-    for g in all_goals:
-        d = g[2]
-        if d not in goals_by_date: goals_by_date[d] = []
-        goals_by_date[d].append(g)
+def get_weekly_summary(all_goals: List[Goal]) -> Dict[str, float]:
+    return GoalColumns(all_goals).weekly_summary()
+
+# --- RANGES ---
+# Completion series for any [start, end]: per day, per ISO week (Monday start)
+# and per month, all filled in one pass over date-sorted day rows. Empty days
+# and buckets are included with zero totals so charts get a fixed number of bars.
+Bucket = Tuple[str, int, int, float]  # (first day of bucket, total, completed, percent)
+
+def _week_start(d: date) -> date:
+    return d - timedelta(days=d.weekday())
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
 
-    today = datetime.now().date()
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+def range_summary(days: Iterable[DayTotals], start: date, end: date) -> Dict:
+    """Day, week and month completion series for [start, end], oldest first."""
+    def empty(first, step):
+        buckets, d = {}, first
+        while d <= end:
+            buckets[d.isoformat()] = [0, 0]
+            d = step(d)
+        return buckets
+    by_day = empty(start, lambda d: d + timedelta(days=1))
+    by_week = empty(_week_start(start), lambda d: d + timedelta(days=7))
+    by_month = empty(_month_start(start), _next_month)
+
+    lo, hi = start.isoformat(), end.isoformat()
+    for d_str, total, completed in days:
+        if d_str < lo or d_str > hi:
+            continue
+        d = date.fromisoformat(d_str)
+        for bucket in (by_day[d_str], by_week[_week_start(d).isoformat()], by_month[_month_start(d).isoformat()]):
+            bucket[0] += total
+            bucket[1] += completed
+
+    series = lambda buckets: [(b, t, c, (c / t) * 100 if t else 0.0) for b, (t, c) in buckets.items()]
+    daily = series(by_day)
+    return {
+        "start": lo,
+        "end": hi,
+        "days": daily,
+        "weeks": series(by_week),
+        "months": series(by_month),
+        "total": sum(t for _, t, _, _ in daily),
+        "completed": sum(c for _, _, c, _ in daily),
+        "active_days": sum(1 for _, _, c, _ in daily if c),
+    }
+
+def streak_from_days(days_newest_first: Iterable[DayTotals], today: date = None) -> int:
+    """Standard Activity Streak: Days with at least 1 completed goal.
+    Reads days newest first and stops at the first break."""
+    today = today or datetime.now().date()
+    expected = today
     streak = 0
-    check_date = today
-
-    while True:
-        d_str = check_date.isoformat()
-        
-        # If no goals found for this date
-        if d_str not in goals_by_date:
-            if check_date == today:
-                check_date -= timedelta(days=1)
-                continue
-            else:
-                break # Streak broken by empty day
 
-        day_goals = goals_by_date[d_str]
-        completed_cnt = sum(1 for g in day_goals if g[3] == 1)
-        
-        if completed_cnt > 0:
+    for d_str, total, completed in days_newest_first:
+        d = date.fromisoformat(d_str)
+        if d > expected:
+            continue # Future goals don't count
+
+        # Today is allowed to be empty or unfinished
+        if d < expected and expected == today:
+            expected -= timedelta(days=1)
+        if d != expected:
+            break # Streak broken by empty day
+
+        if completed > 0:
             streak += 1
-            check_date -= timedelta(days=1)
-        else:
-            if check_date == today:
-                check_date -= timedelta(days=1)
-            else:
-                break
-                
+        elif d != today:
+            break
+        expected = d - timedelta(days=1)
+
     return streak
 
-def calculate_perfect_streak(all_goals: List[Tuple]) -> int:
+def calculate_streak(all_goals: List[Goal]) -> int:
+    """Standard Activity Streak: Days with at least 1 completed goal."""
+    return GoalColumns(all_goals).streaks()[0]
+
+def perfect_streak_from_days(days_newest_first: Iterable[DayTotals], today: date = None) -> int:
     """
     PERFECT STREAK: Consecutive days with 100% completion.
     Skips days where NO goals were added.
     """
-    goals_by_date = {}
-    for g in all_goals:
-        d = g[2]
-        if d not in goals_by_date: goals_by_date[d] = []
-        goals_by_date[d].append(g)
-
-    # Sort dates from newest to oldest
-    sorted_dates = sorted(goals_by_date.keys(), reverse=True)
-    
-    if not sorted_dates:
-        return 0
-
     streak = 0
-    today_str = datetime.now().date().isoformat()
-
-    for d_str in sorted_dates:
-        day_goals = goals_by_date[d_str]
-        total = len(day_goals)
-        completed = sum(1 for g in day_goals if g[3] == 1)
+    today_str = (today or datetime.now().date()).isoformat()
 
-        # Calculate percentage
+    for d_str, total, completed in days_newest_first:
         if total > 0:
             if completed == total:
                 streak += 1
@@ -97,13 +153,142 @@ def calculate_perfect_streak(all_goals: List[Tuple]) -> int:
                 else:
                     # If it's a past day and not 100%, streak breaks.
                     break
-    
+
     return streak
 
-def get_most_missed(all_goals: List[Tuple]) -> str:
-    missed = [g[1] for g in all_goals if g[3] == 0]
-    if not missed:
-        return "None"
-    counts = Counter([m.lower() for m in missed])
-    most_common = counts.most_common(1)
-    return most_common[0][0].capitalize() if most_common else "None"
\ No newline at end of file
+def calculate_perfect_streak(all_goals: List[Goal]) -> int:
+    """
+    PERFECT STREAK: Consecutive days with 100% completion.
+    Skips days where NO goals were added.
+    """
+    return GoalColumns(all_goals).streaks()[1]
+
+def most_missed_from_counts(counts: Iterable[Tuple[str, int]]) -> str:
+    """Takes (lowercased title, misses) rows, most missed first."""
+    for title, _ in counts:
+        return title.capitalize()
+    return "None"
+
+def get_most_missed(all_goals: List[Goal]) -> str:
+    return GoalColumns(all_goals).most_missed()
+
+def analyze(all_goals: List[Goal], today: date = None) -> Dict:
+    """Every Analytics page metric from one load of the goal rows."""
+    return GoalColumns(all_goals).analyze(today)
+
+# --- COLUMNAR ENGINE ---
+# Goals are copied once into parallel columns (day ordinal, done flag,
+# title id) and every metric is derived from one per-day reduction.
+# NumPy does the reductions when installed; plain arrays otherwise.
+class GoalColumns:
+    __slots__ = ("days", "done", "title_ids", "titles", "_totals")
+
+    def __init__(self, goals: Iterable[Goal]):
+        _load_numpy()
+        goals = goals if isinstance(goals, list) else list(goals)
+        raw_titles = list(map(attrgetter("title"), goals))
+
+        # Per-row work is C-level map() over small lookup tables built from distinct values.
+        self.titles = []  # lowercased titles, indexed by title id
+        key_ids, title_id = {}, {}
+        for raw in dict.fromkeys(raw_titles):
+            key = raw.lower()
+            if key not in key_ids:
+                key_ids[key] = len(self.titles)
+                self.titles.append(key)
+            title_id[raw] = key_ids[key]
+
+        days = array("l", list(map(attrgetter("day"), goals)))
+        done = array("b", [g.completed == 1 for g in goals])
+        title_ids = array("l", list(map(title_id.__getitem__, raw_titles)))
+        if np is not None:
+            days = np.frombuffer(days, dtype=np.dtype(days.typecode)) if days else np.zeros(0, int)
+            done = np.frombuffer(done, dtype=np.int8).astype(bool) if done else np.zeros(0, bool)
+            title_ids = np.frombuffer(title_ids, dtype=np.dtype(title_ids.typecode)) if title_ids else np.zeros(0, int)
+        self.days, self.done, self.title_ids = days, done, title_ids
+        self._totals = None
+
+    def day_totals(self):
+        """(day ordinals, totals, completed), oldest first."""
+        if self._totals is None:
+            if np is not None:
+                ords, inverse = np.unique(self.days, return_inverse=True)
+                totals = np.bincount(inverse, minlength=len(ords))
+                completed = np.bincount(inverse, weights=self.done, minlength=len(ords)).astype(np.int64)
+                self._totals = (ords, totals, completed)
+            else:
+                totals = Counter(self.days)
+                completed = Counter(compress(self.days, self.done))
+                ords = sorted(totals)
+                self._totals = (ords, [totals[o] for o in ords], [completed[o] for o in ords])
+        return self._totals
+
+    def day_rows(self) -> List[DayTotals]:
+        ords, totals, completed = self.day_totals()
+        return [(day_iso(int(o)), int(t), int(c)) for o, t, c in zip(ords, totals, completed)]
+
+    def weekly_summary(self, today: date = None) -> Dict[str, float]:
+        today = today or datetime.now().date()
+        ords, totals, completed = self.day_totals()
+        lo = bisect_left(ords, today.toordinal() - 6)
+        hi = bisect_right(ords, today.toordinal())
+        week = [(day_iso(int(ords[i])), int(totals[i]), int(completed[i])) for i in range(lo, hi)]
+        return weekly_summary_from_days(week, today)
+
+    def streaks(self, today: date = None) -> Tuple[int, int]:
+        """(activity streak, perfect streak)."""
+        today = today or datetime.now().date()
+        ords, totals, completed = self.day_totals()
+        if np is None:
+            newest = [(day_iso(o), t, c)
+                      for o, t, c in zip(reversed(ords), reversed(totals), reversed(completed))]
+            return streak_from_days(newest, today), perfect_streak_from_days(newest, today)
+
+        t_o = today.toordinal()
+        ords, totals, completed = ords[::-1], totals[::-1], completed[::-1]
+
+        # Perfect: every day counts (future ones too), an unfinished today is skipped.
+        perfect = completed == totals
+        perfect = perfect[~((ords == t_o) & ~perfect)]
+        perfect_streak = len(perfect) if perfect.all() else int(np.argmin(perfect))
+
+        # Activity: consecutive days back from today (or yesterday) with a completion.
+        past = ords <= t_o
+        ords, completed = ords[past], completed[past]
+        start = t_o
+        if not len(ords) or ords[0] != t_o or completed[0] == 0:
+            start = t_o - 1
+            if len(ords) and ords[0] == t_o:
+                ords, completed = ords[1:], completed[1:]
+        ok = (ords == start - np.arange(len(ords))) & (completed > 0)
+        active_streak = len(ok) if ok.all() else int(np.argmin(ok))
+        return active_streak, perfect_streak
+
+    def most_missed(self) -> str:
+        if np is None:
+            counts = Counter(compress(self.title_ids, map(not_, self.done)))
+            most_common = counts.most_common(1)
+            return self.titles[most_common[0][0]].capitalize() if most_common else "None"
+        missed = self.title_ids[~self.done]
+        if not len(missed):
+            return "None"
+        counts = np.bincount(missed)
+        tied = np.flatnonzero(counts == counts.max())
+        # Ties go to the title missed first, like Counter.most_common
+        unique, first_seen = np.unique(missed, return_index=True)
+        first = dict(zip(unique.tolist(), first_seen.tolist()))
+        return self.titles[min(tied.tolist(), key=first.__getitem__)].capitalize()
+
+    def analyze(self, today: date = None) -> Dict:
+        today = today or datetime.now().date()
+        ords, totals, completed = self.day_totals()
+        i = bisect_left(ords, today.toordinal())
+        found = i < len(ords) and ords[i] == today.toordinal()
+        active, perfect = self.streaks(today)
+        return {
+            "daily_completion": daily_completion(int(totals[i]), int(completed[i])) if found else 0,
+            "weekly_summary": self.weekly_summary(today),
+            "streak": active,
+            "perfect_streak": perfect,
+            "most_missed": self.most_missed(),
+        }
\ No newline at end of file
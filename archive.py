@@ -0,0 +1,74 @@
+"""Keeps goals.db small: moves old goals to per-year archives and tidies the file.
+
+Goals from before the year KEEP_DAYS ago go to one archive database per
+year (see ARCHIVE in database.py). Analytics don't change, since the
+per-day and most-missed numbers stay in goals.db, and an archived day
+opened in the dashboard comes back until the next run. Search still finds
+archived goals, by plain text match on the title (no typo correction:
+the archives have no search index). maintain() runs
+each task once it is due, and the app calls it in the background at start:
+
+    archive   daily     move whole years past the horizon out of goals.db,
+                        and trim the change log other windows sync from
+    analyze   weekly    refresh the planner's statistics (right away after a move)
+    vacuum    monthly   give free pages back to the disk, when enough are free
+
+    python archive.py [--keep-days 730] [--force]
+"""
+import sys
+from datetime import date
+
+import database as db
+
+KEEP_DAYS = 730      # at least this much history stays in goals.db
+EVERY = {"archive": 1, "analyze": 7, "vacuum": 30}  # days between runs
+VACUUM_FREE = 0.1    # vacuum only once this share of the file is free pages
+
+def cutoff(today: date = None, keep_days: int = KEEP_DAYS) -> str:
+    """First day kept in goals.db: January 1st of the year keep_days ago."""
+    today = today or date.today()
+    return date(date.fromordinal(today.toordinal() - keep_days).year, 1, 1).isoformat()
+
+def due(log: dict, task: str, today: date) -> bool:
+    last = log.get(task)
+    return last is None or (today - date.fromisoformat(last)).days >= EVERY[task]
+
+def maintain(today: date = None, keep_days: int = KEEP_DAYS, force: bool = False) -> dict:
+    """Runs the tasks that are due (all of them with force); returns
+    {"archived": goals moved, "analyzed": bool, "vacuumed": bool}."""
+    today = today or date.today()
+    log, done = db.maintenance_log(), {"archived": 0, "analyzed": False, "vacuumed": False}
+    if force or due(log, "archive", today):
+        done["archived"] = db.archive_goals(cutoff(today, keep_days))
+        db.trim_changes()
+        db.log_maintenance("archive", today.isoformat())
+    if force or done["archived"] or due(log, "analyze", today):
+        db.analyze()
+        db.log_maintenance("analyze", today.isoformat())
+        done["analyzed"] = True
+    if force or due(log, "vacuum", today):
+        if force or db.free_fraction() >= VACUUM_FREE:
+            db.vacuum()
+            done["vacuumed"] = True
+        db.log_maintenance("vacuum", today.isoformat())
+    return done
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="archive.py", description="Archive old goals and tidy goals.db. Archived "
+                                     "goals stay searchable, without typo correction.")
+    parser.add_argument("--keep-days", type=int, default=KEEP_DAYS, help="history to keep in goals.db (whole years)")
+    parser.add_argument("--force", action="store_true", help="run every task now, not just the due ones")
+    args = parser.parse_args(argv)
+
+    db.init_db()
+    done = maintain(keep_days=args.keep_days, force=args.force)
+    years = db.archived_years()
+    print(f"Archived {done['archived']:,} goals from before {cutoff(keep_days=args.keep_days)}"
+          + (f"; the archive holds {years[0]}-{years[-1]}." if years else "."))
+    print(f"Statistics {'refreshed' if done['analyzed'] else 'still fresh'}, "
+          f"{'file compacted' if done['vacuumed'] else 'no compaction needed'}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
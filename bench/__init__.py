@@ -0,0 +1 @@
+"""Benchmarks for Focus Ultra; see __main__.py for the commands."""
@@ -0,0 +1,25 @@
+"""python -m bench                         every check in checks.py
+python -m bench NAME [NAME ...]          just those checks (e.g. search perf)
+python -m bench generate FILE [options]  write a synthetic goals.db (data.py)
+python -m bench run [options]            time everything, save JSON (suite.py)
+python -m bench compare FILE [options]   flag regressions against the baseline (compare.py)
+"""
+import sys
+
+def main(argv):
+    if argv and argv[0] in ("-h", "--help", "help"):
+        from bench import checks
+        print(__doc__ + "\nchecks: " + " ".join(checks.BENCHES), end="\n")
+        return 0
+    if argv and argv[0] in ("generate", "run", "compare"):
+        from bench import compare, data, suite
+        return {"generate": data, "run": suite, "compare": compare}[argv[0]].main(argv[1:])
+    from bench import checks
+    unknown = [name for name in argv if name not in checks.BENCHES]
+    if unknown:
+        print(f"unknown check {unknown[0]!r}; see python -m bench --help")
+        return 2
+    checks.main(argv)
+    return 0
+
+sys.exit(main(sys.argv[1:]))
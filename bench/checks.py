@@ -0,0 +1,1162 @@
+"""Rough performance checks for Focus Ultra: before/after comparisons with
+parity asserts, one function per optimization.
+
+Run with:  python -m bench [name ...]
+Behaviour is tested in tests/ (python -m pytest); the asserts here only
+make sure a before/after pair computed the same thing.
+Each benchmark works on a throwaway database in a temp folder, never goals.db.
+"""
+import os
+import shutil
+import sys
+import sqlite3
+import tempfile
+import time
+from datetime import date
+
+import database as db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # the project folder
+BENCHES = {}
+
+def bench(fn):
+    BENCHES[fn.__name__.replace("bench_", "")] = fn
+    return fn
+
+def use_temp_db():
+    folder = tempfile.mkdtemp(prefix="focus-bench-")
+    db.close_db()
+    db.DB_NAME = os.path.join(folder, "goals.db")
+    db.init_db()
+    return db.DB_NAME
+
+def fill(n, per_day=20, titles=60, seed=1):
+    """Writes n goals spread over n / per_day days ending today."""
+    import random
+    rnd = random.Random(seed)
+    first = date.today().toordinal() - n // per_day + 1
+    vocab = [f"Goal {i}" for i in range(titles)]
+    rows = []
+    for i in range(n):
+        title = rnd.choice(vocab)
+        rows.append((title, title.lower(), date.fromordinal(first + i // per_day).isoformat(), int(rnd.random() < 0.8)))
+    with db.transaction() as cursor:
+        cursor.executemany("INSERT INTO goals (title, title_key, target_date, completed) VALUES (?, ?, ?, ?)", rows)
+
+def timed(fn, *args, repeat=1):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def repeated(n, fn, *args):
+    for _ in range(n):
+        fn(*args)
+
+class FakeRoot:
+    """Just enough of Tk for service.py without a display; timers never fire."""
+    def after(self, ms, fn): return fn
+    def after_cancel(self, token): pass
+    def report_callback_exception(self, kind, exc, tb): raise exc
+
+def rate(n, seconds):
+    return f"{n / seconds:>10.0f} ops/s"
+
+# --- connect-per-call, as database.py used to work ---
+def legacy_add_goal(path, title, target_date):
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO goals (title, target_date, completed) VALUES (?, ?, 0)", (title, target_date))
+        conn.commit()
+
+def legacy_toggle(path, goal_id, current_status):
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE goals SET completed = ? WHERE id = ?", (0 if current_status else 1, goal_id))
+        conn.commit()
+
+def legacy_get_goals_by_date(path, target_date):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT * FROM goals WHERE target_date = ?", (target_date,)).fetchall()
+
+# --- raw-row analytics, as refresh_analytics used to run them ---
+def legacy_refresh_analytics(today_str):
+    import analytics
+    all_goals = db.get_all_goals()
+    goals_today = db.get_goals_by_date(today_str)
+    return (analytics.calculate_daily_completion(goals_today), analytics.calculate_streak(all_goals),
+            analytics.calculate_perfect_streak(all_goals), analytics.get_most_missed(all_goals),
+            analytics.get_weekly_summary(all_goals))
+
+def sql_refresh_analytics(today_str):
+    import analytics
+    total, completed = db.get_day_totals(today_str)
+    active, perfect = db.get_streaks()
+    return (analytics.daily_completion(total, completed), active,
+            perfect, analytics.most_missed_from_counts(db.get_top_missed()),
+            analytics.weekly_summary_from_days(db.get_week_totals()))
+
+# --- analytics.py's original row-walking implementations, for parity checks ---
+def legacy_weekly_summary(all_goals):
+    from datetime import timedelta
+    today = date.today()
+    summary = {}
+    for d in [(today - timedelta(days=i)).isoformat() for i in range(6, -1, -1)]:
+        day_goals = [g for g in all_goals if g.target_date == d]
+        summary[d] = (sum(1 for g in day_goals if g.completed == 1) / len(day_goals)) * 100 if day_goals else 0.0
+    return summary
+
+def legacy_streak(all_goals):
+    from datetime import timedelta
+    goals_by_date = {}
+    for g in all_goals: goals_by_date.setdefault(g.target_date, []).append(g)
+    today = check_date = date.today()
+    streak = 0
+    while True:
+        day_goals = goals_by_date.get(check_date.isoformat())
+        if day_goals and any(g.completed == 1 for g in day_goals):
+            streak += 1
+        elif check_date != today:
+            break
+        check_date -= timedelta(days=1)
+    return streak
+
+def legacy_perfect_streak(all_goals):
+    goals_by_date = {}
+    for g in all_goals: goals_by_date.setdefault(g.target_date, []).append(g)
+    streak, today_str = 0, date.today().isoformat()
+    for d_str in sorted(goals_by_date, reverse=True):
+        day_goals = goals_by_date[d_str]
+        if all(g.completed == 1 for g in day_goals): streak += 1
+        elif d_str != today_str: break
+    return streak
+
+def legacy_most_missed(all_goals):
+    from collections import Counter
+    counts = Counter(g.title.lower() for g in all_goals if g.completed == 0)
+    return counts.most_common(1)[0][0].capitalize() if counts else "None"
+
+def synthetic_goals(n, per_day=20, titles=60, seed=1):
+    import random
+    rnd = random.Random(seed)
+    first = date.today().toordinal() - n // per_day + 1
+    vocab = [f"Goal {i}" for i in range(titles)]
+    return [db.Goal(i + 1, rnd.choice(vocab), date.fromordinal(first + i // per_day).isoformat(),
+                    int(rnd.random() < 0.8)) for i in range(n)]
+
+@bench
+def bench_connections(n=500):
+    """Per-call connect/commit vs the pooled connection."""
+    today = date.today().isoformat()
+
+    # The legacy path runs on a rollback-journal file, like old goals.db files.
+    path = os.path.join(tempfile.mkdtemp(prefix="focus-bench-"), "legacy.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE goals (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                     "target_date TEXT NOT NULL, completed INTEGER DEFAULT 0)")
+    legacy = {}
+    t = time.perf_counter()
+    for i in range(n): legacy_add_goal(path, f"goal {i}", today)
+    legacy["add_goal"] = time.perf_counter() - t
+    t = time.perf_counter()
+    for i in range(n): legacy_toggle(path, i + 1, i % 2)
+    legacy["toggle_goal_status"] = time.perf_counter() - t
+    # Reads change nothing, so they get the best of a few passes: less noise.
+    # Each result is dropped before the next read, as the dashboard does.
+    legacy["get_goals_by_date"] = timed(repeated, n, legacy_get_goals_by_date, path, today, repeat=5)[1]
+
+    use_temp_db()
+    pooled = {}
+    t = time.perf_counter()
+    for i in range(n): db.add_goal(f"goal {i}", today)
+    pooled["add_goal"] = time.perf_counter() - t
+    t = time.perf_counter()
+    for i in range(n): db.toggle_goal_status(i + 1, i % 2)
+    pooled["toggle_goal_status"] = time.perf_counter() - t
+    pooled["get_goals_by_date"] = timed(repeated, n, db.get_goals_by_date, today, repeat=5)[1]
+
+    for name in legacy:
+        print(f"  {name:<20} legacy {rate(n, legacy[name])}   pooled {rate(n, pooled[name])}"
+              f"   x{legacy[name] / pooled[name]:.1f}")
+
+@bench
+def bench_migrate(n=200_000):
+    """In-place upgrade of a pre-migration goals.db."""
+    path = os.path.join(tempfile.mkdtemp(prefix="focus-bench-"), "goals.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE goals (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                     "target_date TEXT NOT NULL, completed INTEGER DEFAULT 0)")
+        conn.executemany("INSERT INTO goals (title, target_date, completed) VALUES (?, ?, ?)",
+                         ((f"Goal {i % 50}", date.fromordinal(738000 + i // 100).isoformat(), i % 3 == 0)
+                          for i in range(n)))
+    db.close_db()
+    db.DB_NAME = path
+    t = time.perf_counter()
+    db.init_db()
+    elapsed = time.perf_counter() - t
+    assert db.schema_version() == len(db.MIGRATIONS)
+    assert db._query("SELECT COUNT(*) FROM goals WHERE title_key IS NULL")[0][0] == 0
+    print(f"  {n} rows upgraded to v{db.schema_version()} in {elapsed * 1000:.0f} ms")
+
+@bench
+def bench_analytics_sql(n=500_000):
+    """Analytics page refresh: full-table load vs SQL aggregates."""
+    import tracemalloc
+    use_temp_db()
+    fill(n)
+    today = date.today().isoformat()
+    results = {}
+    for name, fn in (("raw rows", legacy_refresh_analytics), ("sql aggregates", sql_refresh_analytics)):
+        tracemalloc.start()
+        results[name], elapsed = timed(fn, today)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {name:<15} {elapsed * 1000:8.1f} ms   peak {peak / 1e6:7.1f} MB")
+    assert results["raw rows"] == results["sql aggregates"], results
+
+@bench
+def bench_streaks():
+    """Streak reads against the daily_stats rollup as history grows."""
+    for n in (10_000, 100_000, 1_000_000):
+        use_temp_db()
+        fill(n)
+        # A fully missed day three weeks back, so both streaks have a break to stop at.
+        with db.transaction() as cursor:
+            cursor.execute("UPDATE goals SET completed = 0 WHERE target_date = ?",
+                           (date.fromordinal(date.today().toordinal() - 21).isoformat(),))
+        _, cold = timed(db.get_streaks)
+        _, warm = timed(db.get_streaks, repeat=100)
+        db.add_goal("Fresh goal")          # today's write: both streaks rescan
+        _, after_write = timed(db.get_streaks)
+        old = date.fromordinal(date.today().toordinal() - 400).isoformat()
+        db.add_goal("Backfilled goal", old)  # behind both breaks: cache kept
+        _, after_old = timed(db.get_streaks)
+        assert not db.verify_daily_stats()
+        print(f"  {n:>9} goals  cold {cold * 1000:7.2f} ms   cached {warm * 1e6:6.1f} us"
+              f"   after today's write {after_write * 1000:7.2f} ms   after old write {after_old * 1000:7.2f} ms")
+
+@bench
+def bench_analytics_cache(n=100_000, switches=50):
+    """Analytics tab switches against the cache: no-op while nothing changed, partial after a write."""
+    use_temp_db()
+    fill(n)
+    today = date.today().isoformat()
+
+    def fresh():
+        # Same numbers with every cached entry thrown away first.
+        cached = db.get_analytics(today)
+        db._forget_cache()
+        assert db.get_analytics(today) == cached, cached
+
+    _, cold = timed(db.get_analytics, today)
+    before = db.cache_stats()
+    _, switch = timed(db.get_analytics, today, repeat=switches)
+    after = db.cache_stats()
+    assert after["misses"] == before["misses"] and after["hits"] == before["hits"] + switches, (before, after)
+    print(f"  cold {cold * 1000:7.2f} ms   tab switch {switch * 1e6:6.1f} us   ({switches} switches, 0 misses)")
+
+    for label, goal_date in (("today's write", today),
+                             ("backfill 400 days back", date.fromordinal(date.today().toordinal() - 400).isoformat())):
+        db.get_analytics(today)
+        db.get_day_totals(today)
+        kept = db.cache_stats()["size"]
+        db.add_goal("Cache check", goal_date)
+        dropped = kept - db.cache_stats()["size"]
+        misses = db.cache_stats()["misses"]
+        _, elapsed = timed(db.get_analytics, today)
+        print(f"  {label:<23} dropped {dropped}/{kept} entries   refresh {elapsed * 1000:6.2f} ms"
+              f"   {db.cache_stats()['misses'] - misses} misses")
+        fresh()
+
+    # A commit from another connection (e.g. server.py in its own process) empties the cache.
+    with sqlite3.connect(db.DB_NAME) as conn:
+        conn.execute("INSERT INTO goals (title, title_key, target_date, completed) VALUES ('Outside', 'outside', ?, 1)",
+                     (today,))
+    total = db.get_day_totals(today)[0]
+    assert total == db._query("SELECT COUNT(*) FROM goals WHERE target_date = ?", (today,))[0][0], total
+    fresh()
+
+    # Historical windows are evicted oldest-first once the cache is full.
+    first = date.today().toordinal() - 2000
+    for i in range(db.current_store().cache.size + 100):
+        db.get_daily_totals(date.fromordinal(first + i).isoformat(), date.fromordinal(first + i + 30).isoformat())
+    stats = db.cache_stats()
+    assert stats["size"] == db.current_store().cache.size and stats["evictions"] >= 100, stats
+    print(f"  external commit seen, LRU holds {stats['size']} entries   {stats}")
+
+def legacy_range_series(all_goals, start, end):
+    """Per-day percentages the way get_weekly_summary builds them: one filter of every goal per day."""
+    summary = {}
+    for o in range(start.toordinal(), end.toordinal() + 1):
+        d = date.fromordinal(o).isoformat()
+        day_goals = [g for g in all_goals if g.target_date == d]
+        summary[d] = (sum(1 for g in day_goals if g.completed == 1) / len(day_goals)) * 100 if day_goals else 0.0
+    return summary
+
+@bench
+def bench_range(years=10, per_day=20):
+    """Range analytics (day/week/month series) over 10 years of history, and the heatmap year."""
+    use_temp_db()
+    fill(years * 365 * per_day, per_day=per_day)
+    today = date.today()
+    all_goals = db.get_all_goals()
+    print(f"  {len(all_goals)} goals over {years} years")
+    for days in (7, 30, 90, 365, years * 365):
+        start = date.fromordinal(today.toordinal() - days + 1)
+        db._forget_cache()
+        summary, cold = timed(db.get_range_analytics, start.isoformat(), today.isoformat())
+        _, warm = timed(db.get_range_analytics, start.isoformat(), today.isoformat(), repeat=20)
+        assert len(summary["days"]) == days
+        assert sum(t for _, t, _, _ in summary["months"]) == sum(t for _, t, _, _ in summary["weeks"]) == summary["total"]
+        line = f"  {days:>5} days  range query {cold * 1000:7.2f} ms   cached {warm * 1e6:6.1f} us"
+        if days <= 365:
+            legacy, legacy_t = timed(legacy_range_series, all_goals, start, today)
+            assert legacy == {d: pct for d, _, _, pct in summary["days"]}
+            line += f"   per-day filter {legacy_t * 1000:8.1f} ms"
+        print(line)
+
+    # The heatmap year matches the per-day series it is drawn from.
+    first = date.fromordinal(today.toordinal() - today.weekday() - 52 * 7)
+    summary = db.get_range_analytics(first.isoformat(), today.isoformat())
+    assert len(summary["weeks"]) == 53 and summary["days"][-1][0] == today.isoformat()
+
+@bench
+def bench_archive(years=10, per_day=40, archived=5):
+    """Dashboard and analytics before/after archiving the oldest 5 of 10 years:
+    same numbers, same export, smaller goals.db."""
+    import archive
+    from bench import data
+    path = os.path.join(tempfile.mkdtemp(prefix="focus-bench-"), "goals.db")
+    data.generate(path, days=years * 365, per_day=per_day, seed=4, templates=2)
+    db.close_db()
+    db.DB_NAME = path
+    db.init_db()
+    today = date.today()
+    keep = (today - date(today.year - archived, 1, 1)).days  # the horizon falls in the year 5 years ago
+
+    def snapshot():
+        db._forget_cache()
+        return (db.get_daily_totals(), db.get_streaks(), db.get_top_missed(10 ** 6), db.get_analytics(today.isoformat()),
+                db.get_range_analytics(date(today.year - years, 1, 1).isoformat(), today.isoformat()))
+
+    def cold(fn, *args):
+        def call():
+            db._forget_cache()
+            return fn(*args)
+        return timed(call, repeat=5)[1]
+
+    cases = {
+        "dashboard (today)": lambda: timed(db.get_goals_by_date, today.isoformat(), repeat=50)[1],
+        "analytics page": lambda: cold(db.get_analytics, today.isoformat()),
+        "most missed": lambda: cold(db.get_top_missed, 5),
+        "all goals": lambda: timed(db.get_all_goals, repeat=3)[1],
+        "search 'read'": lambda: timed(db.search_goals, "read", repeat=20)[1],
+    }
+    db.prepare_day(today.isoformat())
+    expected, export = snapshot(), list(db.iter_goals())
+    old_day = date(today.year - archived - 2, 3, 1).isoformat()
+    db.prepare_day(old_day)
+    old_goals = db.get_goals_by_date(old_day)
+    before = {name: fn() for name, fn in cases.items()}
+    size = os.path.getsize(path)
+
+    done, elapsed = timed(archive.maintain, today, keep)
+    assert done["archived"] and db.archived_years()[-1] == today.year - archived - 1, (done, db.archived_years())
+    db.close_db()  # checkpoint, so the file size is what's left
+    after = {name: fn() for name, fn in cases.items()}
+    hot = db._query("SELECT COUNT(*) FROM goals")[0][0]
+    print(f"  {len(export)} goals over {years} years: {done['archived']} archived to {len(db.archived_years())} "
+          f"year files in {elapsed:.2f} s, {hot} left   goals.db {size / 1e6:.1f} -> {os.path.getsize(path) / 1e6:.1f} MB")
+    for name in cases:
+        print(f"  {name:<18} {before[name] * 1000:8.3f} ms -> {after[name] * 1000:8.3f} ms")
+
+    assert snapshot() == expected
+    assert list(db.iter_goals()) == export
+    assert not db.verify_daily_stats() and db.verify_search_index()
+    assert db.get_goals_by_date(old_day) == []
+    _, thaw = timed(db.prepare_day, old_day)
+    assert db.get_goals_by_date(old_day) == old_goals and snapshot() == expected
+    assert archive.maintain(today, keep, force=True)["archived"] == len(old_goals)
+    assert db.import_rows([(g.title, g.target_date, g.completed) for g in old_goals]) == 0  # dedupe sees the archive
+    print(f"  analytics, export, verify and import dedupe unchanged; an archived day reopens in {thaw * 1000:.1f} ms")
+    db.clear_all_data()
+    assert not db.archived_years() and not os.path.exists(os.path.dirname(db.archive_path(today.year)))
+    assert list(db.iter_goals()) == []
+
+def title_rows(n, words=3000, seed=5):
+    """n goals with 2-4 word titles over a Zipf-ish vocabulary, 50 per day."""
+    import random
+    rnd = random.Random(seed)
+    vocab = ["read", "exercise", "meditate", "write", "journal", "code", "walk", "study"]
+    vocab += ["".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rnd.randint(3, 9))) for _ in range(words)]
+    first = date.today().toordinal() - n // 50
+    for i in range(n):
+        title = " ".join(rnd.choice(vocab[:50] if rnd.random() < 0.7 else vocab) for _ in range(rnd.randint(2, 4)))
+        title = title.capitalize()
+        yield title, title.lower(), date.fromordinal(first + i // 50).isoformat(), int(i % 3 == 0)
+
+@bench
+def bench_search(n=1_000_000):
+    """Prefix and fuzzy title search over a million goals, and index consistency."""
+    use_temp_db()
+    t = time.perf_counter()
+    with db.transaction() as cursor:
+        cursor.executemany("INSERT INTO goals (title, title_key, target_date, completed) VALUES (?, ?, ?, ?)", title_rows(n))
+    print(f"  {n} goals indexed in {time.perf_counter() - t:.1f} s")
+    queries = ["r", "re", "rea", "read", "e w", "exercise jour", "co wa st", "exercize", "meditat wrte", "zzzz"]
+    for q in queries:
+        rows, elapsed = timed(db.search_goals, q, 50, repeat=3)
+        page2 = db.search_goals(q, 50, rows[-1].id) if rows else []
+        assert all(g.id < rows[-1].id for g in page2)
+        words = q.split()
+        if rows and db.search_query(q).count("(") == 0:
+            assert all(all(any(w.startswith(p) for w in g.title.lower().split()) for p in words) for g in rows), q
+        print(f"  {q!r:<16} {db.search_query(q) or '-':<36} {len(rows):>3} hits   {elapsed * 1000:6.2f} ms")
+        assert elapsed < 0.010, (q, elapsed)
+
+    # The index follows every write path.
+    gid = db.add_goal("Quokka sighting")
+    assert [g.id for g in db.search_goals("quok")] == [gid]
+    assert [g.id for g in db.search_goals("quoka")] == [gid]  # fuzzy
+    db.delete_goal(gid)
+    assert db.search_goals("quok") == []
+    db.import_rows([("Quokka again", date.today().isoformat(), 0)])
+    assert len(db.search_goals("quokka")) == 1
+    assert db.verify_search_index()
+    t = time.perf_counter()
+    db.clear_all_data()
+    assert db.search_goals("read") == [] and db.verify_search_index()
+    print(f"  add/delete/import/clear keep the index consistent (clear took {time.perf_counter() - t:.1f} s)")
+
+@bench
+def bench_templates(n=20_000):
+    """Recurring goals: virtual misses on unopened days must give the same
+    analytics as materializing every one of those days."""
+    use_temp_db()
+    fill(n)
+    today = date.today()
+    back = lambda k: date.fromordinal(today.toordinal() - k).isoformat()
+    db.add_template("Read 20 pages", 1, db.ALL_DAYS, back(400))
+    db.add_template("Stand-up notes", *db.parse_repeat("weekdays"), back(300))
+    db.add_template("Water plants", *db.parse_repeat("every 3 days"), back(200))
+    gym = db.add_template("Gym", *db.parse_repeat("mon wed fri"), back(100))
+    db.stop_template(gym, back(30))
+    # The app was opened on some days; on one of them an instance was deleted.
+    for k in range(0, 120, 3):
+        db.prepare_day(back(k))
+    deleted = next(g for g in db.get_goals_by_date(back(9)) if g.title == "Read 20 pages")
+    db.delete_goal(deleted.id)
+    assert db.materialize(back(9)) == 0 and deleted not in db.get_goals_by_date(back(9))
+
+    def snapshot():
+        db._forget_cache()
+        return (db.get_daily_totals(), db.get_streaks(), db.get_top_missed(5), db.get_analytics(today.isoformat()),
+                db.get_range_analytics(back(364), today.isoformat()))
+    rows = db._query("SELECT COUNT(*) FROM goals")[0][0]
+    virtual, elapsed = timed(snapshot)
+    owed = sum(db._virtual_misses(today)[0].values())
+    t = time.perf_counter()
+    made = sum(db.materialize(back(k)) for k in range(1, 401))
+    per_day = (time.perf_counter() - t) / 400
+    assert made == owed, (made, owed)
+    assert not db._virtual_misses(today)[0]
+    real, _ = timed(snapshot)
+    assert virtual == real, [(a, b) for a, b in zip(virtual, real) if a != b][:1]
+    assert not db.verify_daily_stats()
+    _, again = timed(db.prepare_day, back(5), repeat=200)
+    print(f"  {owed} occurrences left virtual next to {rows} goals: analytics identical once materialized")
+    print(f"  cold analytics with virtual days {elapsed * 1000:6.1f} ms   materialize {per_day * 1000:.2f} ms/day"
+          f"   day already done {again * 1e6:.0f} us")
+
+@bench
+def bench_profiles(days=2000):
+    """Profiles: goals.db found from any folder, hot switching, LRU eviction, queued writes
+    staying in their profile, and all-profiles analytics vs merging each profile by hand."""
+    import subprocess
+    import threading
+    from collections import Counter
+    import analytics
+    import profiles
+    import service
+    from bench import data
+
+    where = subprocess.run([sys.executable, "-c", "import database; print(database.DB_NAME)"], cwd=tempfile.gettempdir(),
+                           env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True, check=True).stdout.strip()
+    assert where == os.path.join(ROOT, "goals.db"), where
+    print(f"  started from {tempfile.gettempdir()}: still {where}")
+
+    folder = tempfile.mkdtemp(prefix="focus-bench-")
+    saved = db.APP_DIR, db.DB_NAME, profiles.REGISTRY, profiles.FOLDER
+    db.close_db()
+    db.APP_DIR, profiles.REGISTRY, profiles.FOLDER = folder, os.path.join(folder, "profiles.json"), os.path.join(folder, "profiles")
+    try:
+        names = ["Personal", "Work", "Thesis", "Garden", "Band", "Gym"]
+        for i, name in enumerate(names):
+            path = os.path.join(folder, "goals.db" if name == profiles.DEFAULT else f"{name.lower()}.db")
+            data.generate(path, days=days, per_day=10, seed=i + 1, templates=1 + i % 2)
+            if name != profiles.DEFAULT: profiles.add(name, path)
+        today = date.today().isoformat()
+
+        hot = names[:db.HOT_STORES - 1]
+        cold = []
+        for name in hot:
+            t = time.perf_counter()
+            profiles.switch(name)
+            db.get_analytics(today)
+            cold.append(time.perf_counter() - t)
+        misses = db.cache_stats()["misses"]
+        rounds = 300
+        t = time.perf_counter()
+        for i in range(rounds):
+            profiles.switch(hot[i % len(hot)])
+            db.get_analytics(today)
+        switch = (time.perf_counter() - t) / rounds
+        assert db.cache_stats()["misses"] <= misses + 1  # a round trip still hits every cache
+        print(f"  switch + Analytics page: first visit {sum(cold) / len(cold) * 1000:6.2f} ms   "
+              f"hot {switch * 1e6:7.1f} us (registry save included)")
+
+        first = db.get_store(profiles.path(names[0]))
+        for name in names:
+            profiles.switch(name)
+            db.get_analytics(today)
+        assert len(db._stores) == db.HOT_STORES and first.connections == 0 and first.path not in db._stores
+        print(f"  after visiting {len(names)} profiles {db.HOT_STORES} stay hot, the oldest one's connection is closed")
+
+        # A write queued for Work lands in Work even if the switch comes first.
+        profiles.switch("Work")
+        svc = service.Service(FakeRoot())
+        gate = threading.Event()
+        svc.write(gate.wait)
+        svc.write(db.add_goal, "Queued before the switch", today)
+        profiles.switch("Thesis")
+        gate.set()
+        svc.drain()
+        svc.shutdown()
+        count = lambda name: db.get_store(profiles.path(name)).use()
+        for name, expected in (("Work", 1), ("Thesis", 0)):
+            with count(name):
+                assert db._query("SELECT COUNT(*) FROM goals WHERE title = 'Queued before the switch'")[0][0] == expected
+        print("  writes queued before a switch land in the profile they were made in")
+
+        paths = profiles.paths()
+        totals, done, missed = Counter(), Counter(), Counter()
+        for path in paths:
+            with db.get_store(path).use():
+                for d, t, c in db.get_daily_totals():
+                    totals[d] += t
+                    done[d] += c
+                for key, n in db.get_top_missed(10 ** 6):
+                    missed[key] += n
+        by_hand = tuple((d, totals[d], done[d]) for d in sorted(totals))
+        combined, cold_t = timed(db.get_combined_daily_totals, paths)
+        assert combined == by_hand
+        stats, stats_t = timed(db.get_combined_analytics, paths, today)
+        newest, now = by_hand[::-1], date.today()
+        assert stats["streak"] == analytics.streak_from_days(newest, now)
+        assert stats["perfect_streak"] == analytics.perfect_streak_from_days(newest, now)
+        assert stats["weekly_summary"] == analytics.weekly_summary_from_days(by_hand, now)
+        assert stats["daily_completion"] == analytics.daily_completion(totals[today], done[today])
+        top = max(missed.values())
+        assert stats["most_missed"].lower() in {k for k, n in missed.items() if n == top}, stats["most_missed"]
+        year_ago = date.fromordinal(now.toordinal() - 364).isoformat()
+        assert db.get_combined_range_analytics(paths, year_ago, today) == analytics.range_summary(
+            [r for r in by_hand if year_ago <= r[0] <= today], date.fromisoformat(year_ago), now)
+        _, warm = timed(db.get_combined_analytics, paths, today, repeat=50)
+        print(f"  all {len(paths)} profiles (ATTACH): daily totals {cold_t * 1000:6.2f} ms   analytics {stats_t * 1000:6.2f} ms"
+              f"   cached {warm * 1e6:5.1f} us   same as merging each profile")
+
+        with sqlite3.connect(paths[2]) as conn:
+            conn.execute("INSERT INTO goals (title, title_key, target_date, completed) VALUES ('Outside', 'outside', ?, 1)",
+                         (today,))
+        conn.close()
+        assert db.get_combined_daily_totals(paths, today, today)[0][1] == totals[today] + 1
+        print("  a commit to one profile from another connection shows up in the combined view")
+    finally:
+        db.close_db()
+        db.APP_DIR, db.DB_NAME, profiles.REGISTRY, profiles.FOLDER = saved
+
+@bench
+def bench_columnar():
+    """Row-walking analytics vs the columnar engine (NumPy if installed, else array)."""
+    import analytics
+    for n in (10_000, 100_000, 1_000_000):
+        goals = synthetic_goals(n)
+        today = date.today().isoformat()
+        goals_today = [g for g in goals if g.target_date == today]
+        t = time.perf_counter()
+        legacy = {"daily_completion": analytics.calculate_daily_completion(goals_today),
+                  "weekly_summary": legacy_weekly_summary(goals), "streak": legacy_streak(goals),
+                  "perfect_streak": legacy_perfect_streak(goals), "most_missed": legacy_most_missed(goals)}
+        legacy_t = time.perf_counter() - t
+        columnar, columnar_t = timed(analytics.analyze, goals)
+        assert legacy == columnar, (legacy, columnar)
+        print(f"  {n:>9} goals  rows {legacy_t * 1000:8.1f} ms   columnar"
+              f" ({'numpy' if analytics._load_numpy() is not None else 'array'}) {columnar_t * 1000:8.1f} ms")
+
+@bench
+def bench_model(size="1m"):
+    """Memory of a full-history load (tracemalloc): plain sqlite3 tuples vs Goal objects."""
+    import gc
+    import tracemalloc
+    from bench import data
+    db.close_db()
+    db.DB_NAME = data.fixture(size)
+    loads = {"tuples": lambda: db._query(db._ALL_GOALS_SQL), "Goals": db.get_all_goals}
+    seen = {}
+    for name, load in loads.items():
+        rows, elapsed = timed(load)
+        del rows
+        gc.collect()
+        tracemalloc.start()
+        rows = load()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        seen[name] = (rows, current)
+        print(f"  {len(rows)} {name:<6}  {current / 1e6:7.1f} MB held, {peak / 1e6:7.1f} MB peak"
+              f"   {current / len(rows):5.0f} B/goal   load {elapsed:.2f} s")
+    (tuples, before), (goals, after) = seen["tuples"], seen["Goals"]
+    assert [(g.id, g.title, g.target_date, g.completed) for g in goals] == tuples
+    assert after < 0.6 * before, (before, after)
+    print(f"  {1 - after / before:.0%} smaller")
+
+@bench
+def bench_write_behind(n=1000):
+    """Per-call commits vs the write-behind queue: n inserts, then n toggles over 50 goals."""
+    import service
+    use_temp_db()
+    today = date.today().isoformat()
+    t = time.perf_counter()
+    ids = [db.add_goal(f"goal {i}", today) for i in range(n)]
+    for i in range(n): db.toggle_goal_status(ids[i % 50], i % 2)
+    per_call = time.perf_counter() - t
+
+    use_temp_db()
+    svc = service.Service(FakeRoot())
+    writes = service.WriteBehind(svc)
+    t = time.perf_counter()
+    for i in range(n):
+        writes.add(f"goal {i}", today)
+        if i % 50 == 49: writes.flush()   # a paste of 50 goals per window
+    writes.flush()
+    svc.drain()
+    ids = list(writes.real_ids.values())
+    for i in range(n):
+        writes.set_status(ids[i % 50], i % 2 == 0)
+        if i % 50 == 49: writes.flush()   # 50 rapid clicks per window
+    writes.flush()
+    svc.drain()
+    batched = time.perf_counter() - t
+    svc.shutdown()
+    assert db.get_day_totals(today)[0] == n
+    print(f"  per-call {rate(2 * n, per_call)}   write-behind {rate(2 * n, batched)}   x{per_call / batched:.1f}")
+
+SYNC_CHILD = """
+import sys, database as db
+db.DB_NAME, worker, rounds = sys.argv[1], sys.argv[2], int(sys.argv[3])
+db.BUSY_TIMEOUT, db.LOCK_RETRIES = 0.005, 10   # give up waiting early so the retries get used
+for i in range(rounds):
+    gid = db.add_goal(f"{worker} goal {i}", "2024-01-01")
+    if i % 2 == 0: db.set_goal_status(gid, 1)
+    if i % 5 == 4: db.delete_goal(gid)
+    with db.transaction() as cursor:   # read-modify-write: lost if two processes interleave
+        n = int(cursor.execute("SELECT title FROM goals WHERE id = 1").fetchone()[0])
+        cursor.execute("UPDATE goals SET title = ? WHERE id = 1", (str(n + 1),))
+print(db.current_store().retries, flush=True)
+"""
+
+@bench
+def bench_sync(workers=4, rounds=300):
+    """Processes writing one file at once (commits/s, lock retries) and a
+    get_changes poller following along; tests/test_sync.py checks the results."""
+    import subprocess
+    day = "2024-01-01"
+    path = use_temp_db()
+    db.add_goal("0", day)
+    seq = db.get_changes()[0]
+    polls = deltas = reloads = 0
+    poll_t = 0.0
+
+    t = time.perf_counter()
+    children = [subprocess.Popen([sys.executable, "-c", SYNC_CHILD, path, f"w{w}", str(rounds)],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=ROOT)
+                for w in range(workers)]
+    while any(c.poll() is None for c in children):
+        started = time.perf_counter()
+        seq, changed = db.get_changes(seq)
+        poll_t += time.perf_counter() - started
+        polls += 1
+        if changed is None: reloads += 1
+        else: deltas += len(changed)
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - t
+    retries = 0
+    for c in children:
+        out, err = c.communicate()
+        assert c.returncode == 0, err
+        retries += int(out)
+    total = workers * rounds
+    assert db.get_goal(1).title == str(total)
+    writes = total * 3 + total // 2 + total // 5
+    print(f"  {workers} processes, {writes:,} commits in {elapsed:.2f}s ({writes / elapsed:,.0f}/s), "
+          f"{retries} BEGIN/COMMIT retries")
+    print(f"  poller: {polls} polls, {poll_t / polls * 1e6:.0f} us each, {deltas:,} goal deltas, {reloads} reloads")
+
+@bench
+def bench_transfer():
+    """Streaming CSV import / JSONL export: time and peak memory at two sizes."""
+    import csv
+    import tracemalloc
+    import transfer
+    for n in (50_000, 500_000):
+        folder = tempfile.mkdtemp(prefix="focus-bench-")
+        src = os.path.join(folder, "in.csv")
+        first = date.today().toordinal() - n // 20
+        with open(src, "w", newline="") as f:
+            out = csv.writer(f)
+            out.writerow(transfer.FIELDS)
+            for i in range(n):
+                out.writerow((f"Goal {i % 20}", date.fromordinal(first + i // 20).isoformat(), i % 3 != 0))
+        use_temp_db()
+        tracemalloc.start()
+        stats, imported_t = timed(transfer.import_goals, src)
+        import_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        written, exported_t = timed(transfer.export_goals, os.path.join(folder, "out.jsonl"))
+        export_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert stats["imported"] == written == n, (stats, written)
+        assert not db.verify_daily_stats()
+        print(f"  {n:>9} rows  import {rate(n, imported_t)} peak {import_peak / 1e6:5.1f} MB"
+              f"   export {rate(n, exported_t)} peak {export_peak / 1e6:5.1f} MB")
+
+STARTUP_CHILD = """
+import os, sys, time
+t = time.perf_counter()
+if sys.argv[1] == "cli":
+    import cli
+    imported = time.perf_counter()
+    with open(os.devnull, "w") as sys.stdout:
+        cli.main(["list"])
+    sys.stdout = sys.__stdout__
+elif sys.argv[1] == "gui-import":
+    import main
+    imported = time.perf_counter()
+else:
+    import tkinter as tk, main
+    imported = time.perf_counter()
+    root = tk.Tk()
+    app = main.UltraApp(root)
+    if sys.argv[1] == "gui-eager":
+        for page in ("Analytics", "Settings"): app.ensure_page(page)
+    root.update()   # first paint
+    app.on_close()
+print(imported - t, time.perf_counter() - t)
+"""
+
+# cli.py's target is well under 50 ms; the budget leaves room so creep shows
+# up here long before a user would notice it.
+CLI_READY_MS = 25
+
+@bench
+def bench_startup(runs=7):
+    """Import time and time-to-ready after interpreter start, CLI vs GUI."""
+    import compileall
+    import subprocess
+    # Time what an installed copy starts with, not a recompile of a stale .pyc.
+    compileall.compile_dir(ROOT, maxlevels=0, quiet=1)
+    folder = tempfile.mkdtemp(prefix="focus-bench-")
+    modes = ["cli", "gui-import"] + (["gui-lazy", "gui-eager"] if has_display() else [])
+    for mode in modes:
+        runs_t = []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-c", STARTUP_CHILD, mode], cwd=folder, capture_output=True, text=True,
+                                 env=dict(os.environ, PYTHONPATH=ROOT))
+            if out.returncode:
+                print(f"  {mode:<11} failed: {out.stderr.strip().splitlines()[-1]}")
+                break
+            runs_t.append(tuple(map(float, out.stdout.split())))
+        else:
+            runs_t.sort(key=lambda r: r[1])
+            imported, ready = runs_t[runs // 2]
+            print(f"  {mode:<11} import {imported * 1000:6.1f} ms   ready {ready * 1000:6.1f} ms")
+            if mode == "cli":
+                assert ready * 1000 < CLI_READY_MS, f"cli ready in {ready * 1000:.1f} ms, budget {CLI_READY_MS} ms"
+
+async def _http(reader, writer, method, path, body=None, headers=()):
+    """One keep-alive request/response; returns (status, headers, body bytes)."""
+    import json
+    data = b"" if body is None else json.dumps(body).encode()
+    head = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(data)}", *headers]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + data)
+    await writer.drain()
+    lines = (await reader.readuntil(b"\r\n\r\n")).decode().split("\r\n")
+    got = {k.lower(): v.strip() for k, v in (l.split(":", 1) for l in lines[1:] if ":" in l)}
+    payload = await reader.readexactly(int(got.get("content-length", 0)))
+    return int(lines[0].split()[1]), got, payload
+
+@bench
+def bench_server(clients=32, requests=200, mixes=(0.4, 0.05)):
+    """Load test of server.py on localhost: mixed reads, writes and conditional analytics."""
+    import asyncio
+    import json
+    import random
+    import server
+    use_temp_db()
+    fill(20_000)
+    today = date.today().isoformat()
+
+    async def client(port, n, seed, writes, latencies, codes):
+        rnd = random.Random(seed)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        etag, mine = None, []
+        for _ in range(n):
+            # writes: 5/8 inserts, 1/4 toggles, 1/8 deletes; reads: 1/2 analytics, 1/2 day lists
+            roll = rnd.random() / writes * 0.4 if rnd.random() < writes else 0.4 + rnd.random() * 0.6
+            t = time.perf_counter()
+            if roll < 0.25:
+                status, _, body = await _http(reader, writer, "POST", "/goals", {"title": f"api {seed}", "target_date": today})
+                mine.append(json.loads(body)["id"])
+            elif roll < 0.35 and mine:
+                status, _, _ = await _http(reader, writer, "PATCH", f"/goals/{rnd.choice(mine)}", {"completed": 1})
+            elif roll < 0.4 and mine:
+                status, _, _ = await _http(reader, writer, "DELETE", f"/goals/{mine.pop()}")
+            elif roll < 0.7 or (roll < 0.4 and not mine):
+                status, got, _ = await _http(reader, writer, "GET", f"/analytics?date={today}",
+                                             headers=[f"If-None-Match: {etag}"] if etag else [])
+                etag = got.get("etag", etag)
+            else:
+                status, _, _ = await _http(reader, writer, "GET", f"/goals?date={today}")
+            latencies.append(time.perf_counter() - t)
+            codes[status] = codes.get(status, 0) + 1
+        writer.close()
+
+    async def run():
+        srv = await server.GoalServer(port=0).start()
+        try:
+            # Conditional GETs: unchanged data answers 304, a write changes the ETag.
+            reader, writer = await asyncio.open_connection("127.0.0.1", srv.port)
+            _, got, _ = await _http(reader, writer, "GET", "/analytics")
+            status, _, _ = await _http(reader, writer, "GET", "/analytics", headers=[f"If-None-Match: {got['etag']}"])
+            assert status == 304, status
+            await _http(reader, writer, "POST", "/goals", {"title": "etag check"})
+            status, _, _ = await _http(reader, writer, "GET", "/analytics", headers=[f"If-None-Match: {got['etag']}"])
+            assert status == 200, status
+            assert (await _http(reader, writer, "DELETE", "/goals/999999999"))[0] == 404
+            writer.close()
+
+            for writes in mixes:
+                latencies, codes = [], {}
+                batches, ops = srv.batcher.batches, srv.batcher.batched_ops
+                t = time.perf_counter()
+                await asyncio.gather(*(client(srv.port, requests, i, writes, latencies, codes) for i in range(clients)))
+                elapsed = time.perf_counter() - t
+                assert set(codes) <= {200, 201, 204, 304}, codes
+                latencies.sort()
+                n = len(latencies)
+                per_batch = (srv.batcher.batched_ops - ops) / max(srv.batcher.batches - batches, 1)
+                print(f"  {writes:4.0%} writes  {clients} clients x {requests}   {n / elapsed:6.0f} req/s"
+                      f"   p50 {latencies[n // 2] * 1000:5.1f} ms   p99 {latencies[int(n * 0.99)] * 1000:5.1f} ms"
+                      f"   {per_batch:4.1f} writes/commit")
+                print("    " + "  ".join(f"{code}: {count}" for code, count in sorted(codes.items())))
+        finally:
+            await srv.close()
+
+    asyncio.run(run())
+    assert not db.verify_daily_stats()
+
+# --- UI harness: needs a display; a private Xvfb is started when one is installed ---
+def make_app():
+    import tkinter as tk
+    import main
+    main.SOUND_ON = False
+    root = tk.Tk()
+    root.geometry("1150x780")
+    app = main.UltraApp(root)
+    app.service.drain()
+    root.update()
+    return root, app
+
+def legacy_refresh_dashboard(app):
+    """The old refresh: drop every card and build a fresh one per goal."""
+    import main
+    goal_list = app.goal_list
+    for card, item in goal_list.pool:
+        goal_list.canvas.delete(item)
+        card.destroy()
+    goal_list.pool = []
+    goals = db.get_goals_by_date(app.current_date)
+    for i, g in enumerate(goals):
+        card = main.GoalCard(goal_list.canvas, g, app.toggle_goal, app.delete_goal)
+        item = goal_list.canvas.create_window(0, i * goal_list.ROW_H, window=card, anchor="nw",
+                                              width=goal_list.ROW_W, height=goal_list.ROW_H - 10)
+        goal_list.pool.append((card, item))
+    goal_list.goals = goals
+    goal_list._reindex()
+
+def start_xvfb():
+    """Starts a private Xvfb server and points DISPLAY at it; False if Xvfb is not installed."""
+    import atexit
+    import subprocess
+    if not shutil.which("Xvfb"):
+        return False
+    for n in range(99, 120):
+        if not os.path.exists(f"/tmp/.X11-unix/X{n}") and not os.path.exists(f"/tmp/.X{n}-lock"):
+            break
+    server = subprocess.Popen(["Xvfb", f":{n}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    atexit.register(server.terminate)
+    deadline = time.perf_counter() + 5
+    while not os.path.exists(f"/tmp/.X11-unix/X{n}"):
+        if server.poll() is not None or time.perf_counter() > deadline:
+            server.terminate()
+            return False
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = f":{n}"
+    return True
+
+def has_display(quiet=False):
+    if os.name == "nt" or os.environ.get("DISPLAY") or start_xvfb():
+        return True
+    if not quiet: print("  skipped: no display and no Xvfb to start one")
+    return False
+
+@bench
+def bench_perf(calls=200_000):
+    """perf.py: near-free while off, sane numbers and a readable report while on."""
+    import json
+    import analytics
+    import perf
+    use_temp_db()
+    fill(20_000)
+    today = date.today().isoformat()
+
+    def raw(x): return x
+    wrapped = perf.timed("bench.noop")(raw)
+    _, base = timed(lambda: [raw(i) for i in range(calls)], repeat=3)
+    _, off = timed(lambda: [wrapped(i) for i in range(calls)], repeat=3)
+    def spans():
+        for _ in range(calls):
+            with perf.span("bench.block"): pass
+    _, span_off = timed(spans, repeat=3)
+    perf.register(db, analytics)
+    assert db.get_analytics is not None and not hasattr(db.get_analytics, "__wrapped__"), "wrapped while off"
+    print(f"  off: @timed +{(off - base) / calls * 1e9:5.0f} ns/call   span {span_off / calls * 1e9:5.0f} ns   "
+          f"module functions left unwrapped")
+
+    perf.reset()
+    perf.enable()
+    try:
+        _, on = timed(lambda: [wrapped(i) for i in range(calls)], repeat=1)
+        for _ in range(10):
+            db._forget_cache()
+            db.get_analytics(today)
+        with perf.span("bench.block"): db.get_goals_by_date(today)
+        report = json.loads(json.dumps(perf.report({"cache": db.cache_stats()})))
+        m = report["metrics"]
+        assert m["bench.noop"]["count"] == calls, m["bench.noop"]
+        assert m["database.get_analytics"]["count"] == 10 and m["database.get_analytics"]["p95_ms"] > 0, m
+        assert m["bench.block"]["count"] == 1 and "database.get_goals_by_date" in m, sorted(m)
+        assert len(report["recent"]) == perf.RING_SIZE and report["cache"]["misses"] > 0, report["recent"][-1]
+        path = perf.export_report(os.path.join(os.path.dirname(db.DB_NAME), "perf.json"))
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f)["metrics"].keys() == perf.metrics().keys()
+        print(f"  on:  @timed +{(on - base) / calls * 1e9:5.0f} ns/call   get_analytics cold "
+              f"p50 {m['database.get_analytics']['p50_ms']:.2f} ms   {len(m)} metrics")
+
+        perf.start_profile()
+        db.get_range_analytics(date.fromordinal(date.today().toordinal() - 365).isoformat(), today)
+        text = perf.stop_profile(top=5)
+        assert "get_range_analytics" in text, text
+        perf.memory_snapshot()
+        db.get_daily_totals()
+        text = perf.memory_snapshot(top=5)
+        assert "Top allocation sites" in text and "Growth since last snapshot" not in text, text
+        assert "Growth since last snapshot" in perf.memory_snapshot(top=5)
+        perf.stop_memory()
+        print("  profile and memory snapshots render")
+    finally:
+        perf.disable()
+        perf.reset()
+    assert not hasattr(db.get_analytics, "__wrapped__"), "left wrapped after disable()"
+
+@bench
+def bench_ui_cards(clicks=20):
+    """Click-to-repaint latency: full GoalCard rebuild vs in-place update."""
+    if not has_display(): return
+    for n in (10, 100, 1000):
+        use_temp_db()
+        root, app = make_app()
+        today = app.current_date
+        with db.transaction() as cursor:
+            cursor.executemany("INSERT INTO goals (title, title_key, target_date, completed) VALUES (?, ?, ?, 0)",
+                               ((f"Goal {i}", f"goal {i}", today) for i in range(n)))
+        app.refresh_dashboard()
+        app.service.drain()
+        root.update()
+        gids = [g.id for g in app.goal_list.goals]
+
+        def click(gid, rebuild):
+            status = app.goal_list.goals[app.goal_list.index[gid]][3]
+            t = time.perf_counter()
+            if rebuild:
+                db.toggle_goal_status(gid, status)
+                legacy_refresh_dashboard(app)
+            else:
+                app.toggle_goal(gid, status)
+            root.update()  # until the repaint is done
+            return time.perf_counter() - t
+
+        legacy = sorted(click(gids[i % n], True) for i in range(clicks))
+        for card, item in app.goal_list.pool:
+            app.goal_list.canvas.delete(item)
+            card.destroy()
+        app.goal_list.pool, app.goal_list.height = [], None
+        app.refresh_dashboard()
+        app.service.drain()
+        keyed = sorted(click(gids[i % n], False) for i in range(clicks))
+        print(f"  {n:>5} cards  rebuild p50 {legacy[clicks // 2] * 1000:8.1f} ms"
+              f"   keyed p50 {keyed[clicks // 2] * 1000:6.1f} ms")
+        app.on_close()
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(w) for w in widget.winfo_children())
+
+@bench
+def bench_ui_scroll(steps=200):
+    """Widget count and frame time while scrolling a very large day."""
+    if not has_display(): return
+    for n in (100, 1000, 10_000):
+        use_temp_db()
+        root, app = make_app()
+        with db.transaction() as cursor:
+            cursor.executemany("INSERT INTO goals (title, title_key, target_date, completed) VALUES (?, ?, ?, ?)",
+                               ((f"Goal {i}", f"goal {i}", app.current_date, i % 3 == 0) for i in range(n)))
+        t = time.perf_counter()
+        app.refresh_dashboard()
+        app.service.drain()
+        root.update()
+        load = time.perf_counter() - t
+        frames = []
+        for k in range(steps):
+            t = time.perf_counter()
+            app.dash_canvas.yview_scroll(3 if k < steps // 2 else -3, "units")
+            root.update()
+            frames.append(time.perf_counter() - t)
+        frames.sort()
+        print(f"  {n:>6} goals  widgets {count_widgets(root):>4}   load {load * 1000:7.1f} ms"
+              f"   frame p50 {frames[steps // 2] * 1000:5.1f} ms  p99 {frames[int(steps * 0.99)] * 1000:5.1f} ms")
+        app.on_close()
+
+def legacy_progress_render(canvas, pct, size=140, width=12):
+    """CircularProgress.render before the retained scene: delete and recreate."""
+    canvas.delete("all")
+    pad = width
+    canvas.create_oval(pad, pad, size-pad, size-pad, outline="#334155", width=width)
+    if pct > 0:
+        canvas.create_arc(pad, pad, size-pad, size-pad, start=90, extent=-360 * (pct / 100), style="arc", width=width)
+    canvas.create_text(size/2, size/2 - 10, text=f"{int(pct)}%")
+    canvas.create_text(size/2, size/2 + 15, text="TODAY")
+
+def legacy_draw_chart(canvas, series):
+    canvas.delete("all")
+    for i, pct in enumerate(series):
+        x = 20 + i * 80
+        canvas.create_rectangle(x, 0, x+50, 120, fill="#334155", outline="")
+        if pct > 0: canvas.create_rectangle(x, 120 - pct * 1.2, x+50, 120, outline="")
+        canvas.create_text(x+25, 135, text=str(i))
+
+@bench
+def bench_ui_canvas(refreshes=300):
+    """Item counts, item-id churn and time per refresh: recreate-everything vs retained canvases."""
+    if not has_display(): return
+    import random
+    import tkinter as tk
+    import main
+    main.ANIMATIONS_ON = False
+    rnd = random.Random(3)
+    root = tk.Tk()
+    values = [rnd.randint(0, 100) for _ in range(refreshes)]
+    weeks = [[rnd.choice((0, 50, 100, rnd.random() * 100)) for _ in range(7)] for _ in range(refreshes)]
+
+    def measure(canvas, refresh, data):
+        refresh(data[0])
+        root.update()
+        first_id = canvas.create_line(0, 0, 0, 0)
+        canvas.delete(first_id)
+        t = time.perf_counter()
+        for value in data:
+            refresh(value)
+            root.update_idletasks()
+        elapsed = (time.perf_counter() - t) / len(data)
+        last_id = canvas.create_line(0, 0, 0, 0)
+        canvas.delete(last_id)
+        return len(canvas.find_all()), last_id - first_id - 1, elapsed
+
+    cases = {
+        "progress ring": (lambda c, v: legacy_progress_render(c, v), main.CircularProgress(root),
+                          lambda w, v: w.set_progress(v), values),
+        "7-day chart": (legacy_draw_chart, main.BarChart(root, height=150),
+                        lambda w, v: w.set_series(v, [str(i) for i in range(7)]), weeks),
+        "button": (None, main.RoundedButton(root, 120, 45, 20, "#38bdf8", "+ ADD", lambda: None),
+                   lambda w, v: w.render(), values),
+    }
+    for name, (legacy, widget, update, data) in cases.items():
+        widget.pack()
+        new = measure(widget, lambda v: update(widget, v), data)
+        line = f"  {name:<14} retained: {new[0]:>3} items, {new[1]:>5} ids churned, {new[2] * 1e6:7.1f} us"
+        if legacy is not None:
+            canvas = tk.Canvas(root, width=600, height=150)
+            canvas.pack()
+            old = measure(canvas, lambda v: legacy(canvas, v), data)
+            line += f"   |  recreate: {old[0]:>3} items, {old[1]:>5} ids churned, {old[2] * 1e6:7.1f} us"
+        assert new[1] == 0, (name, new)
+        print(line)
+
+    # Animated: one after() loop drives everything and stops once idle.
+    main.ANIMATIONS_ON = True
+    animator = main.FrameScheduler(root)
+    ring = main.CircularProgress(root, animator=animator)
+    chart = main.BarChart(root, height=150, animator=animator)
+    ring.set_progress(80)
+    chart.set_series(weeks[0], [""] * 7)
+    t = time.perf_counter()
+    while animator.tweens and time.perf_counter() - t < 2:
+        root.update()
+    frames = animator.frames
+    t = time.perf_counter()
+    while time.perf_counter() - t < 0.2:
+        root.update()
+    assert animator.frames == frames and animator.job is None, "scheduler kept ticking while idle"
+    assert ring.shown == 80
+    print(f"  animated ring + chart: {frames} frames, then idle with no after() job")
+    root.destroy()
+
+@bench
+def bench_ui_heatmap(refreshes=20):
+    """Heatmap refreshes must recolor existing cells, never add canvas items."""
+    if not has_display(): return
+    use_temp_db()
+    fill(365 * 10)
+    root, app = make_app()
+    app.show_page("Analytics")
+    app.service.drain()
+    root.update()
+    items = len(app.heatmap.find_all())
+    today = date.today()
+    first = app.heatmap.first_day(today).isoformat()
+    t = time.perf_counter()
+    for k in range(refreshes):
+        if k % 2: db.add_goal("Heatmap check", date.fromordinal(today.toordinal() - k).isoformat())
+        app.heatmap.set_days(db.get_range_analytics(first, today.isoformat())["days"], today)
+        root.update()
+    elapsed = (time.perf_counter() - t) / refreshes
+    assert len(app.heatmap.find_all()) == items, (items, len(app.heatmap.find_all()))
+    print(f"  {items} canvas items, unchanged after {refreshes} refreshes   {elapsed * 1000:.2f} ms per refresh")
+    app.on_close()
+
+def main(names):
+    for name in names or list(BENCHES):
+        print(f"[{name}]")
+        BENCHES[name]()
+    db.close_db()
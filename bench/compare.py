@@ -0,0 +1,84 @@
+"""Compares two suite.py result files and flags regressions.
+
+    python -m bench compare bench/results.json [--baseline bench/baseline.json] [--threshold 0.25]
+
+A case regresses when its median is more than threshold (25% by default)
+slower than the baseline's and at least FLOOR_MS slower in absolute terms,
+so sub-microsecond jitter on tiny calls never fails a run. Exit status is 1
+when anything regressed. Baselines only mean something on the machine that
+recorded them; a warning is printed when the machine details differ.
+"""
+import json
+import os
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+THRESHOLD = 0.25
+FLOOR_MS = 0.05
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("format") != 1:
+        raise SystemExit(f"{path}: not a bench result file")
+    return report
+
+def compare(baseline, current, threshold=THRESHOLD, floor_ms=FLOOR_MS):
+    """(case, baseline ms, current ms, ratio, verdict) rows; verdict is one of
+    regression, faster, same, new or gone."""
+    old, new = baseline["results"], current["results"]
+    rows = []
+    for key in sorted(old.keys() | new.keys()):
+        if key not in new:
+            if current.get("only") or key.split("/", 1)[0] not in current["sizes"]:
+                continue  # not part of this run (--sizes / --only)
+            rows.append((key, old[key]["median_ms"], None, None, "gone"))
+            continue
+        if key not in old:
+            rows.append((key, None, new[key]["median_ms"], None, "new"))
+            continue
+        a, b = old[key]["median_ms"], new[key]["median_ms"]
+        ratio = b / a if a else float("inf")
+        if b - a > floor_ms and ratio > 1 + threshold:
+            verdict = "regression"
+        elif a - b > floor_ms and ratio < 1 / (1 + threshold):
+            verdict = "faster"
+        else:
+            verdict = "same"
+        rows.append((key, a, b, ratio, verdict))
+    return rows
+
+def report(baseline, current, threshold=THRESHOLD, floor_ms=FLOOR_MS, verbose=False):
+    """Prints the comparison; returns the exit status (1 on any regression)."""
+    ignore = {"commit"}
+    differs = {k for k in baseline["machine"].keys() | current["machine"].keys()
+               if k not in ignore and baseline["machine"].get(k) != current["machine"].get(k)}
+    if differs:
+        print("warning: baseline was recorded elsewhere (" +
+              ", ".join(f"{k}: {baseline['machine'].get(k)} -> {current['machine'].get(k)}" for k in sorted(differs)) + ")")
+    rows = compare(baseline, current, threshold, floor_ms)
+    order = {"regression": 0, "faster": 1, "new": 2, "gone": 3, "same": 4}
+    fmt = lambda ms: "-" if ms is None else f"{ms:.3f}"
+    counts = {}
+    for key, a, b, ratio, verdict in sorted(rows, key=lambda r: (order[r[4]], r[0])):
+        counts[verdict] = counts.get(verdict, 0) + 1
+        if verdict != "same" or verbose:
+            change = "" if ratio is None else f"{(ratio - 1) * 100:+7.1f}%"
+            print(f"  {verdict.upper() if verdict == 'regression' else verdict:<10} {key:<52}"
+                  f" {fmt(a):>11} -> {fmt(b):>11} ms {change}")
+    print(f"{len(rows)} cases vs baseline from {baseline.get('created')} ({baseline['machine'].get('commit')}): " +
+          ", ".join(f"{n} {v}" for v, n in sorted(counts.items(), key=lambda kv: order[kv[0]])) +
+          f"   threshold {threshold:.0%}")
+    return 1 if counts.get("regression") else 0
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m bench compare", description="Flag regressions against a baseline.")
+    parser.add_argument("results")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--floor-ms", type=float, default=FLOOR_MS, help="ignore changes smaller than this")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list unchanged cases too")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}; record one with: python -m bench run --save-baseline")
+    return report(load(args.baseline), load(args.results), args.threshold, args.floor_ms, args.verbose)
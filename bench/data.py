@@ -0,0 +1,126 @@
+"""Seeded synthetic goal history: the same arguments always write the same goals.db.
+
+    python -m bench generate history.db --days 3650 --per-day 8 --completion 0.75 --titles 60 --seed 1
+
+Titles come from a fixed vocabulary and are picked with a long tail (a few
+daily habits, many one-offs), each day gets about per_day goals, and a small
+share of days has none so streaks end somewhere. With templates, recurring
+goals run through the second half of the history: their instances exist on
+the days the app was "opened" and are left virtual on rest days. Rows are
+bulk-loaded with the goals triggers off and the rollup and search index
+rebuilt once after.
+"""
+import os
+import random
+import tempfile
+from datetime import date
+
+import database as db
+
+VERBS = ["Read", "Write", "Run", "Call", "Review", "Plan", "Clean", "Study", "Practice", "Cook",
+         "Walk", "Fix", "Email", "Meditate", "Stretch"]
+OBJECTS = ["20 pages", "the report", "5 km", "mom", "the budget", "the kitchen", "Spanish", "guitar",
+           "dinner", "the dog", "my bike", "the inbox", "notes", "taxes", "the garden"]
+
+# Recurring rules handed out to templates in turn: daily, weekdays, every 3 days, Mon/Wed/Fri.
+RULES = [(1, 0b1111111), (1, 0b0011111), (3, 0b1111111), (1, 0b0010101)]
+
+# Named sizes used by `python -m bench run` (about days * per_day goals each).
+SIZES = {"1k": dict(days=100, per_day=10, templates=2), "100k": dict(days=5000, per_day=20, templates=3),
+         "1m": dict(days=50_000, per_day=20, templates=4)}
+
+def vocabulary(n, seed=1):
+    """n distinct goal titles, most common first."""
+    rnd = random.Random(seed)
+    pairs = [f"{v} {o}" for v in VERBS for o in OBJECTS]
+    rnd.shuffle(pairs)
+    return [pairs[i % len(pairs)] + (f" #{i // len(pairs)}" if i >= len(pairs) else "") for i in range(n)]
+
+def synthetic_rows(days=365, per_day=8, completion=0.75, titles=60, seed=1, end=None, rest_days=0.05):
+    """Yields (title, target_date, completed) rows, oldest day first, ending at end (default today)."""
+    rnd = random.Random(seed)
+    vocab = vocabulary(titles, seed)
+    weights = [1 / (i + 1) for i in range(titles)]  # Zipf-like: "Read 20 pages" daily, the rest now and then
+    last = (end or date.today()).toordinal()
+    low, high = max(1, per_day // 2), max(1, per_day + per_day // 2)
+    for o in range(last - days + 1, last + 1):
+        if rnd.random() < rest_days:
+            continue
+        d = date.fromordinal(o).isoformat()
+        for title in rnd.choices(vocab, weights, k=rnd.randint(low, high)):
+            yield title, d, int(rnd.random() < completion)
+
+def generate(path, days=365, per_day=8, completion=0.75, titles=60, seed=1, end=None, rest_days=0.05,
+             templates=0) -> int:
+    """Writes a fresh goals.db at path; returns the number of goals in it."""
+    previous = db.DB_NAME
+    db.close_db()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix): os.remove(path + suffix)
+    db.DB_NAME = path
+    try:
+        db.init_db()
+        last = (end or date.today()).toordinal()
+        start = date.fromordinal(last - days // 2).isoformat()
+        rules = [(db.add_template(f"Daily habit {i + 1}", *RULES[i % len(RULES)], start), *RULES[i % len(RULES)])
+                 for i in range(templates)]
+        opened = []
+        def rows():
+            for t, d, c in synthetic_rows(days, per_day, completion, titles, seed, end, rest_days):
+                if not opened or opened[-1] != d: opened.append(d)
+                yield t, t.lower(), d, c, None
+        rnd = random.Random(seed + 1)
+        def instances():
+            first = date.fromisoformat(start).toordinal()
+            for d in opened:
+                if d < start: continue
+                o = date.fromisoformat(d).toordinal()
+                for i, (tid, every, weekdays) in enumerate(rules):
+                    if db._occurs(every, weekdays, first, o):
+                        yield f"Daily habit {i + 1}", f"daily habit {i + 1}", d, int(rnd.random() < completion), tid
+        with db.transaction() as cursor, db._goal_triggers_off(cursor):
+            insert = "INSERT INTO goals (title, title_key, target_date, completed, template_id) VALUES (?, ?, ?, ?, ?)"
+            cursor.executemany(insert, rows())
+            if rules:
+                cursor.executemany(insert, instances())
+                cursor.executemany("INSERT INTO materialized_days VALUES (?, ?)",
+                                   ((d, rules[-1][0]) for d in opened if d >= start))
+        db.rebuild_daily_stats()
+        db.rebuild_search_index()
+        db.get_connection().execute("ANALYZE")
+        return db._query("SELECT COUNT(*) FROM goals")[0][0]
+    finally:
+        db.close_db()  # the last connection checkpoints, so the .db file stands alone
+        db.DB_NAME = previous
+
+def fixture(size="100k", **options):
+    """Path of a generated database for a named size, built once and reused
+    (per schema version and day) from the temp folder. Copy it before writing."""
+    params = dict(SIZES[size], **options)
+    params.setdefault("end", date.today())
+    key = "-".join(f"{k}{v}" for k, v in sorted(params.items()))
+    folder = os.path.join(tempfile.gettempdir(), "focus-bench-fixtures")
+    path = os.path.join(folder, f"v{len(db.MIGRATIONS)}-{key}.db")
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        generate(path + ".tmp", **params)
+        os.replace(path + ".tmp", path)
+    return path
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m bench generate", description="Write a synthetic goals.db.")
+    parser.add_argument("path")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=8, help="average goals per active day")
+    parser.add_argument("--completion", type=float, default=0.75, help="share of goals completed")
+    parser.add_argument("--titles", type=int, default=60, help="size of the title vocabulary")
+    parser.add_argument("--rest-days", type=float, default=0.05, help="share of days without goals")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--end", type=date.fromisoformat, help="last day (default today)")
+    parser.add_argument("--templates", type=int, default=0, help="recurring goals over the second half")
+    args = parser.parse_args(argv)
+    n = generate(args.path, args.days, args.per_day, args.completion, args.titles, args.seed, args.end, args.rest_days,
+                 args.templates)
+    print(f"{n} goals over {args.days} days written to {args.path}")
+    return 0
@@ -0,0 +1,354 @@
+"""Regression suite: times every database.py and analytics.py function, plus
+the Tk refresh paths when there is a display (or Xvfb to start one), on
+generated histories of about 1k, 100k and 1M goals.
+
+    python -m bench run [--sizes 1k,100k,1m] [--only 'database.search*'] [--out FILE]
+    python -m bench run --save-baseline        # also stores the numbers as bench/baseline.json
+    python -m bench run --compare              # fails on regressions against that baseline
+
+Each size runs on a private copy of a cached fixture (see data.py), reads
+first, then writes, then clear_all_data. Cached queries are timed cold (the
+analytics cache is emptied before every run) unless the case says [warm].
+A public function without a case fails the run, so new code gets timed too.
+"""
+import fnmatch
+import glob
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+from collections import deque
+from datetime import date
+
+import analytics
+import database as db
+from bench import checks, data
+
+FORMAT = 1
+BUDGET = 0.3     # seconds of timed calls per case, after at least MIN_RUNS
+MIN_RUNS = 3
+MAX_RUNS = 50
+RETRIES = 2      # --compare re-times a slow case this many times before calling it a regression
+
+def measure(call, setup=None, runs=None):
+    """Median/min wall time of call(setup()) in ms; slow calls (over 1 s) run once."""
+    times = []
+    while len(times) < (runs or MAX_RUNS):
+        state = setup() if setup else None
+        t = time.perf_counter()
+        call(state)
+        times.append(time.perf_counter() - t)
+        if runs is None and len(times) >= MIN_RUNS and sum(times) >= BUDGET or times[0] > 1.0:
+            break
+    times.sort()
+    return {"median_ms": round(times[len(times) // 2] * 1000, 4), "min_ms": round(times[0] * 1000, 4),
+            "runs": len(times)}
+
+def public_functions(module):
+    return {name for name, value in vars(module).items()
+            if not name.startswith("_") and callable(value) and not isinstance(value, type)
+            and getattr(value, "__module__", None) == module.__name__}
+
+# --- CASES: (name, call(state), setup() -> state, runs) ---
+def _cold():
+    db._forget_cache()
+
+def database_reads(ctx):
+    today, first = ctx["today"], ctx["first"]
+    gid, ids = ctx["gid"], ctx["ids"]
+    year_ago = date.fromordinal(date.fromisoformat(today).toordinal() - 364).isoformat()
+    month_ago = date.fromordinal(date.fromisoformat(today).toordinal() - 29).isoformat()
+    by_date = db._DAY_SQL
+    before = ctx["page_end"]
+    paths = ctx["profiles"]
+
+    def switch_and_back():
+        # A second profile and back, reading the Analytics page each time (hot stores: both cached).
+        home = db.DB_NAME
+        db.DB_NAME = paths[1]
+        db.get_analytics(today)
+        db.DB_NAME = home
+        return db.get_analytics(today)
+
+    def empty_transaction():
+        with db.transaction(): pass
+
+    return [
+        ("get_goal", lambda s: db.get_goal(gid), None, None),
+        ("get_goals_by_date", lambda s: db.get_goals_by_date(today), None, None),
+        ("get_all_goals", lambda s: db.get_all_goals(), None, None),
+        ("iter_goals", lambda s: deque(db.iter_goals(), maxlen=0), None, None),
+        ("existing_ids", lambda s: db.existing_ids(ids), None, None),
+        ("get_daily_totals", lambda s: db.get_daily_totals(), _cold, None),
+        ("get_daily_totals[30d]", lambda s: db.get_daily_totals(month_ago, today), _cold, None),
+        ("get_day_totals", lambda s: db.get_day_totals(today), _cold, None),
+        ("get_week_totals", lambda s: db.get_week_totals(), _cold, None),
+        ("get_range_analytics[1y]", lambda s: db.get_range_analytics(year_ago, today), _cold, None),
+        ("get_range_analytics[all]", lambda s: db.get_range_analytics(first, today), _cold, None),
+        ("get_top_missed", lambda s: db.get_top_missed(5), _cold, None),
+        ("get_streaks", lambda s: db.get_streaks(), _cold, None),
+        ("get_analytics", lambda s: db.get_analytics(today), _cold, None),
+        ("get_analytics[warm]", lambda s: db.get_analytics(today), None, None),
+        ("search_query", lambda s: db.search_query("exercize rea"), _cold, None),
+        ("search_goals", lambda s: db.search_goals("read"), None, None),
+        ("search_goals[page 2]", lambda s: db.search_goals("read", 50, before), None, None),
+        ("search_goals[typo]", lambda s: db.search_goals("reveiw"), _cold, None),
+        ("explain", lambda s: db.explain(by_date, (today,)), None, None),
+        ("schema_version", lambda s: db.schema_version(), None, None),
+        ("cache_stats", lambda s: db.cache_stats(), None, None),
+        ("data_version", lambda s: db.data_version(), None, None),
+        ("get_changes", lambda s: db.get_changes(), None, None),
+        ("get_store", lambda s: db.get_store(), None, None),
+        ("current_store", lambda s: db.current_store(), None, None),
+        ("current_store[switch profile x2]", lambda s: switch_and_back(), None, None),
+        ("get_combined_daily_totals", lambda s: db.get_combined_daily_totals(paths), _cold, None),
+        ("get_combined_range_analytics[1y]", lambda s: db.get_combined_range_analytics(paths, year_ago, today), _cold, None),
+        ("get_combined_analytics", lambda s: db.get_combined_analytics(paths, today), _cold, None),
+        ("get_combined_analytics[warm]", lambda s: db.get_combined_analytics(paths, today), None, None),
+        ("get_connection[reconnect]", lambda s: db.get_connection(), db.close_db, None),
+        ("close_db", lambda s: db.close_db(), db.get_connection, None),
+        ("transaction[empty]", lambda s: empty_transaction(), None, None),
+        ("init_db", lambda s: db.init_db(), None, None),
+        ("migrate", lambda s: db.migrate(), None, None),
+        ("verify_daily_stats", lambda s: db.verify_daily_stats(), None, None),
+        ("verify_search_index", lambda s: db.verify_search_index(), None, None),
+        ("get_templates", lambda s: db.get_templates(), None, None),
+        ("parse_repeat", lambda s: db.parse_repeat("mon wed fri"), None, None),
+        ("describe_repeat", lambda s: db.describe_repeat(1, 0b0010101), None, None),
+        ("materialize[done]", lambda s: db.materialize(today), None, None),
+        ("archived_years", lambda s: db.archived_years(), None, None),
+        ("archive_path", lambda s: db.archive_path(2000), None, None),
+        ("maintenance_log", lambda s: db.maintenance_log(), None, None),
+        ("free_fraction", lambda s: db.free_fraction(), None, None),
+    ]
+
+def database_writes(ctx):
+    today, gid = ctx["today"], ctx["gid"]
+    flip = itertools.cycle((0, 1))
+    serial = itertools.count()
+    fresh = lambda n: [(f"Bench goal {next(serial)}", today, i % 2) for i in range(n)]
+    back = date.fromisoformat(today).toordinal()
+    # Imports are history files: about 20 rows a day (dedupe checks each row against its day).
+    ahead = itertools.count(1)
+    future = lambda: date.fromordinal(back + next(ahead)).isoformat()  # a date no template has been expanded on
+    history = lambda n: [(f"Bench import {next(serial)}", date.fromordinal(back - i // 20).isoformat(), i % 2)
+                         for i in range(n)]
+    # The oldest year goes to the archive, then its days are opened one by one.
+    first_year = int(ctx["first"][:4])
+    archived_day = itertools.count(date.fromisoformat(ctx["first"]).toordinal())
+    reopen = lambda: date.fromordinal(next(archived_day)).isoformat()
+    return [
+        ("add_goal", lambda s: db.add_goal("Bench goal", today), None, None),
+        ("toggle_goal_status", lambda s: db.toggle_goal_status(gid, next(flip)), None, None),
+        ("set_goal_status", lambda s: db.set_goal_status(gid, next(flip)), None, None),
+        ("delete_goal", lambda s: db.delete_goal(s), lambda: db.add_goal("Bench delete", today), None),
+        ("add_goals[100]", lambda s: db.add_goals(s), lambda: fresh(100), None),
+        ("apply_batch", lambda s: db.apply_batch(s[0], {gid: next(flip)}, s[1]),
+         lambda: (fresh(50), db.add_goals(fresh(10))), None),
+        ("import_rows[1000]", lambda s: db.import_rows(s), lambda: history(1000), None),
+        ("add_template", lambda s: db.add_template("Bench template", 1, db.ALL_DAYS, today), None, None),
+        ("materialize", lambda s: db.materialize(s), future, None),
+        ("prepare_day[new date]", lambda s: db.prepare_day(s), future, None),
+        ("stop_template", lambda s: db.stop_template(s), lambda: db.add_template("Bench stop", 1, db.ALL_DAYS, today), None),
+        ("archive_goals[oldest year]", lambda s: db.archive_goals(f"{first_year + 1}-01-01"), None, 1),
+        ("prepare_day[archived day]", lambda s: db.prepare_day(s), reopen, None),
+        ("log_maintenance", lambda s: db.log_maintenance("bench", today), None, None),
+        ("analyze", lambda s: db.analyze(), None, None),
+        ("vacuum", lambda s: db.vacuum(), None, 1),
+        ("get_changes[writes so far]", lambda s: db.get_changes(0, 1000), None, None),
+        ("trim_changes", lambda s: db.trim_changes(keep=100), None, 1),
+        ("rebuild_daily_stats", lambda s: db.rebuild_daily_stats(), None, None),
+        ("rebuild_search_index", lambda s: db.rebuild_search_index(), None, None),
+        ("clear_all_data", lambda s: db.clear_all_data(), None, 1),  # last: empties the copy
+    ]
+
+def analytics_cases(ctx):
+    rows, days, today = ctx["rows"], ctx["days"], date.fromisoformat(ctx["today"])
+    newest = days[::-1]
+    counts, today_rows = ctx["counts"], ctx["today_rows"]
+    first = date.fromisoformat(ctx["first"])
+    return [
+        ("summarize_days", lambda s: analytics.summarize_days(rows), None, None),
+        ("daily_completion", lambda s: analytics.daily_completion(20, 13), None, None),
+        ("calculate_daily_completion", lambda s: analytics.calculate_daily_completion(today_rows), None, None),
+        ("weekly_summary_from_days", lambda s: analytics.weekly_summary_from_days(days, today), None, None),
+        ("get_weekly_summary", lambda s: analytics.get_weekly_summary(rows), None, None),
+        ("range_summary", lambda s: analytics.range_summary(days, first, today), None, None),
+        ("streak_from_days", lambda s: analytics.streak_from_days(newest, today), None, None),
+        ("calculate_streak", lambda s: analytics.calculate_streak(rows), None, None),
+        ("perfect_streak_from_days", lambda s: analytics.perfect_streak_from_days(newest, today), None, None),
+        ("calculate_perfect_streak", lambda s: analytics.calculate_perfect_streak(rows), None, None),
+        ("most_missed_from_counts", lambda s: analytics.most_missed_from_counts(counts), None, None),
+        ("get_most_missed", lambda s: analytics.get_most_missed(rows), None, None),
+        ("analyze", lambda s: analytics.analyze(rows, today), None, None),
+        ("GoalColumns", lambda s: analytics.GoalColumns(rows), None, None),
+    ]
+
+def ui_cases(app, root):
+    """Click/refresh paths through the real widgets, timed until the repaint is done."""
+    def settle():
+        app.service.drain()
+        root.update()
+
+    def search(text):
+        app.search_entry.delete(0, "end")
+        app.search_entry.insert(0, text)
+        app.run_search(force=True)
+        settle()
+
+    def analytics_cold():
+        db._forget_cache()
+        app.shown_stats = None
+
+    pages = itertools.cycle(("Analytics", "Dashboard"))
+    ranges = itertools.cycle(("1Y", "7D", "90D", "30D"))
+    return [
+        ("show_page", lambda s: (app.show_page(next(pages)), settle()), None, None),
+        ("refresh_dashboard", lambda s: (app.show_page("Dashboard"), app.refresh_dashboard(), settle()), None, None),
+        ("run_search", lambda s: search("read"), None, None),
+        ("clear_search", lambda s: (app.clear_search(), settle()), lambda: search("read"), None),
+        ("refresh_analytics", lambda s: (app.refresh_analytics(), settle()),
+         lambda: (app.show_page("Analytics"), settle(), analytics_cold()), None),
+        ("set_chart_range", lambda s: (app.set_chart_range(next(ranges)), settle()), None, None),
+    ]
+
+# --- RUN ---
+# Everything the cases need from the database, read before any timing starts.
+# Building the case lists never touches the database, so check_coverage()
+# runs them against DUMMY_CONTEXT.
+DUMMY_CONTEXT = {"today": "2000-01-01", "first": "2000-01-01", "goals": 0, "gid": 1, "ids": [],
+                 "rows": [], "days": [], "counts": [], "today_rows": [], "page_end": None, "profiles": []}
+
+def _context(profiles):
+    today = date.today().isoformat()
+    first = db._query("SELECT MIN(target_date) FROM goals")[0][0]
+    count = db._query("SELECT COUNT(*) FROM goals")[0][0]
+    page = db.search_goals("read")
+    return {"today": today, "first": first, "goals": count, "gid": count // 2 or 1,
+            "ids": list(range(1, count + 1, max(1, count // 1000)))[:1000],
+            "rows": db.get_all_goals(), "days": list(db.get_daily_totals()),
+            "counts": db.get_top_missed(5), "today_rows": db.get_goals_by_date(today),
+            "page_end": page[-1].id if page else None, "profiles": profiles}
+
+def run_size(size, only=None, ui=True):
+    """{case name: timing} for one fixture size; UI cases only with a display."""
+    results, folder = {}, tempfile.mkdtemp(prefix="focus-bench-")
+    db.close_db()
+    db.DB_NAME = os.path.join(folder, "goals.db")
+    shutil.copyfile(data.fixture(size), db.DB_NAME)
+    work = os.path.join(folder, "work.db")  # a second profile for the switch / all-profiles cases
+    shutil.copyfile(data.fixture(size), work)
+    db.init_db()
+    db._forget_cache()
+    ctx = _context([db.DB_NAME, work])
+    print(f"[{size}] {ctx['goals']} goals from {ctx['first']}")
+
+    def timed_cases(prefix, cases):
+        for name, call, setup, runs in cases:
+            key = f"{prefix}.{name}"
+            if only and not any(fnmatch.fnmatch(key, p) for p in only):
+                continue
+            results[key] = measure(call, setup, runs)
+            r = results[key]
+            print(f"  {key:<44} {r['median_ms']:11.3f} ms   (min {r['min_ms']:.3f}, {r['runs']} runs)")
+
+    try:
+        timed_cases("database", database_reads(ctx))
+        timed_cases("analytics", analytics_cases(ctx))
+        ctx["rows"] = ctx["days"] = None
+        if ui and (not only or any(p.startswith(("ui.", "*")) for p in only)):
+            root, app = checks.make_app()
+            try:
+                timed_cases("ui", ui_cases(app, root))
+            finally:
+                app.on_close()
+        timed_cases("database", database_writes(ctx))
+    finally:
+        db.close_db()
+        shutil.rmtree(folder, ignore_errors=True)
+    return ctx["goals"], results
+
+def check_coverage():
+    """Public database/analytics functions that have no case; empty when all are timed."""
+    names = {f"{prefix}.{case[0].split('[')[0]}"
+             for prefix, cases in (("database", database_reads), ("database", database_writes),
+                                   ("analytics", analytics_cases))
+             for case in cases(DUMMY_CONTEXT)}
+    public = {f"{m.__name__}.{f}" for m in (db, analytics) for f in public_functions(m)}
+    return sorted(public - names)
+
+def machine():
+    info = {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "cpus": os.cpu_count(), "sqlite": sqlite3.sqlite_version,
+            "numpy": analytics._load_numpy() is not None}
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=checks.ROOT,
+                                        capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info["commit"] = None
+    return info
+
+def run(sizes=("1k", "100k", "1m"), only=None):
+    missing = check_coverage()
+    if missing:
+        raise SystemExit("No benchmark case for: " + ", ".join(missing) + " (add one to bench/suite.py)")
+    ui = checks.has_display(quiet=True)
+    report = {"format": FORMAT, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "machine": machine(),
+              "sizes": {}, "only": only, "results": {}, "skipped": [] if ui else ["ui: no display and no Xvfb"]}
+    for size in sizes:
+        goals, results = run_size(size, only, ui)
+        report["sizes"][size] = dict(data.SIZES[size], goals=goals)
+        report["results"].update({f"{size}/{key}": r for key, r in results.items()})
+    return report
+
+def retime(report, keys, ui):
+    """Times the given "size/case" keys again, keeping each case's better result."""
+    by_size = {}
+    for key in keys:
+        size, case = key.split("/", 1)
+        by_size.setdefault(size, []).append(glob.escape(case))
+    for size, cases in by_size.items():
+        for case, r in run_size(size, cases, ui)[1].items():
+            old = report["results"][f"{size}/{case}"]
+            if r["median_ms"] < old["median_ms"]:
+                report["results"][f"{size}/{case}"] = dict(r, retried=True)
+
+def save(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+
+def main(argv=None):
+    import argparse
+    from bench import compare
+    parser = argparse.ArgumentParser(prog="python -m bench run", description="Time every function on generated data.")
+    parser.add_argument("--sizes", default="1k,100k,1m", help="comma separated, from: " + ", ".join(data.SIZES))
+    parser.add_argument("--only", action="append", help="glob on case names, e.g. 'database.search*' (repeatable)")
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.json"))
+    parser.add_argument("--save-baseline", action="store_true", help=f"also write {compare.BASELINE}")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline afterwards")
+    parser.add_argument("--threshold", type=float, default=compare.THRESHOLD)
+    args = parser.parse_args(argv)
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in data.SIZES]
+    if unknown: parser.error(f"unknown size {unknown[0]!r}")
+    report = run(sizes, args.only)
+    if args.compare:
+        baseline = compare.load(compare.BASELINE)
+        for _ in range(RETRIES):
+            slow = [key for key, *_, verdict in compare.compare(baseline, report, args.threshold) if verdict == "regression"]
+            if not slow: break
+            print(f"re-timing {len(slow)} slow case(s)")
+            retime(report, slow, not report["skipped"])
+    save(report, args.out)
+    print(f"results written to {args.out}")
+    if args.save_baseline:
+        save(report, compare.BASELINE)
+        print(f"baseline written to {compare.BASELINE}")
+    if args.compare:
+        return compare.report(baseline, report, args.threshold)
+    return 0
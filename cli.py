@@ -0,0 +1,214 @@
+"""Headless Focus Ultra: manage goals and read analytics without the GUI.
+
+Imports nothing from tkinter and loads database.py only once a command
+needs it, so it starts fast and runs on machines without a display.
+
+    python cli.py add "Read 20 pages" [--date 2024-05-01]
+    python cli.py list [--date 2024-05-01]
+    python cli.py done ID | undo ID | toggle ID | delete ID
+    python cli.py search WORDS [--limit 20]
+    python cli.py repeat TITLE --every daily|weekdays|"every 3 days"|"mon wed fri" [--date START]
+    python cli.py templates | stop TEMPLATE_ID
+    python cli.py stats
+    python cli.py verify | rebuild
+    python cli.py import FILE [--no-dedupe] | export FILE
+    python cli.py archive [--keep-days 730] [--force]
+    python cli.py profiles | profile NAME | profile add NAME
+
+Every command takes --profile NAME to work on that profile's goals instead
+of the Personal ones (goals.db next to this file).
+"""
+import os
+import sys
+
+USAGE = __doc__[__doc__.index("    python"):]
+
+def _take_option(args, name):
+    """Removes '--name value' from args and returns value (or None)."""
+    if name in args:
+        i = args.index(name)
+        if i + 1 >= len(args):
+            raise SystemExit(f"{name} needs a value")
+        value = args[i + 1]
+        del args[i:i + 2]
+        return value
+    return None
+
+def _goal_id(args):
+    try:
+        return int(args[0])
+    except (IndexError, ValueError):
+        raise SystemExit("Expected a goal id, see: python cli.py list")
+
+def _date_option(args):
+    from datetime import date
+    value = _take_option(args, "--date")
+    if value is None:
+        return date.today().isoformat()
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise SystemExit(f"--date must look like 2024-05-01, got {value!r}")
+
+def cmd_add(db, args):
+    target_date = _date_option(args)
+    title = " ".join(args).strip()
+    if not title:
+        raise SystemExit("Nothing to add: give the goal a title")
+    print(f"Added goal {db.add_goal(title, target_date)} for {target_date}.")
+
+def cmd_list(db, args):
+    target_date = _date_option(args)
+    db.prepare_day(target_date)
+    goals = db.get_goals_by_date(target_date)
+    if not goals:
+        print(f"No goals for {target_date}.")
+    for g in goals:
+        print(f"  [{'x' if g.completed else ' '}] {g.id:>5}  {g.title}")
+
+def cmd_repeat(db, args):
+    start = _date_option(args)
+    rule = _take_option(args, "--every") or "daily"
+    title = " ".join(args).strip()
+    if not title:
+        raise SystemExit("Nothing to repeat: give the goal a title")
+    try:
+        every, weekdays = db.parse_repeat(rule)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    tid = db.add_template(title, every, weekdays, start)
+    print(f"Template {tid}: {title} ({db.describe_repeat(every, weekdays).lower()} from {start}).")
+
+def cmd_templates(db, args):
+    templates = db.get_templates()
+    if not templates:
+        print("No recurring goals.")
+    for tid, title, every, weekdays, start, _ in templates:
+        print(f"  {tid:>4}  {title}  ({db.describe_repeat(every, weekdays)}, since {start})")
+
+def cmd_stop(db, args):
+    tid = _goal_id(args)
+    if not any(t[0] == tid for t in db.get_templates()):
+        raise SystemExit(f"No active template with id {tid}, see: python cli.py templates")
+    db.stop_template(tid)
+    print(f"Template {tid} stopped; finished goals stay in your history.")
+
+def cmd_search(db, args):
+    limit = _take_option(args, "--limit") or "20"
+    if not limit.isdigit():
+        raise SystemExit(f"--limit must be a number, got {limit!r}")
+    goals = db.search_goals(" ".join(args), int(limit))
+    if not goals:
+        print("No matching goals.")
+    for g in goals:
+        print(f"  [{'x' if g.completed else ' '}] {g.id:>5}  {g.target_date}  {g.title}")
+
+def _set_status(db, args, completed):
+    gid = _goal_id(args)
+    goal = db.get_goal(gid)
+    if goal is None:
+        raise SystemExit(f"No goal with id {gid}")
+    if completed is None:
+        completed = 0 if goal.completed else 1
+    db.set_goal_status(gid, completed)
+    print(f"{goal.title}: {'done' if completed else 'not done'}.")
+
+def cmd_done(db, args): _set_status(db, args, 1)
+def cmd_undo(db, args): _set_status(db, args, 0)
+def cmd_toggle(db, args): _set_status(db, args, None)
+
+def cmd_delete(db, args):
+    gid = _goal_id(args)
+    goal = db.get_goal(gid)
+    if goal is None:
+        raise SystemExit(f"No goal with id {gid}")
+    db.delete_goal(gid)
+    print(f"Deleted: {goal.title}")
+
+def cmd_stats(db, args):
+    stats = db.get_analytics(_date_option(args))
+    print(f"Today          {stats['daily_completion']}%")
+    print(f"Active days    {stats['streak']} Days")
+    print(f"Perfect streak {stats['perfect_streak']} Days")
+    print(f"Often missed   {stats['most_missed']}")
+    print("Last 7 days")
+    for d, pct in stats["weekly_summary"].items():
+        print(f"  {d}  {'#' * round(pct / 5):<20} {pct:5.1f}%")
+
+def cmd_verify(db, args):
+    bad = db.verify_daily_stats()
+    for d, expected, stored in bad:
+        print(f"{d}: goals say {expected}, daily_stats has {stored}")
+    print("daily_stats OK." if not bad else f"{len(bad)} day(s) out of sync, run: python cli.py rebuild")
+    search_ok = db.verify_search_index()
+    print("Search index OK." if search_ok else "Search index out of sync, run: python cli.py rebuild")
+    return 0 if not bad and search_ok else 1
+
+def cmd_rebuild(db, args):
+    db.rebuild_daily_stats()
+    db.rebuild_search_index()
+    print("daily_stats and search index rebuilt.")
+
+def cmd_profiles(db, args):
+    import profiles
+    active = profiles.active()
+    for name in profiles.names():
+        print(f"  {'*' if name == active else ' '} {name:<20} {profiles.path(name)}")
+
+def cmd_profile(db, args):
+    import profiles
+    create = args[:1] == ["add"]
+    name = " ".join(args[1:] if create else args).strip()
+    if not name:
+        raise SystemExit("Expected a profile name, see: python cli.py profiles")
+    if create:
+        try:
+            profiles.add(name)
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+        print(f"Created profile {name}.")
+    try:
+        target = profiles.switch(name)
+    except KeyError as exc:  # a typo shouldn't quietly make a new profile
+        raise SystemExit(f"{exc.args[0]}, see: python cli.py profiles (or profile add NAME)")
+    print(f"{name} is now the active profile in the app ({target}).")
+
+def cmd_import(db, args):
+    import transfer
+    return transfer.main(["import"] + args)
+
+def cmd_export(db, args):
+    import transfer
+    return transfer.main(["export"] + args)
+
+def cmd_archive(db, args):
+    import archive
+    return archive.main(args)
+
+COMMANDS = {name[4:]: fn for name, fn in globals().items() if name.startswith("cmd_")}
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    profile = _take_option(args, "--profile")
+    if not args or args[0] in ("-h", "--help", "help") or args[0] not in COMMANDS:
+        print(USAGE, end="")
+        return 0 if not args or args[0] in ("-h", "--help", "help") else 2
+    import database as db
+    if profile is not None:
+        import profiles
+        try:
+            db.DB_NAME = profiles.path(profile)
+        except KeyError as exc:
+            raise SystemExit(f"{exc.args[0]}, see: python cli.py profiles")
+    if os.environ.get("FOCUS_PERF"):
+        import perf
+        perf.register(db)
+        perf.enable_from_env()
+    db.init_db()
+    try:
+        return COMMANDS[args[0]](db, args[1:]) or 0
+    finally:
+        db.close_db()
+
+if __name__ == "__main__":
+    sys.exit(main())
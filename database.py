@@ -1,11 +1,654 @@
+import os
 import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import date
+from operator import itemgetter
 
-DB_NAME = "goals.db"
+from models import Goal, day_goals, goal_row
+# analytics, difflib, heapq and re are imported by the functions that use
+# them: most cli.py commands never do, and start that much sooner.
 
+# goals.db lives next to the app (the .exe when frozen), not in whatever
+# folder it was started from. profiles.py points DB_NAME at other files.
+APP_DIR = os.path.dirname(os.path.abspath(sys.executable if getattr(sys, "frozen", False) else __file__))
+DB_NAME = os.path.join(APP_DIR, "goals.db")
+
+# --- CONNECTION ---
+# Every database file is a GoalStore: one connection per thread (so once per
+# process for the UI thread), opened lazily and reused by every call below,
+# plus its analytics cache. Statements are cached by sqlite3 itself, so
+# repeated queries skip the parser. Module functions run against the store
+# for DB_NAME, or the one a thread entered with store.use(). The last
+# HOT_STORES stores stay open, so switching back to a profile finds its
+# connections and cache as it left them.
+HOT_STORES = 4
+
+# Another process (a second window, cli.py, server.py) can hold the write
+# lock; statements wait up to BUSY_TIMEOUT for it, and a BEGIN or COMMIT
+# that still finds the file busy is retried LOCK_RETRIES times.
+BUSY_TIMEOUT = 5.0
+LOCK_RETRIES = 4
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",   # WAL + NORMAL is still safe against app crashes
+    "PRAGMA cache_size = -16000",    # ~16 MB page cache
+    "PRAGMA mmap_size = 268435456",  # 256 MB memory-mapped reads
+    "PRAGMA temp_store = MEMORY",
+)
+
+class GoalStore:
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()  # this thread's conn, depth (transaction nesting), seen
+        self.cache = AnalyticsCache()
+        self.writes = 0                 # bumped by every write made through this module
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.own = deque(maxlen=1024)   # (after, through] change seqs written by this process
+        self.retries = 0                # BEGIN/COMMIT attempts that found the file locked
+
+    @contextmanager
+    def use(self):
+        """Runs database.py calls on this thread against this store, whatever DB_NAME is."""
+        previous = getattr(_local, "store", None)
+        _local.store = self
+        try:
+            yield self
+        finally:
+            _local.store = previous
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            return conn
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, cached_statements=256)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self.lock:
+            self.connections += 1
+            first = self.connections == 1
+        if first:
+            self.cache.clear()  # nothing watched data_version while it was closed
+        self.local.conn, self.local.depth, self.local.seen = conn, 0, None
+        return conn
+
+    def wrote(self, after, through):
+        """Remembers change seqs (after, through] as this process's own."""
+        with self.lock:
+            if self.own and self.own[-1][1] == after:
+                after = self.own.pop()[0]  # nobody else wrote in between: one range
+            self.own.append((after, through))
+
+    def is_own(self, seq):
+        with self.lock:
+            return any(a < seq <= b for a, b in self.own)
+
+    def close(self):
+        """Closes the calling thread's connection; other threads' close with the store."""
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            with self.lock:
+                self.connections -= 1
+        self.local.conn, self.local.depth, self.local.seen = None, 0, None
+
+    def __repr__(self):
+        return f"<GoalStore {self.path}>"
+
+_local = threading.local()  # .store while a thread is inside GoalStore.use()
+_stores = OrderedDict()     # absolute path -> GoalStore, most recently used last
+_stores_lock = threading.Lock()
+_active = (None, None)      # (DB_NAME it was opened for, GoalStore)
+
+def get_store(path: str = None) -> GoalStore:
+    """The store for path (default DB_NAME), opened if it isn't among the hot ones."""
+    path = os.path.abspath(path or DB_NAME)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = GoalStore(path)
+        _stores.move_to_end(path)
+        cold = [p for p in _stores if _stores[p] not in (store, _active[1])][:max(0, len(_stores) - HOT_STORES)]
+        evicted = [_stores.pop(p) for p in cold]
+    for old in evicted:
+        old.close()
+    return store
+
+def current_store() -> GoalStore:
+    """The store module functions use on this thread right now."""
+    global _active
+    store = getattr(_local, "store", None)
+    if store is not None:
+        return store
+    name, store = _active
+    if name != DB_NAME:
+        name = DB_NAME
+        store = get_store(name)
+        _active = (name, store)
+    return store
+
+def get_connection():
+    return current_store().connection()
+
+def close_db():
+    """Closes this thread's connections, to every open store."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    if _active[1] is not None and _active[1] not in stores:
+        stores.append(_active[1])
+    for store in stores:
+        store.close()
+    _close_attached()
+
+def _busy(exc):
+    code = getattr(exc, "sqlite_errorcode", None)  # Python 3.11+
+    return code & 0xff == 5 if code is not None else "locked" in str(exc)  # SQLITE_BUSY
+
+def _locked_retry(store, conn, sql):
+    """Runs BEGIN/COMMIT, retrying with growing pauses while another process
+    keeps the file locked past the busy timeout."""
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            return conn.execute(sql)
+        except sqlite3.OperationalError as exc:
+            if attempt == LOCK_RETRIES or not _busy(exc):
+                raise
+            with store.lock:
+                store.retries += 1
+            time.sleep(0.01 * 2 ** attempt)
+
+def _change_seq(conn):
+    try:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+    except sqlite3.OperationalError:
+        return 0  # a brand-new file: no AUTOINCREMENT table yet
+    return row[0] if row else 0
+
+@contextmanager
+def transaction():
+    """Explicit write scope: one BEGIN/COMMIT, nested scopes join the outer one."""
+    store = current_store()
+    conn, local = store.connection(), store.local
+    if local.depth:
+        local.depth += 1
+        try:
+            yield conn.cursor()
+        finally:
+            local.depth -= 1
+        return
+    _locked_retry(store, conn, "BEGIN IMMEDIATE")
+    local.depth = 1
+    try:
+        # We hold the write lock, so every change logged from here on is ours.
+        first = _change_seq(conn)
+        yield conn.cursor()
+        last = _change_seq(conn)
+        _locked_retry(store, conn, "COMMIT")
+    except BaseException:
+        local.depth = 0
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    local.depth = 0
+    if last != first:
+        store.wrote(first, last)
+
+def _query(sql, params=()):
+    return get_connection().execute(sql, params).fetchall()
+
+def _goals(sql, params=()):
+    """_query for SELECT {GOAL_COLUMNS} statements: rows come back as Goal objects."""
+    cursor = get_connection().cursor()
+    cursor.row_factory = goal_row
+    return cursor.execute(sql, params).fetchall()
+
+# --- SCHEMA ---
+GOAL_COLUMNS = "id, title, target_date, completed"
+
+def _m1_date_index(cursor):
+    # Serves both the per-day dashboard lookup and the date-ordered history scan.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_goals_date ON goals (target_date, completed)")
+
+def _m2_title_key(cursor):
+    # Normalized title for most-missed grouping. Filled from Python so it
+    # matches str.lower() exactly (SQLite's lower() only folds ASCII).
+    cursor.execute("ALTER TABLE goals ADD COLUMN title_key TEXT")
+    rows = cursor.execute("SELECT id, title FROM goals").fetchall()
+    cursor.executemany("UPDATE goals SET title_key = ? WHERE id = ?", ((t.lower(), i) for i, t in rows))
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_goals_missed ON goals (completed, title_key)")
+
+def _m3_missed_covering(cursor):
+    # get_top_missed breaks ties by date, so keep target_date in the index too.
+    cursor.execute("DROP INDEX IF EXISTS idx_goals_missed")
+    cursor.execute("CREATE INDEX idx_goals_missed ON goals (completed, title_key, target_date)")
+
+_DAILY_STATS_SQL = "SELECT target_date, COUNT(*), SUM(completed = 1) FROM goals GROUP BY target_date"
+
+def _m4_daily_stats(cursor):
+    # Per-day rollup kept in step with goals by triggers, inside the same
+    # transaction as the write that changed it.
+    cursor.execute("""
+        CREATE TABLE daily_stats (
+            date TEXT PRIMARY KEY,
+            total INTEGER NOT NULL,
+            completed INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("INSERT INTO daily_stats " + _DAILY_STATS_SQL)
+    # One execute per trigger: executescript() would commit the migration early.
+    cursor.execute("""
+        CREATE TRIGGER goals_stats_insert AFTER INSERT ON goals BEGIN
+            INSERT INTO daily_stats VALUES (NEW.target_date, 1, NEW.completed = 1)
+            ON CONFLICT (date) DO UPDATE SET total = total + 1, completed = completed + (NEW.completed = 1);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER goals_stats_delete AFTER DELETE ON goals BEGIN
+            UPDATE daily_stats SET total = total - 1, completed = completed - (OLD.completed = 1)
+            WHERE date = OLD.target_date;
+            DELETE FROM daily_stats WHERE date = OLD.target_date AND total <= 0;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER goals_stats_update AFTER UPDATE OF target_date, completed ON goals BEGIN
+            UPDATE daily_stats SET total = total - 1, completed = completed - (OLD.completed = 1)
+            WHERE date = OLD.target_date;
+            INSERT INTO daily_stats VALUES (NEW.target_date, 1, NEW.completed = 1)
+            ON CONFLICT (date) DO UPDATE SET total = total + 1, completed = completed + (NEW.completed = 1);
+            DELETE FROM daily_stats WHERE date = OLD.target_date AND total <= 0;
+        END
+    """)
+
+def _m5_title_search(cursor):
+    # Full-text index over titles, stored as an external-content FTS5 table
+    # (no second copy of the text) and kept in step by triggers. SQLite builds
+    # without FTS5 skip this and search_goals() falls back to LIKE.
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE goals_fts USING fts5(
+                title, content='goals', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return
+    cursor.execute("CREATE VIRTUAL TABLE goals_fts_vocab USING fts5vocab(goals_fts, 'row')")
+    cursor.execute("INSERT INTO goals_fts (goals_fts) VALUES ('rebuild')")
+    cursor.execute("""
+        CREATE TRIGGER goals_fts_insert AFTER INSERT ON goals BEGIN
+            INSERT INTO goals_fts (rowid, title) VALUES (NEW.id, NEW.title);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER goals_fts_delete AFTER DELETE ON goals BEGIN
+            INSERT INTO goals_fts (goals_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER goals_fts_update AFTER UPDATE OF title ON goals BEGIN
+            INSERT INTO goals_fts (goals_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+            INSERT INTO goals_fts (rowid, title) VALUES (NEW.id, NEW.title);
+        END
+    """)
+
+def _m6_templates(cursor):
+    # Recurring goals: each title is stored once in titles, each rule once in
+    # templates. Instances become ordinary goal rows (tagged with template_id)
+    # the first time a date is prepared; materialized_days records, per date,
+    # the newest template already expanded there, so a deleted instance stays deleted.
+    cursor.execute("""
+        CREATE TABLE titles (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE,
+            title_key TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE templates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title_id INTEGER NOT NULL REFERENCES titles (id),
+            every INTEGER NOT NULL DEFAULT 1,      -- every N days, counted from start_date
+            weekdays INTEGER NOT NULL DEFAULT 127, -- bit 0 = Monday ... bit 6 = Sunday
+            start_date TEXT NOT NULL,
+            end_date TEXT                          -- last day, NULL while active
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE materialized_days (
+            date TEXT PRIMARY KEY,
+            through INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("ALTER TABLE goals ADD COLUMN template_id INTEGER")
+
+def _m7_archive(cursor):
+    # Old goals can move out to one database per year (see ARCHIVE below).
+    # What analytics need from them stays here: daily_stats keeps counting
+    # them and archived_missed has their most-missed counts, per year.
+    cursor.execute("CREATE TABLE archives (year INTEGER PRIMARY KEY)")
+    cursor.execute("""
+        CREATE TABLE archived_missed (
+            year INTEGER NOT NULL,
+            title_key TEXT NOT NULL,
+            misses INTEGER NOT NULL,
+            first_date TEXT NOT NULL,
+            min_id INTEGER NOT NULL,
+            PRIMARY KEY (year, title_key)
+        ) WITHOUT ROWID
+    """)
+    # Last run of each scheduled task (archive.py).
+    cursor.execute("CREATE TABLE maintenance (task TEXT PRIMARY KEY, last_run TEXT NOT NULL) WITHOUT ROWID")
+
+def _m8_change_log(cursor):
+    # Every goal insert, edit and delete gets a number, so another window or
+    # process can ask what changed since the last number it saw instead of
+    # reloading (see get_changes). goal_id 0 means everything went (clear_all_data).
+    cursor.execute("""
+        CREATE TABLE changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_id INTEGER NOT NULL,
+            target_date TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER goals_log_insert AFTER INSERT ON goals BEGIN
+            INSERT INTO changes (goal_id, target_date) VALUES (NEW.id, NEW.target_date);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER goals_log_update AFTER UPDATE OF title, target_date, completed ON goals BEGIN
+            INSERT INTO changes (goal_id, target_date) VALUES (NEW.id, NEW.target_date);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER goals_log_delete AFTER DELETE ON goals BEGIN
+            INSERT INTO changes (goal_id, target_date) VALUES (OLD.id, OLD.target_date);
+        END
+    """)
+
+def _m9_day_order(cursor):
+    # With id right after the date, a day's goals come out of the index in id
+    # order (no sort for get_goals_by_date) and the rollup still reads it alone.
+    cursor.execute("DROP INDEX IF EXISTS idx_goals_date")
+    cursor.execute("CREATE INDEX idx_goals_date ON goals (target_date, id, completed)")
+
+def _m10_title_key_triggers(cursor):
+    # Scripts and other programs insert with the original columns and leave
+    # title_key NULL. The triggers fill it for them with SQLite's lower();
+    # the app's own writes still set it from Python, and are left alone.
+    rows = cursor.execute("SELECT id, title FROM goals WHERE title_key IS NULL").fetchall()
+    cursor.executemany("UPDATE goals SET title_key = ? WHERE id = ?", ((t.lower(), i) for i, t in rows))
+    cursor.execute("""
+        CREATE TRIGGER goals_key_insert AFTER INSERT ON goals WHEN NEW.title_key IS NULL BEGIN
+            UPDATE goals SET title_key = lower(NEW.title) WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER goals_key_update AFTER UPDATE OF title ON goals
+        WHEN NEW.title_key IS OLD.title_key AND NEW.title IS NOT OLD.title BEGIN
+            UPDATE goals SET title_key = lower(NEW.title) WHERE id = NEW.id;
+        END
+    """)
+
+def _m11_first_miss_ids(cursor):
+    # archived_missed.min_id was the title's lowest archived id; it is now the
+    # id of its first miss by date (see _MISSED_SQL). Archives are read with
+    # their own connection: ATTACH can't run inside the migration's transaction.
+    for year, in cursor.execute("SELECT year FROM archives").fetchall():
+        path = archive_path(year)
+        if not os.path.exists(path):
+            continue
+        hot = {i for i, in cursor.execute("SELECT id FROM goals WHERE target_date >= ? AND target_date < ?",
+                                          (f"{year:04d}-01-01", f"{year + 1:04d}-01-01"))}
+        first = {}
+        conn = sqlite3.connect(path)
+        try:
+            for key, day, gid in conn.execute("SELECT title_key, target_date, id FROM goals WHERE completed = 0 "
+                                              "ORDER BY target_date, id"):
+                if gid not in hot:
+                    first.setdefault(key, (day, gid))
+        finally:
+            conn.close()
+        cursor.executemany("UPDATE archived_missed SET first_date = ?, min_id = ? WHERE year = ? AND title_key = ?",
+                           ((day, gid, year, key) for key, (day, gid) in first.items()))
+
+# Append only: position in this list is the schema version (PRAGMA user_version).
+MIGRATIONS = [
+    _m1_date_index,
+    _m2_title_key,
+    _m3_missed_covering,
+    _m4_daily_stats,
+    _m5_title_search,
+    _m6_templates,
+    _m7_archive,
+    _m8_change_log,
+    _m9_day_order,
+    _m10_title_key_triggers,
+    _m11_first_miss_ids,
+]
+
+def schema_version() -> int:
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+def migrate():
+    """Upgrades an existing goals.db in place, one version per transaction."""
+    version = schema_version()
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        with transaction() as cursor:
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {number}")
+
+def explain(sql, params=()):
+    """EXPLAIN QUERY PLAN details, e.g. to check a query hits an index."""
+    return [row[3] for row in _query("EXPLAIN QUERY PLAN " + sql, params)]
+
+# --- ANALYTICS CACHE ---
+# Derived numbers (day totals, weekly windows, streaks, the whole Analytics
+# page) are memoized here. Each entry remembers the range of dates it was
+# computed from; a write only drops the entries whose range covers a date it
+# touched, and old windows age out LRU. One per store, shared by all threads.
+_MISSING = object()
+
+class AnalyticsCache:
+    def __init__(self, size=256):
+        self.size = size
+        self.entries = OrderedDict()  # key -> (value, first date, last date); None = open ended
+        self.lock = threading.Lock()
+        self.generation = 0  # lets a computation that raced a write drop its result
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, first, last, generation):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = (value, first, last)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, dates):
+        """Drops entries computed from any of these dates (None means every date)."""
+        with self.lock:
+            self.generation += 1
+            for key, (_, first, last) in list(self.entries.items()):
+                if any(d is None or ((first is None or d >= first) and (last is None or d <= last)) for d in dates):
+                    del self.entries[key]
+                    self.invalidations += 1
+
+    def clear(self):
+        self.invalidate([None])
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "invalidations": self.invalidations, "size": len(self.entries)}
+
+def _touch(*dates):
+    """Drops cached results that a write to these dates could affect."""
+    store = current_store()
+    with store.lock:
+        store.writes += 1
+    store.cache.invalidate(dates)
+
+def _forget_cache(wrote=False):
+    store = current_store()
+    if wrote:
+        with store.lock:
+            store.writes += 1
+    store.cache.clear()
+    attached = getattr(_local, "attached", None)
+    if attached is not None:
+        attached[3].clear()  # this thread's all-profiles results
+
+def _check_external(store):
+    """Drops cached results that commits from outside this process could have
+    changed, e.g. server.py or cli.py running separately. PRAGMA data_version
+    moves for every other connection's commit, our other threads' included.
+    With no write of ours since this thread last looked it was all someone
+    else's, so the cache is emptied; otherwise the change log tells which
+    dates they touched."""
+    version = store.connection().execute("PRAGMA data_version").fetchone()[0]
+    seen = store.local.seen
+    if seen is not None and seen[0] == version:
+        return
+    writes = store.writes
+    if seen is None:
+        seq = _newest_change()
+    elif seen[1] == writes:
+        store.cache.clear()
+        seq = _newest_change()
+    else:
+        seq, external = _external_changes(seen[2], 1000)
+        if external is None:
+            store.cache.clear()
+        elif external:
+            store.cache.invalidate({day for _, day in external})
+    store.local.seen = (version, writes, seq)
+
+def _cached(key, compute, first=None, last=None):
+    """compute() through the cache, kept until a write lands in [first, last]."""
+    store = current_store()
+    _check_external(store)
+    value = store.cache.get(key)
+    if value is _MISSING:
+        generation = store.cache.generation
+        value = compute()
+        store.cache.put(key, value, first, last, generation)
+    return value
+
+def cache_stats():
+    """Hit/miss/eviction/invalidation counters and the number of cached entries."""
+    return current_store().cache.stats()
+
+def _goal_date(cursor, goal_id):
+    row = cursor.execute("SELECT target_date FROM goals WHERE id = ?", (goal_id,)).fetchone()
+    return row[0] if row else None
+
+def _scan_streak(kind, today):
+    import analytics
+    walk = analytics.streak_from_days if kind == "active" else analytics.perfect_streak_from_days
+    cache = current_store().cache
+    generation = cache.generation
+    cursor = get_connection().execute("SELECT date, total, completed FROM daily_stats ORDER BY date DESC")
+    seen = [""]
+    def rows():
+        for row in _merge_virtual(cursor, _virtual_misses(today)[0], newest_first=True):
+            seen[0] = row[0]
+            yield row
+        seen[0] = ""  # read to the end: any older write may extend it
+    try:
+        value = walk(rows(), today)
+    finally:
+        cursor.close()
+    # A write to a date older than the scan stopped at cannot change the streak.
+    cache.put(("streak", kind, today), value, seen[0] or None, None, generation)
+    return value
+
+def get_streaks(today: date = None):
+    """(activity streak, perfect streak), served from cache while still valid."""
+    today = today or date.today()
+    store = current_store()
+    _check_external(store)
+    values = []
+    for kind in ("active", "perfect"):
+        value = store.cache.get(("streak", kind, today))
+        values.append(_scan_streak(kind, today) if value is _MISSING else value)
+    return tuple(values)
+
+# --- CHANGE DETECTION ---
+def data_version():
+    """Changes whenever goals.db does: the store's write count moves with every
+    write made through this module, PRAGMA data_version when any other
+    connection (another thread or process) commits. Only compare values read
+    on the same thread."""
+    store = current_store()
+    return store.writes, store.connection().execute("PRAGMA data_version").fetchone()[0]
+
+def _newest_change():
+    return _query("SELECT IFNULL(MAX(seq), 0) FROM changes")[0][0]
+
+def _external_changes(since, limit):
+    """(newest change number, [(goal_id, target_date)] other processes logged
+    after since), or (newest, None) when that can't be told: more than limit
+    entries, a clear, or since not in the (trimmed) log."""
+    store = current_store()
+    rows = _query("SELECT seq, goal_id, target_date FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                  (since, limit + 1))
+    if not rows:
+        newest = _newest_change()
+        # Newer than since: committed after the query above, next time then.
+        return (since, []) if newest >= since else (newest, None)
+    if len(rows) > limit or rows[0][0] != since + 1:
+        return _newest_change(), None
+    external = [(goal_id, day) for seq, goal_id, day in rows if not store.is_own(seq)]
+    if any(goal_id == 0 for goal_id, _ in external):
+        return rows[-1][0], None
+    return rows[-1][0], external
+
+def get_changes(since: int = None, limit: int = 200):
+    """Goals other processes changed after change number since, as (newest
+    number, {goal_id: Goal, or None if it is gone}); this process's own writes
+    are left out. The dict is None when a reload is simpler: more than limit
+    changes, the data was cleared, or since isn't in the (trimmed) log.
+    since=None only returns the number to start from."""
+    if since is None:
+        return _newest_change(), {}
+    newest, external = _external_changes(since, limit)
+    if external is None:
+        return newest, None
+    changed = dict.fromkeys(goal_id for goal_id, _ in external)
+    if changed:
+        ids = list(changed)
+        changed.update((g.id, g) for g in _goals(
+            f"SELECT {GOAL_COLUMNS} FROM goals WHERE id IN ({','.join('?' * len(ids))})", ids))
+        current_store().cache.invalidate({day for _, day in external})
+    return newest, changed
+
+def trim_changes(keep: int = 10000):
+    """Forgets all but the newest keep change-log entries (at least one stays,
+    to tell how far the log has got); an instance further behind just reloads."""
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?", (max(keep, 1),))
+        return cursor.rowcount
+
+# --- GOALS ---
 def init_db():
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
+    with transaction() as cursor:
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS goals (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -14,46 +657,887 @@ def init_db():
                 completed INTEGER DEFAULT 0
             )
         """)
-        conn.commit()
+    migrate()
 
-def add_goal(title: str, target_date: str = None):
+def add_goal(title: str, target_date: str = None) -> int:
     if target_date is None:
         target_date = date.today().isoformat()
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO goals (title, target_date, completed) VALUES (?, ?, 0)", (title, target_date))
-        conn.commit()
+    with transaction() as cursor:
+        cursor.execute("INSERT INTO goals (title, title_key, target_date, completed) VALUES (?, ?, ?, 0)",
+                       (title, title.lower(), target_date))
+        goal_id = cursor.lastrowid
+    _touch(target_date)
+    return goal_id
+
+def get_goal(goal_id: int):
+    rows = _goals(f"SELECT {GOAL_COLUMNS} FROM goals WHERE id = ?", (goal_id,))
+    return rows[0] if rows else None
+
+def existing_ids(goal_ids) -> set:
+    goal_ids, found = list(goal_ids), set()
+    for i in range(0, len(goal_ids), 500):
+        chunk = goal_ids[i:i + 500]
+        found.update(g for g, in _query(f"SELECT id FROM goals WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+    return found
+
+_DAY_SQL = "SELECT id, title, completed FROM goals WHERE target_date = ? ORDER BY id"
+_ALL_GOALS_SQL = f"SELECT {GOAL_COLUMNS} FROM goals ORDER BY target_date ASC"
 
 def get_goals_by_date(target_date: str):
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM goals WHERE target_date = ?", (target_date,))
-        return cursor.fetchall()
+    """The day's goals, read only: run prepare_day first (as a write) so its
+    recurring and archived goals are there."""
+    return day_goals(_query(_DAY_SQL, (target_date,)), target_date)
+
+def prepare_day(target_date: str) -> int:
+    """Gets target_date ready to show: creates the goals templates owe it and
+    brings its archived goals back. A write, so it belongs on the writer
+    (service.write, server.py's batcher); when the day is already done it is
+    two small reads. Returns how many goals appeared."""
+    return materialize(target_date) + _thaw(target_date)
 
 def toggle_goal_status(goal_id: int, current_status: int):
     new_status = 0 if current_status else 1
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
+    with transaction() as cursor:
+        target_date = _goal_date(cursor, goal_id)
         cursor.execute("UPDATE goals SET completed = ? WHERE id = ?", (new_status, goal_id))
-        conn.commit()
+    _touch(target_date)
 
 def delete_goal(goal_id: int):
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
+    with transaction() as cursor:
+        target_date = _goal_date(cursor, goal_id)
         cursor.execute("DELETE FROM goals WHERE id = ?", (goal_id,))
-        conn.commit()
+    _touch(target_date)
 
 def get_all_goals():
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM goals ORDER BY target_date ASC")
-        return cursor.fetchall()
+    """Every goal still in goals.db; archived ones are left out (iter_goals has both)."""
+    return _goals(_ALL_GOALS_SQL)
+
+# --- BATCHED WRITES ---
+def set_goal_status(goal_id: int, completed: int):
+    """Absolute version of toggle_goal_status: repeating it is harmless."""
+    apply_batch(statuses={goal_id: completed})
+
+def add_goals(rows) -> list:
+    """Inserts (title, target_date, completed) rows with one executemany; returns their ids."""
+    return apply_batch(inserts=rows)
+
+def apply_batch(inserts=(), statuses=None, deletes=()) -> list:
+    """Applies a batch of mutations in a single transaction (one commit).
+    Returns the ids of the inserted rows, in order."""
+    inserts = [(t, t.lower(), d, int(c)) for t, d, c in inserts]
+    statuses = statuses or {}
+    deletes = list(deletes)
+    touched = {row[2] for row in inserts}
+    ids = []
+    with transaction() as cursor:
+        changed = list(statuses) + deletes
+        for i in range(0, len(changed), 500):
+            chunk = changed[i:i + 500]
+            touched.update(d for d, in cursor.execute(
+                f"SELECT DISTINCT target_date FROM goals WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+        if inserts:
+            cursor.executemany("INSERT INTO goals (title, title_key, target_date, completed) VALUES (?, ?, ?, ?)", inserts)
+            # AUTOINCREMENT under our write lock hands out consecutive ids.
+            last = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'goals'").fetchone()[0]
+            ids = list(range(last - len(inserts) + 1, last + 1))
+        if statuses:
+            cursor.executemany("UPDATE goals SET completed = ? WHERE id = ?", ((int(c), g) for g, c in statuses.items()))
+        if deletes:
+            cursor.executemany("DELETE FROM goals WHERE id = ?", ((g,) for g in deletes))
+    if touched:
+        _touch(*touched)
+    return ids
+
+# --- RECURRING TEMPLATES ---
+# A rule is (every, weekdays): due on start_date + k * every days that fall
+# on one of the weekdays. Daily = (1, all), weekdays = (1, Mon-Fri), every 3
+# days = (3, all), Mon/Wed/Fri = (1, those three). Past days nobody opened
+# are never filled in; their occurrences count as missed goals on the fly.
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+ALL_DAYS = 0b1111111
+
+def parse_repeat(text: str):
+    """(every, weekdays) for "daily", "weekdays", "weekends", "every 3 days" or "mon wed fri"."""
+    import re
+    words = re.findall(r"[a-z]+|\d+", text.lower())
+    if words in (["daily"], ["every", "day"]):
+        return 1, ALL_DAYS
+    if words == ["weekdays"]:
+        return 1, 0b0011111
+    if words == ["weekends"]:
+        return 1, 0b1100000
+    if len(words) >= 2 and words[0] == "every" and words[1].isdigit() and words[2:] in ([], ["days"], ["day"]):
+        if int(words[1]) < 1:
+            raise ValueError("every needs at least 1 day")
+        return int(words[1]), ALL_DAYS
+    mask = 0
+    for word in words:
+        day = next((i for i, name in enumerate(WEEKDAYS) if word.startswith(name)), None)
+        if day is None:
+            raise ValueError(f"Unknown repeat {text!r}: try daily, weekdays, every 3 days or mon wed fri")
+        mask |= 1 << day
+    if not mask:
+        raise ValueError("Repeat is empty")
+    return 1, mask
+
+def describe_repeat(every: int, weekdays: int) -> str:
+    if every > 1:
+        return f"Every {every} days" if weekdays == ALL_DAYS else \
+            f"Every {every} days on " + ", ".join(d.capitalize() for i, d in enumerate(WEEKDAYS) if weekdays >> i & 1)
+    names = {ALL_DAYS: "Daily", 0b0011111: "Weekdays", 0b1100000: "Weekends"}
+    return names.get(weekdays) or ", ".join(d.capitalize() for i, d in enumerate(WEEKDAYS) if weekdays >> i & 1)
+
+def _occurs(every, weekdays, start, o):
+    # Ordinal 1 (0001-01-01) was a Monday.
+    return o >= start and (o - start) % every == 0 and weekdays >> (o - 1) % 7 & 1
+
+def add_template(title: str, every: int = 1, weekdays: int = ALL_DAYS, start_date: str = None) -> int:
+    """Stores a recurring goal; instances appear as each date is first opened."""
+    start_date = start_date or date.today().isoformat()
+    with transaction() as cursor:
+        cursor.execute("INSERT INTO titles (title, title_key) VALUES (?, ?) ON CONFLICT (title) DO NOTHING",
+                       (title, title.lower()))
+        cursor.execute("""
+            INSERT INTO templates (title_id, every, weekdays, start_date)
+            SELECT id, ?, ?, ? FROM titles WHERE title = ?
+        """, (every, weekdays, start_date, title))
+        template_id = cursor.lastrowid
+    _forget_cache(wrote=True)  # past occurrences count as missed
+    return template_id
+
+def get_templates(include_stopped: bool = False):
+    """(id, title, every, weekdays, start_date, end_date) rows, oldest first."""
+    return _query("""
+        SELECT t.id, ti.title, t.every, t.weekdays, t.start_date, t.end_date
+        FROM templates t JOIN titles ti ON ti.id = t.title_id
+        WHERE ? OR t.end_date IS NULL OR t.end_date >= ? ORDER BY t.id
+    """, (include_stopped, date.today().isoformat()))
+
+def stop_template(template_id: int, last_date: str = None):
+    """Ends a template after last_date (default yesterday). Its unfinished
+    instances after that are deleted; finished ones stay as history."""
+    last_date = last_date or date.fromordinal(date.today().toordinal() - 1).isoformat()
+    with transaction() as cursor:
+        cursor.execute("UPDATE templates SET end_date = ? WHERE id = ?", (last_date, template_id))
+        cursor.execute("DELETE FROM goals WHERE template_id = ? AND target_date > ? AND completed = 0",
+                       (template_id, last_date))
+    _forget_cache(wrote=True)
+
+def materialize(target_date: str) -> int:
+    """Creates the goals that templates owe target_date, once, in one
+    transaction. Returns how many were added (0 on every later call)."""
+    (due_through, done_through), = _query("""
+        SELECT (SELECT IFNULL(MAX(id), 0) FROM templates WHERE start_date <= ?1 AND (end_date IS NULL OR end_date >= ?1)),
+               IFNULL((SELECT through FROM materialized_days WHERE date = ?1), 0)
+    """, (target_date,))
+    if due_through <= done_through:
+        return 0
+    o = date.fromisoformat(target_date).toordinal()
+    with transaction() as cursor:
+        # Re-read under the write lock: another thread or process may have got here first.
+        done = cursor.execute("SELECT through FROM materialized_days WHERE date = ?", (target_date,)).fetchone()
+        rows = cursor.execute("""
+            SELECT t.id, t.every, t.weekdays, t.start_date, ti.title, ti.title_key
+            FROM templates t JOIN titles ti ON ti.id = t.title_id
+            WHERE t.id > ?1 AND t.start_date <= ?2 AND (t.end_date IS NULL OR t.end_date >= ?2) ORDER BY t.id
+        """, (done[0] if done else 0, target_date)).fetchall()
+        due = [(title, key, target_date, tid) for tid, every, weekdays, start, title, key in rows
+               if _occurs(every, weekdays, date.fromisoformat(start).toordinal(), o)]
+        cursor.executemany("INSERT INTO goals (title, title_key, target_date, completed, template_id) "
+                           "VALUES (?, ?, ?, 0, ?)", due)
+        if rows:
+            cursor.execute("INSERT INTO materialized_days VALUES (?, ?) ON CONFLICT (date) DO UPDATE SET through = excluded.through",
+                           (target_date, rows[-1][0]))
+    if due:
+        _touch(target_date)
+    return len(due)
+
+def _virtual_misses(today: date):
+    """Template occurrences before today on dates never materialized, as
+    ({date: count}, {title_key: (count, first date, template id)}). They are
+    missed goals that were never written down."""
+    # Writes to today or later can't change it; materializing a past day can.
+    return _cached(("virtual", today), lambda: _count_virtual(_query, today), None,
+                   date.fromordinal(today.toordinal() - 1).isoformat())
+
+def _count_virtual(query, today, schema="main"):
+    templates = query(f"""
+        SELECT t.id, t.every, t.weekdays, t.start_date, t.end_date, ti.title_key
+        FROM {schema}.templates t JOIN {schema}.titles ti ON ti.id = t.title_id WHERE t.start_date < ?
+    """, (today.isoformat(),))
+    by_date, by_title = {}, {}
+    if not templates:
+        return by_date, by_title
+    done = dict(query(f"SELECT date, through FROM {schema}.materialized_days WHERE date < ?", (today.isoformat(),)))
+    yesterday = today.toordinal() - 1
+    for tid, every, weekdays, start, end, key in templates:
+        first = date.fromisoformat(start).toordinal()
+        last = min(yesterday, date.fromisoformat(end).toordinal() if end else yesterday)
+        missed, first_missed = 0, None
+        for o in range(first, last + 1, every):
+            if not weekdays >> (o - 1) % 7 & 1:
+                continue
+            d = date.fromordinal(o).isoformat()
+            if done.get(d, 0) >= tid:
+                continue
+            by_date[d] = by_date.get(d, 0) + 1
+            missed += 1
+            first_missed = first_missed or d
+        if missed:
+            count, seen_first, seen_tid = by_title.get(key, (0, first_missed, tid))
+            by_title[key] = (count + missed, min(seen_first, first_missed), min(seen_tid, tid))
+    return by_date, by_title
+
+def _merge_virtual(rows, virtual, newest_first=False, start=None, end=None):
+    """(date, total, completed) rows with virtual {date: missed} added in,
+    kept in the rows' date order and limited to [start, end]."""
+    extra = sorted(((d, n) for d, n in virtual.items()
+                    if (start is None or d >= start) and (end is None or d <= end)), reverse=newest_first)
+    if not extra:
+        yield from rows
+        return
+    i = 0
+    for d, total, completed in rows:
+        while i < len(extra) and (extra[i][0] > d if newest_first else extra[i][0] < d):
+            yield extra[i][0], extra[i][1], 0
+            i += 1
+        if i < len(extra) and extra[i][0] == d:
+            total += extra[i][1]
+            i += 1
+        yield d, total, completed
+    for d, n in extra[i:]:
+        yield d, n, 0
+
+# --- BULK ---
+def import_rows(rows, dedupe: bool = True) -> int:
+    """Inserts one chunk of (title, target_date, completed) rows in a single
+    transaction. With dedupe, rows whose (title, target_date) already exist,
+    in the table, the archive or earlier in the chunk, are skipped. Returns
+    rows inserted."""
+    rows = [(t, t.lower(), d, int(c)) for t, d, c in rows]
+    if dedupe and rows:
+        archived = _archived_pairs(rows)
+        if archived:
+            rows = [r for r in rows if (r[0], r[2]) not in archived]
+    if not rows:
+        return 0
+    with transaction() as cursor:
+        if dedupe:
+            cursor.executemany("""
+                INSERT INTO goals (title, title_key, target_date, completed)
+                SELECT ?1, ?2, ?3, ?4 WHERE NOT EXISTS (SELECT 1 FROM goals WHERE target_date = ?3 AND title = ?1)
+            """, rows)
+        else:
+            cursor.executemany("INSERT INTO goals (title, title_key, target_date, completed) VALUES (?, ?, ?, ?)", rows)
+        inserted = cursor.rowcount
+    _touch(*{r[2] for r in rows})
+    return inserted
+
+def _batches(cursor, batch):
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+def iter_goals(batch: int = 5000):
+    """Streams every goal, archived ones included, in id order without loading
+    the table, as plain (id, title, target_date, completed) tuples: export
+    writes each row once and drops it, so building Goals would only cost time."""
+    cursor = get_connection().execute(f"SELECT {GOAL_COLUMNS} FROM goals ORDER BY id")
+    # Read while the cursor holds its snapshot: a year archived after it was
+    # taken is still in the cursor, one archived before is listed here.
+    years = archived_years()
+    archives = [conn for conn in map(_open_archive, years) if conn is not None]
+    try:
+        if not archives:
+            yield from _batches(cursor, batch)
+            return
+        sources = [_batches(cursor, batch)] + [
+            _batches(conn.execute("SELECT id, title, target_date, completed FROM goals ORDER BY id"), batch)
+            for conn in archives]
+        import heapq
+        last = None
+        for row in heapq.merge(*sources, key=itemgetter(0)):  # goals.db first on equal ids
+            if row[0] != last:
+                last = row[0]
+                yield row
+    finally:
+        cursor.close()
+        for conn in archives:
+            conn.close()
+
+# --- SEARCH ---
+# Titles are matched word by word: every word is a prefix ("rea" finds "Read
+# 20 pages"), and a word that prefixes nothing is swapped for the closest
+# indexed words (difflib), so "exercize" still finds "Exercise". Results come
+# newest first and are paged by id, which FTS5 walks without ranking every match.
+def _words(text):
+    import re
+    return re.findall(r"\w+", text.lower())
+
+def _has_search_index():
+    return bool(_query("SELECT 1 FROM sqlite_master WHERE name = 'goals_fts'"))
+
+def _similar_terms(word, n=4):
+    # Candidates share the first letter; typos there are rare and it keeps the list short.
+    def compute():
+        return [t for t, in _query("SELECT term FROM goals_fts_vocab WHERE term >= ? AND term < ?",
+                                   (word[0], word[0] + "\U0010ffff"))]
+    import difflib
+    terms = _cached(("vocab", word[0]), compute)
+    return difflib.get_close_matches(word, terms, n=n, cutoff=0.75)
+
+def search_query(text):
+    """FTS5 MATCH expression for what the user typed, or None if nothing can match."""
+    parts = []
+    for word in _words(text):
+        if _query("SELECT 1 FROM goals_fts_vocab WHERE term >= ? AND term < ? LIMIT 1", (word, word + "\U0010ffff")):
+            parts.append(f'"{word}"*')
+        else:
+            close = _similar_terms(word)
+            if not close:
+                return None
+            parts.append("(" + " OR ".join(f'"{t}"' for t in close) + ")")
+    return " AND ".join(parts) or None
+
+def search_goals(text: str, limit: int = 50, before: int = None):
+    """Goals whose title matches text, newest first, archived ones included.
+    Pass the last id of a page as before= to get the next page."""
+    before = before if before is not None else 1 << 62
+    years = archived_years()
+    if not _has_search_index():
+        words = _words(text)
+        if not words:
+            return []
+        where = " AND ".join("title_key LIKE ?" for _ in words)
+        found = _goals(f"SELECT {GOAL_COLUMNS} FROM goals WHERE {where} AND id < ? ORDER BY id DESC LIMIT ?",
+                       [f"%{w}%" for w in words] + [before, limit])
+    else:
+        match = search_query(text)
+        found = [] if match is None else _goals(f"""
+            SELECT {GOAL_COLUMNS} FROM goals WHERE id IN (
+                SELECT rowid FROM goals_fts WHERE goals_fts MATCH ? AND rowid < ? ORDER BY rowid DESC LIMIT ?
+            ) ORDER BY id DESC
+        """, (match, before, limit))
+    return _search_archives(text, found, years, limit, before) if years else found
+
+def _search_archives(text, found, years, limit, before):
+    """Adds the archives' matches to found (a page from goals.db) and keeps the
+    newest limit. Archives have no search index: every word must appear in
+    the title, as without FTS5, and typo correction doesn't reach them."""
+    words = _words(text)
+    if not words:
+        return found
+    where = " AND ".join("title_key LIKE ?" for _ in words)
+    params = [f"%{w}%" for w in words] + [before, limit]
+    archived = []
+    for year in years:
+        conn = _open_archive(year)
+        if conn is None:
+            continue
+        try:
+            archived += conn.execute(f"SELECT {GOAL_COLUMNS} FROM goals WHERE {where} AND id < ? "
+                                     f"ORDER BY id DESC LIMIT ?", params).fetchall()
+        finally:
+            conn.close()
+    back = existing_ids([row[0] for row in archived])  # thawed: goals.db's copy is the live one
+    found = found + [Goal(*row) for row in archived if row[0] not in back]
+    found.sort(key=lambda g: g.id, reverse=True)
+    return found[:limit]
+
+def rebuild_search_index():
+    if _has_search_index():
+        with transaction() as cursor:
+            cursor.execute("INSERT INTO goals_fts (goals_fts) VALUES ('rebuild')")
+
+def verify_search_index():
+    """True when goals_fts matches the goals table (FTS5 integrity-check)."""
+    if not _has_search_index():
+        return True
+    try:
+        _query("INSERT INTO goals_fts (goals_fts, rank) VALUES ('integrity-check', 1)")
+    except sqlite3.DatabaseError:
+        return False
+    return True
+
+# --- AGGREGATES ---
+# Analytics read these compact per-day rows instead of every goal.
+def get_daily_totals(start: str = None, end: str = None, newest_first: bool = False):
+    """(date, total, completed) per day, optionally limited to [start, end]."""
+    def compute():
+        where, params = [], []
+        if start is not None:
+            where.append("date >= ?"); params.append(start)
+        if end is not None:
+            where.append("date <= ?"); params.append(end)
+        sql = "SELECT date, total, completed FROM daily_stats"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY date" + (" DESC" if newest_first else "")
+        return tuple(_merge_virtual(_query(sql, params), _virtual_misses(today)[0], newest_first, start, end))
+    today = date.today()
+    return _cached(("days", start, end, newest_first, today), compute, start, end)
+
+def get_day_totals(target_date: str):
+    """(total, completed) for a single day."""
+    def compute():
+        rows = _query("SELECT total, completed FROM daily_stats WHERE date = ?", (target_date,))
+        total, completed = rows[0] if rows else (0, 0)
+        return total + _virtual_misses(today)[0].get(target_date, 0), completed
+    today = date.today()
+    return _cached(("day", target_date, today), compute, target_date, target_date)
+
+def get_week_totals(today: date = None):
+    """Per-day totals for the 7 days ending today."""
+    today = today or date.today()
+    return get_daily_totals(date.fromordinal(today.toordinal() - 6).isoformat(), today.isoformat())
+
+def get_range_analytics(start: str, end: str) -> dict:
+    """Per-day, per-week and per-month completion for [start, end] (see
+    analytics.range_summary), from one range scan of daily_stats."""
+    import analytics
+    return _cached(("range", start, end), lambda: analytics.range_summary(
+        get_daily_totals(start, end), date.fromisoformat(start), date.fromisoformat(end)), start, end)
+
+# Missed goals per title, archived ones included (archived_missed). Ties go
+# to the title missed first in (target_date, id) order, as Counter over the
+# date-ordered goals does: MIN over date + zero-padded id finds that miss,
+# and min_id is its id (not the title's lowest id, which imports and
+# back-dated goals put out of date order).
+_FIRST_MISS = "target_date || printf('%010d', id)"
+_SPLIT_FIRST = "substr(MIN(f), 1, 10) AS first, CAST(substr(MIN(f), 11) AS INTEGER) AS min_id"
+_MISSED_SQL = f"""
+    WITH missed AS (
+        SELECT title_key, SUM(n) AS misses, {_SPLIT_FIRST} FROM (
+            SELECT title_key, COUNT(*) AS n, MIN({_FIRST_MISS}) AS f FROM goals
+            WHERE completed = 0 GROUP BY title_key
+            UNION ALL
+            SELECT title_key, misses, first_date || printf('%010d', min_id) FROM archived_missed
+        ) GROUP BY title_key
+    )
+"""
+_TOP_MISSED_SQL = _MISSED_SQL + "SELECT title_key, misses FROM missed ORDER BY misses DESC, first, min_id LIMIT ?"
+
+def get_top_missed(limit: int = 1):
+    """(title_key, misses) for the most often missed titles, earliest first on ties."""
+    def compute():
+        virtual = _virtual_misses(today)[1]
+        if not virtual:
+            return tuple(_query(_TOP_MISSED_SQL, (limit,)))
+        # Only template titles gain misses, so the answer is among SQL's top
+        # rows plus those titles' own counts.
+        keys = list(virtual)
+        counts = {key: [misses, first, min_id, 0] for key, misses, first, min_id in _query(_MISSED_SQL + f"""
+            SELECT title_key, misses, first, min_id FROM missed
+            WHERE title_key IN ({",".join("?" * len(keys))})
+               OR title_key IN (SELECT title_key FROM missed ORDER BY misses DESC, first, min_id LIMIT ?)
+        """, (*keys, limit))}
+        for key, (missed, first, tid) in virtual.items():
+            entry = counts.setdefault(key, [0, first, float("inf"), tid])
+            entry[0] += missed
+            entry[1] = min(entry[1], first)
+            entry[3] = tid
+        ranked = sorted(counts.items(), key=lambda kv: (-kv[1][0], kv[1][1], kv[1][2], kv[1][3]))
+        return tuple((key, entry[0]) for key, entry in ranked[:limit])
+    today = date.today()
+    return _cached(("missed", limit, today), compute)
+
+def get_analytics(target_date: str) -> dict:
+    """Everything the Analytics page shows, from the aggregates above.
+    Cached as a whole until the next write, so treat the dict as read-only."""
+    import analytics
+    def compute():
+        total, completed = get_day_totals(target_date)
+        streak, perfect = get_streaks()
+        return {
+            "daily_completion": analytics.daily_completion(total, completed),
+            "streak": streak,
+            "perfect_streak": perfect,
+            "most_missed": analytics.most_missed_from_counts(get_top_missed()),
+            "weekly_summary": analytics.weekly_summary_from_days(get_week_totals()),
+        }
+    return _cached(("analytics", target_date, date.today()), compute)
+
+# --- ALL PROFILES ---
+# Totals across several goal databases, from one extra connection per thread
+# with all of them ATTACHed (schemas p0, p1, ...): each number is one UNION
+# ALL query. Results are kept per thread under every file's PRAGMA
+# data_version, so a commit to any of them, from anywhere, is noticed.
+MAX_ATTACHED = 10  # SQLite's default SQLITE_MAX_ATTACHED
+
+def _attached(paths):
+    """(connection, schema names, cache) with paths attached on this thread."""
+    paths = tuple(os.path.abspath(p) for p in paths)
+    if not 0 < len(paths) <= MAX_ATTACHED:
+        raise ValueError(f"Can combine 1 to {MAX_ATTACHED} databases, got {len(paths)}")
+    current = getattr(_local, "attached", None)
+    if current is not None and current[0] == paths:
+        return current[1:]
+    _close_attached()
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)  # ATTACH would create an empty one
+    conn = sqlite3.connect(":memory:", timeout=BUSY_TIMEOUT, isolation_level=None, cached_statements=256)
+    schemas = [f"p{i}" for i in range(len(paths))]
+    for path, schema in zip(paths, schemas):
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+        if conn.execute(f"PRAGMA {schema}.user_version").fetchone()[0] < len(MIGRATIONS):
+            store = GoalStore(path)  # a file from an older version: migrate it first
+            with store.use():
+                init_db()
+            store.close()
+    _local.attached = (paths, conn, schemas, OrderedDict())
+    return _local.attached[1:]
+
+def _close_attached():
+    current = getattr(_local, "attached", None)
+    if current is not None:
+        current[1].close()
+    _local.attached = None
+
+def _combined(paths, key, compute):
+    """compute(query, schemas) over the attached paths, cached until one of them changes."""
+    conn, schemas, cache = _attached(paths)
+    versions = tuple(conn.execute(f"PRAGMA {s}.data_version").fetchone()[0] for s in schemas)
+    hit = cache.get(key)
+    if hit is not None and hit[0] == versions:
+        cache.move_to_end(key)
+        return hit[1]
+    value = compute(lambda sql, params=(): conn.execute(sql, params).fetchall(), schemas)
+    cache[key] = (versions, value)
+    if len(cache) > 64:
+        cache.popitem(last=False)
+    return value
+
+def _combined_virtual(paths, today):
+    def compute(query, schemas):
+        by_date, by_title = {}, {}
+        for schema in schemas:
+            dates, titles = _count_virtual(query, today, schema)
+            for d, n in dates.items():
+                by_date[d] = by_date.get(d, 0) + n
+            for key, (n, first, tid) in titles.items():
+                count, seen_first, seen_tid = by_title.get(key, (0, first, tid))
+                by_title[key] = (count + n, min(seen_first, first), min(seen_tid, tid))
+        return by_date, by_title
+    return _combined(paths, ("virtual", today), compute)
+
+def get_combined_daily_totals(paths, start: str = None, end: str = None, newest_first: bool = False):
+    """get_daily_totals summed over several databases (e.g. every profile)."""
+    today = date.today()
+    def compute(query, schemas):
+        where, params = [], []
+        if start is not None:
+            where.append("date >= ?"); params.append(start)
+        if end is not None:
+            where.append("date <= ?"); params.append(end)
+        where = " WHERE " + " AND ".join(where) if where else ""
+        union = " UNION ALL ".join(f"SELECT date, total, completed FROM {s}.daily_stats{where}" for s in schemas)
+        rows = query(f"SELECT date, SUM(total), SUM(completed) FROM ({union}) GROUP BY date ORDER BY date" +
+                     (" DESC" if newest_first else ""), params * len(schemas))
+        return tuple(_merge_virtual(rows, _combined_virtual(paths, today)[0], newest_first, start, end))
+    return _combined(paths, ("days", start, end, newest_first, today), compute)
+
+def _combined_top_missed(paths, today, limit=1):
+    def compute(query, schemas):
+        union = " UNION ALL ".join(f"SELECT title_key, COUNT(*) AS n, MIN({_FIRST_MISS}) AS f "
+                                   f"FROM {s}.goals WHERE completed = 0 GROUP BY title_key UNION ALL "
+                                   f"SELECT title_key, misses, first_date || printf('%010d', min_id) "
+                                   f"FROM {s}.archived_missed" for s in schemas)
+        counts = {key: [n, first, min_id, 0] for key, n, first, min_id in
+                  query(f"SELECT title_key, SUM(n), {_SPLIT_FIRST} FROM ({union}) GROUP BY title_key")}
+        for key, (missed, first, tid) in _combined_virtual(paths, today)[1].items():
+            entry = counts.setdefault(key, [0, first, float("inf"), tid])
+            entry[0] += missed
+            entry[1] = min(entry[1], first)
+            entry[3] = tid
+        # The same tie-break as get_top_missed: earliest miss, then lowest id.
+        ranked = sorted(counts.items(), key=lambda kv: (-kv[1][0], kv[1][1], kv[1][2], kv[1][3]))
+        return tuple((key, entry[0]) for key, entry in ranked[:limit])
+    return _combined(paths, ("missed", limit, today), compute)
+
+def get_combined_analytics(paths, target_date: str) -> dict:
+    """get_analytics over several databases at once."""
+    import analytics
+    today = date.today()
+    def compute(query, schemas):
+        newest = get_combined_daily_totals(paths, newest_first=True)
+        total, completed = next(((t, c) for d, t, c in newest if d == target_date), (0, 0))
+        week = get_combined_daily_totals(paths, date.fromordinal(today.toordinal() - 6).isoformat(), today.isoformat())
+        return {
+            "daily_completion": analytics.daily_completion(total, completed),
+            "streak": analytics.streak_from_days(newest, today),
+            "perfect_streak": analytics.perfect_streak_from_days(newest, today),
+            "most_missed": analytics.most_missed_from_counts(_combined_top_missed(paths, today)),
+            "weekly_summary": analytics.weekly_summary_from_days(week, today),
+        }
+    return _combined(paths, ("analytics", target_date, today), compute)
+
+def get_combined_range_analytics(paths, start: str, end: str) -> dict:
+    """get_range_analytics over several databases at once."""
+    import analytics
+    return _combined(paths, ("range", start, end), lambda query, schemas: analytics.range_summary(
+        get_combined_daily_totals(paths, start, end), date.fromisoformat(start), date.fromisoformat(end)))
+
+@contextmanager
+def _goal_triggers_off(cursor):
+    """Drops the goals triggers for the enclosing transaction and recreates
+    them after; the caller brings daily_stats and goals_fts back in line."""
+    triggers = cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'goals'").fetchall()
+    for name, _ in triggers:
+        cursor.execute(f"DROP TRIGGER {name}")
+    yield
+    for _, sql in triggers:
+        cursor.execute(sql)
 
 def clear_all_data():
     """Wipes all data from the database."""
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
+    with transaction() as cursor, _goal_triggers_off(cursor):
+        # Without triggers SQLite truncates the table in one step instead of
+        # running them per row; the derived tables are emptied directly.
         cursor.execute("DELETE FROM goals")
+        cursor.execute("DELETE FROM daily_stats")
+        cursor.execute("DELETE FROM materialized_days")
+        cursor.execute("DELETE FROM templates")
+        cursor.execute("DELETE FROM titles")
+        cursor.execute("DELETE FROM archived_missed")
+        years = [y for y, in cursor.execute("SELECT year FROM archives")]
+        cursor.execute("DELETE FROM archives")
+        if _has_search_index():
+            cursor.execute("INSERT INTO goals_fts (goals_fts) VALUES ('delete-all')")
         # Reset the ID counter (optional, but cleaner)
-        cursor.execute("DELETE FROM sqlite_sequence WHERE name='goals'")
-        conn.commit()
\ No newline at end of file
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('goals', 'templates')")
+        # Other instances see one "reload" entry in the change log.
+        cursor.execute("INSERT INTO changes (goal_id, target_date) VALUES (0, '')")
+    # After the commit: a crash in between leaves files nothing points to,
+    # which archive_goals replaces, never a listed year without its file.
+    for year in years:
+        _remove_archive(year)
+    _forget_cache(wrote=True)
+
+# --- ARCHIVE ---
+# Goals older than a horizon (archive.py picks it) can move out of goals.db
+# into one database per year, e.g. goals-archive/2019.db next to goals.db,
+# so the goals table, its indexes and the search index only hold recent
+# goals. Nothing analytics read moves: daily_stats keeps counting archived
+# goals and archived_missed keeps their most-missed counts. prepare_day on an
+# archived day brings its goals back (until the next archive run), and
+# iter_goals, import dedupe, search (by plain text match: archives have no
+# search index), verify/rebuild and clear_all_data cover both.
+# SQLite doesn't commit across files atomically in WAL mode, so rows are
+# copied in one transaction and dropped in the next: a crash can leave a
+# goal in both places, never in neither, and a goal in both counts as hot.
+_ARCHIVE_TABLE = """
+    CREATE TABLE IF NOT EXISTS archive.goals (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        title_key TEXT NOT NULL,
+        target_date TEXT NOT NULL,
+        completed INTEGER NOT NULL,
+        template_id INTEGER
+    )
+"""
+
+# Most-missed counts of year's archived goals (those not back in goals),
+# with the date and id of each title's first miss (see _MISSED_SQL).
+_ARCHIVED_MISSED_SQL = f"""
+    INSERT INTO archived_missed
+    SELECT ?, title_key, COUNT(*), {_SPLIT_FIRST} FROM (
+        SELECT title_key, {_FIRST_MISS} AS f FROM archive.goals a
+        WHERE completed = 0 AND NOT EXISTS (SELECT 1 FROM main.goals g WHERE g.id = a.id)
+    ) GROUP BY title_key
+"""
+
+def archive_path(year: int) -> str:
+    """The archive database for year's goals, next to the current store's file."""
+    base = os.path.splitext(current_store().path)[0]
+    return os.path.join(f"{base}-archive", f"{year}.db")
+
+def archived_years() -> list:
+    return [y for y, in _query("SELECT year FROM archives ORDER BY year")]
+
+@contextmanager
+def _archive(year):
+    """This thread's connection with year's archive attached as "archive".
+    ATTACH can't run inside a transaction, so neither can this."""
+    path = archive_path(year)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = get_connection()
+    conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    try:
+        conn.execute(_ARCHIVE_TABLE)
+        conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_goals_date ON goals (target_date)")
+        yield conn
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+def _remove_archive(year):
+    path = archive_path(year)
+    for suffix in ("", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    try:
+        os.rmdir(os.path.dirname(path))
+    except OSError:
+        pass  # other years are still in it
+
+def archive_goals(before: str) -> int:
+    """Moves the goals dated before `before` into their year's archive;
+    returns how many left goals.db. search_goals still finds them, by plain
+    text match (no typo correction there)."""
+    listed = set(archived_years())
+    years = [int(y) for y, in _query("SELECT DISTINCT substr(date, 1, 4) FROM daily_stats WHERE date < ?", (before,))]
+    moved = 0
+    for year in years:
+        start, end = f"{year:04d}-01-01", min(before, f"{year + 1:04d}-01-01")
+        if not _query("SELECT 1 FROM goals WHERE target_date >= ? AND target_date < ? LIMIT 1", (start, end)):
+            continue
+        if year not in listed:
+            _remove_archive(year)  # left behind by a clear_all_data that crashed
+        with _archive(year):
+            with transaction() as cursor:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO archive.goals
+                    SELECT id, title, title_key, target_date, completed, template_id FROM main.goals
+                    WHERE target_date >= ? AND target_date < ?
+                """, (start, end))
+            # Only goals the archive now holds as they are: one changed in
+            # between stays until the next run. Bulk path like clear_all_data:
+            # daily_stats already counts these goals wherever they live.
+            copied = """
+                FROM main.goals g WHERE target_date >= ?1 AND target_date < ?2 AND EXISTS (
+                    SELECT 1 FROM archive.goals a WHERE a.id = g.id AND a.title = g.title
+                    AND a.target_date = g.target_date AND a.completed = g.completed)
+            """
+            with transaction() as cursor, _goal_triggers_off(cursor):
+                if _has_search_index():
+                    cursor.execute(f"INSERT INTO goals_fts (goals_fts, rowid, title) SELECT 'delete', id, title {copied}",
+                                   (start, end))
+                cursor.execute(f"DELETE FROM main.goals WHERE id IN (SELECT id {copied})", (start, end))
+                moved += cursor.rowcount
+                cursor.execute("DELETE FROM archived_missed WHERE year = ?", (year,))
+                cursor.execute(_ARCHIVED_MISSED_SQL, (year,))
+                cursor.execute("INSERT OR IGNORE INTO archives VALUES (?)", (year,))
+    if moved:
+        _forget_cache(wrote=True)
+    return moved
+
+def _thaw(target_date):
+    """Brings target_date's archived goals back into goals.db so the day can
+    be shown and edited; the next archive run moves them out again."""
+    behind, = _query("""
+        SELECT IFNULL((SELECT total FROM daily_stats WHERE date = ?1), 0) > (SELECT COUNT(*) FROM goals WHERE target_date = ?1)
+               AND EXISTS (SELECT 1 FROM archives WHERE year = ?2)
+    """, (target_date, int(target_date[:4])))
+    if not behind[0]:
+        return 0
+    back = "FROM archive.goals a WHERE target_date = ? AND NOT EXISTS (SELECT 1 FROM main.goals g WHERE g.id = a.id)"
+    year = int(target_date[:4])
+    with _archive(year):
+        with transaction() as cursor:
+            total, completed = cursor.execute(f"SELECT COUNT(*), IFNULL(SUM(completed = 1), 0) {back}",
+                                              (target_date,)).fetchone()
+            # The triggers index them for search and add them to daily_stats,
+            # which counted them all along, so take them off again.
+            cursor.execute(f"INSERT INTO main.goals (id, title, title_key, target_date, completed, template_id) "
+                           f"SELECT id, title, title_key, target_date, completed, template_id {back}", (target_date,))
+            cursor.execute("UPDATE daily_stats SET total = total - ?, completed = completed - ? WHERE date = ?",
+                           (total, completed, target_date))
+            cursor.execute("DELETE FROM archived_missed WHERE year = ?", (year,))
+            cursor.execute(_ARCHIVED_MISSED_SQL, (year,))
+        with transaction() as cursor:
+            cursor.execute("DELETE FROM archive.goals WHERE target_date = ? AND id IN "
+                           "(SELECT id FROM main.goals WHERE target_date = ?)", (target_date, target_date))
+    _touch(target_date)
+    return total
+
+def _open_archive(year):
+    """A connection to year's archive file, or None if the file is gone
+    (connecting would create an empty one)."""
+    path = archive_path(year)
+    if not os.path.exists(path):
+        return None
+    return sqlite3.connect(path)
+
+def _archived_pairs(rows):
+    """(title, target_date) of the given goal rows that an archive already holds."""
+    years = set(archived_years())
+    dates = {}
+    for row in rows:
+        year = int(row[2][:4])
+        if year in years:
+            dates.setdefault(year, set()).add(row[2])
+    found = set()
+    for year, wanted in dates.items():
+        conn, wanted = _open_archive(year), list(wanted)
+        if conn is None:
+            continue
+        try:
+            for i in range(0, len(wanted), 500):
+                chunk = wanted[i:i + 500]
+                found.update(conn.execute(f"SELECT title, target_date FROM goals WHERE target_date IN "
+                                          f"({','.join('?' * len(chunk))})", chunk))
+        finally:
+            conn.close()
+    return found
+
+def _archived_days():
+    """(date, total, completed) per day over the archived goals not back in goals."""
+    days = []
+    for year in archived_years():
+        with _archive(year) as conn:
+            days += conn.execute("""
+                SELECT target_date, COUNT(*), SUM(completed = 1) FROM archive.goals a
+                WHERE NOT EXISTS (SELECT 1 FROM main.goals g WHERE g.id = a.id) GROUP BY target_date
+            """).fetchall()
+    return days
+
+# Scheduled upkeep, run by archive.py when due.
+def maintenance_log() -> dict:
+    """{task: ISO date it last ran}."""
+    return dict(_query("SELECT task, last_run FROM maintenance"))
+
+def log_maintenance(task: str, day: str):
+    with transaction() as cursor:
+        cursor.execute("INSERT INTO maintenance VALUES (?, ?) ON CONFLICT (task) DO UPDATE SET last_run = excluded.last_run",
+                       (task, day))
+
+def analyze():
+    """Refreshes the statistics the query planner picks indexes with."""
+    get_connection().execute("ANALYZE")
+
+def free_fraction() -> float:
+    """Share of goals.db made of free pages, which only VACUUM gives back."""
+    (pages,), = _query("PRAGMA page_count")
+    (free,), = _query("PRAGMA freelist_count")
+    return free / pages if pages else 0.0
+
+def vacuum():
+    """Rewrites goals.db without its free pages and shrinks the file to match."""
+    conn = get_connection()
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+# --- ROLLUP MAINTENANCE ---
+def verify_daily_stats():
+    """Compares daily_stats with the goals table and the archive; returns
+    (date, expected, stored) mismatches."""
+    expected = {d: (t, c) for d, t, c in _query(_DAILY_STATS_SQL)}
+    for d, t, c in _archived_days():
+        total, completed = expected.get(d, (0, 0))
+        expected[d] = (total + t, completed + c)
+    stored = {d: (t, c) for d, t, c in _query("SELECT date, total, completed FROM daily_stats")}
+    return [(d, expected.get(d), stored.get(d)) for d in sorted(expected.keys() | stored.keys())
+            if expected.get(d) != stored.get(d)]
+
+def rebuild_daily_stats():
+    archived = _archived_days()
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM daily_stats")
+        cursor.execute("INSERT INTO daily_stats " + _DAILY_STATS_SQL)
+        cursor.executemany("INSERT INTO daily_stats VALUES (?, ?, ?) ON CONFLICT (date) DO UPDATE SET "
+                           "total = total + excluded.total, completed = completed + excluded.completed", archived)
+        # No goal changed, but totals may have: other processes start over too.
+        cursor.execute("INSERT INTO changes (goal_id, target_date) VALUES (0, '')")
+    _forget_cache(wrote=True)
\ No newline at end of file
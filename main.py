@@ -1,9 +1,21 @@
+import os
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog, simpledialog
 from datetime import date, datetime
-import winsound
+try:
+    import winsound
+except ImportError:  # non-Windows (e.g. headless benchmarks): sounds are skipped
+    winsound = None
 import database as db
 import analytics
+import archive
+import perf
+import profiles
+import service
+import transfer
+
+perf.register(db, analytics)
 
 # --- THEME ---
 C_BG_MAIN     = "#0B1120"
@@ -18,6 +30,18 @@ C_SUCCESS     = "#4ade80"
 
 # --- GLOBAL SETTINGS ---
 SOUND_ON = True
+ANIMATIONS_ON = True
+
+# Pages without a sidebar entry, and the entry they highlight instead.
+# Diagnostics is opened with Ctrl+Shift+D.
+NAV_PARENT = {"Diagnostics": "Settings"}
+
+SEARCH_DEBOUNCE_MS = 150
+SYNC_MS = 1000  # how often to look for goals changed by another window, cli.py or server.py
+SEARCH_PAGE = 50
+
+# Analytics chart ranges: label -> (days back from today, bar per day/week/month)
+CHART_RANGES = {"7D": (7, "days"), "30D": (30, "days"), "90D": (90, "weeks"), "1Y": (365, "months")}
 
 def get_font(size, weight="normal", family="Segoe UI"):
     return (family, size, weight)
@@ -33,7 +57,54 @@ def play_success():
         try: winsound.Beep(1200, 100)
         except: pass
 
+# --- ANIMATION ---
+class FrameScheduler:
+    """One root.after loop shared by every animation. It only ticks while an
+    animation is running, so an idle window schedules no frames at all."""
+    FRAME_MS = 16
+
+    def __init__(self, root):
+        self.root = root
+        self.tweens = {}   # key -> (start time, duration, fn)
+        self.job = None
+        self.frames = 0
+
+    def animate(self, key, duration, fn):
+        """Calls fn(progress) every frame for duration seconds, progress easing
+        from 0 to 1. Starting another animation with the same key replaces it."""
+        if not ANIMATIONS_ON or duration <= 0:
+            self.tweens.pop(key, None)
+            fn(1.0)
+            return
+        self.tweens[key] = (time.perf_counter(), duration, fn)
+        if self.job is None:
+            self.job = self.root.after(self.FRAME_MS, self._frame)
+
+    def _frame(self):
+        self.job = None
+        self.frames += 1
+        now = time.perf_counter()
+        for key, tween in list(self.tweens.items()):
+            start, duration, fn = tween
+            t = min(1.0, (now - start) / duration)
+            fn(1 - (1 - t) ** 3)  # ease-out cubic
+            if t >= 1.0 and self.tweens.get(key) is tween:
+                del self.tweens[key]
+        if self.tweens:
+            self.job = self.root.after(self.FRAME_MS, self._frame)
+
+    def finish(self):
+        """Jumps every running animation to its end state."""
+        while self.tweens:
+            key, (_, _, fn) = self.tweens.popitem()
+            fn(1.0)
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+
 # --- CUSTOM WIDGETS ---
+# Canvas widgets keep a retained scene: their items are created once and later
+# updates only move or restyle them (coords / itemconfig).
 class RoundedButton(tk.Canvas):
     def __init__(self, parent, width, height, corner_radius, color, text, command, text_color="#0f172a"):
         super().__init__(parent, width=width, height=height, bg=C_BG_MAIN, highlightthickness=0)
@@ -42,83 +113,364 @@ class RoundedButton(tk.Canvas):
         self.text = text
         self.text_color = text_color
         self.radius = corner_radius
+        self.shapes = [self.create_oval(0, 0, 0, 0) for _ in range(4)] + [self.create_rectangle(0, 0, 0, 0) for _ in range(2)]
+        self.label = self.create_text(0, 0, font=get_font(11, "bold"))
         self.bind("<Button-1>", self._on_click)
         self.render()
 
     def render(self):
-        self.delete("all")
         r = self.radius
         w, h = int(self["width"]), int(self["height"])
-        self.create_oval(0, 0, r*2, r*2, fill=self.color, outline=self.color)
-        self.create_oval(w-r*2, 0, w, r*2, fill=self.color, outline=self.color)
-        self.create_oval(0, h-r*2, r*2, h, fill=self.color, outline=self.color)
-        self.create_oval(w-r*2, h-r*2, w, h, fill=self.color, outline=self.color)
-        self.create_rectangle(r, 0, w-r, h, fill=self.color, outline=self.color)
-        self.create_rectangle(0, r, w, h-r, fill=self.color, outline=self.color)
-        self.create_text(w/2, h/2, text=self.text, fill=self.text_color, font=get_font(11, "bold"))
+        boxes = [(0, 0, r*2, r*2), (w-r*2, 0, w, r*2), (0, h-r*2, r*2, h), (w-r*2, h-r*2, w, h),
+                 (r, 0, w-r, h), (0, r, w, h-r)]
+        for item, box in zip(self.shapes, boxes):
+            self.coords(item, *box)
+            self.itemconfig(item, fill=self.color, outline=self.color)
+        self.coords(self.label, w/2, h/2)
+        self.itemconfig(self.label, text=self.text, fill=self.text_color)
 
     def _on_click(self, e):
         play_click()
         self.command()
 
 class CircularProgress(tk.Canvas):
-    def __init__(self, parent, size=140, width=12, bg_color=C_CARD):
+    def __init__(self, parent, size=140, width=12, bg_color=C_CARD, animator=None):
         super().__init__(parent, width=size, height=size, bg=bg_color, highlightthickness=0)
         self.size = size
         self.width = width
-        self.percentage = 0
+        self.animator = animator
+        self.percentage = 0   # target value
+        self.shown = None     # value currently drawn
+        w = h = size
+        pad = width
+        self.create_oval(pad, pad, w-pad, h-pad, outline="#334155", width=width)
+        self.arc = self.create_arc(pad, pad, w-pad, h-pad, start=90, extent=0, style="arc", width=width, state="hidden")
+        self.pct_text = self.create_text(w/2, h/2 - 10, text="0%", fill=C_TEXT_MAIN, font=get_font(22, "bold"))
+        self.create_text(w/2, h/2 + 15, text="TODAY", fill=C_TEXT_SUB, font=get_font(9, "bold"))
         self.render()
 
     def set_progress(self, val):
-        self.percentage = val
-        self.render()
+        start, self.percentage = (self.shown or 0), val
+        if self.animator is None:
+            self.render()
+        else:
+            self.animator.animate(self, 0.45, lambda t: self.render(start + (val - start) * t))
 
-    def render(self):
-        self.delete("all")
-        w, h = self.size, self.size
-        pad = self.width
-        self.create_oval(pad, pad, w-pad, h-pad, outline="#334155", width=self.width)
-        if self.percentage > 0:
-            start = 90
-            extent = -360 * (self.percentage / 100)
-            col = C_SUCCESS if self.percentage == 100 else C_ACCENT
-            self.create_arc(pad, pad, w-pad, h-pad, start=start, extent=extent, style="arc", outline=col, width=self.width)
-        self.create_text(w/2, h/2 - 10, text=f"{int(self.percentage)}%", fill=C_TEXT_MAIN, font=get_font(22, "bold"))
-        self.create_text(w/2, h/2 + 15, text="TODAY", fill=C_TEXT_SUB, font=get_font(9, "bold"))
+    def render(self, value=None):
+        value = self.percentage if value is None else value
+        if value == self.shown:
+            return
+        self.shown = value
+        if value > 0:
+            # Colour follows the target, so the ring only turns green once it lands on 100.
+            col = C_SUCCESS if self.percentage == 100 and value == 100 else C_ACCENT
+            self.itemconfig(self.arc, extent=-360 * (value / 100), outline=col, state="normal")
+        else:
+            self.itemconfig(self.arc, state="hidden")
+        self.itemconfig(self.pct_text, text=f"{int(round(value))}%")
+
+class BarChart(tk.Canvas):
+    """Completion bars with labels. One track, bar and label item per slot,
+    reused across refreshes; slots beyond the current series are hidden."""
+    BAR_H = 120
+
+    def __init__(self, parent, bg_color=C_CARD, animator=None, **kw):
+        super().__init__(parent, bg=bg_color, highlightthickness=0, **kw)
+        self.animator = animator
+        self.slots = []    # (track, bar, label)
+        self.heights = []  # bar height per slot, as last animated
+        self.drawn = []    # (x, height) last sent to Tk per slot
+        self.bar_x = []
+
+    def set_series(self, series, labels):
+        """series: percent per bar; labels: text per bar ('' for none)."""
+        width = max(self.winfo_width(), 560)
+        slot = min(80, (width - 20) / max(len(series), 1))
+        bar_w = slot * 0.625
+        while len(self.slots) < len(series):
+            self.slots.append((self.create_rectangle(0, 0, 0, 0, fill="#334155", outline=""),
+                               self.create_rectangle(0, 0, 0, 0, outline="", state="hidden"),
+                               self.create_text(0, 0, fill=C_TEXT_SUB, font=get_font(9))))
+            self.heights.append(0.0)
+            self.drawn.append(None)
+        for i, (track, bar, label) in enumerate(self.slots):
+            if i >= len(series):
+                for item in (track, bar, label): self.itemconfig(item, state="hidden")
+                self.heights[i], self.drawn[i] = 0.0, None
+                continue
+            x = 20 + i * slot
+            self.coords(track, x, 0, x+bar_w, self.BAR_H)
+            self.coords(label, x+bar_w/2, 135)
+            self.itemconfig(track, state="normal")
+            self.itemconfig(label, text=labels[i], state="normal")
+            self.itemconfig(bar, fill=C_SUCCESS if series[i] == 100 else C_ACCENT)
+        self.bar_x = [(20 + i * slot, 20 + i * slot + bar_w) for i in range(len(series))]
+
+        start = self.heights[:len(series)]
+        target = [(pct / 100) * self.BAR_H for pct in series]
+        if self.animator is None:
+            self._draw_bars(target)
+        else:
+            self.animator.animate(self, 0.35, lambda t: self._draw_bars([a + (b - a) * t for a, b in zip(start, target)]))
+
+    def _draw_bars(self, heights):
+        for i, h in enumerate(heights):
+            self.heights[i] = h
+            x0, x1 = self.bar_x[i]
+            h = round(h, 1)
+            if self.drawn[i] == (x0, h):
+                continue  # nothing moved: no Tk call
+            bar = self.slots[i][1]
+            if h > 0:
+                self.coords(bar, x0, self.BAR_H - h, x1, self.BAR_H)
+                self.itemconfig(bar, state="normal")
+            else:
+                self.itemconfig(bar, state="hidden")
+            self.drawn[i] = (x0, h)
 
 class GoalCard(tk.Frame):
-    def __init__(self, parent, goal_data, on_toggle, on_delete):
+    def __init__(self, parent, goal, on_toggle, on_delete):
         super().__init__(parent, bg=C_BG_MAIN, pady=6)
-        self.g_id, self.title, _, self.completed = goal_data
+        self.g_id, self.title, self.completed = goal.id, goal.title, goal.completed
         self.on_toggle = on_toggle
         self.surface = tk.Frame(self, bg=C_CARD, padx=15, pady=15)
         self.surface.pack(fill="x", expand=True)
         
-        # Checkbox
+        # Checkbox (items are created once and restyled by set_completed)
         self.chk = tk.Canvas(self.surface, width=26, height=26, bg=C_CARD, highlightthickness=0)
         self.chk.pack(side="left", padx=(0, 15))
-        col = C_SUCCESS if self.completed else "#475569"
-        self.chk.create_oval(2,2, 24,24, outline=col, width=2, fill=col if self.completed else "")
-        if self.completed: self.chk.create_line(8,13, 12,17, 18,9, fill=C_BG_MAIN, width=3, smooth=True)
+        self.chk_ring = self.chk.create_oval(2,2, 24,24, width=2)
+        self.chk_tick = self.chk.create_line(8,13, 12,17, 18,9, fill=C_BG_MAIN, width=3, smooth=True)
         
         # Label
-        fg = "#64748b" if self.completed else C_TEXT_MAIN
-        font = get_font(12, "overstrike" if self.completed else "normal")
-        lbl = tk.Label(self.surface, text=self.title, font=font, bg=C_CARD, fg=fg, anchor="w")
-        lbl.pack(side="left", fill="x", expand=True)
+        self.lbl = tk.Label(self.surface, text=self.title, bg=C_CARD, anchor="w")
+        self.lbl.pack(side="left", fill="x", expand=True)
+        self.set_completed(self.completed)
         
         # Delete
         btn_del = tk.Label(self.surface, text="×", font=("Arial", 18), bg=C_CARD, fg=C_CARD, cursor="hand2")
         btn_del.pack(side="right")
+
+        # Date (only shown in search results, which span many days)
+        self.date_lbl = tk.Label(self.surface, text="", font=get_font(9), bg=C_CARD, fg=C_TEXT_SUB)
+        self.date_lbl.pack(side="right", padx=(0, 10))
         btn_del.bind("<Button-1>", lambda e: on_delete(self.g_id))
         btn_del.bind("<Enter>", lambda e: btn_del.config(fg=C_DANGER))
         btn_del.bind("<Leave>", lambda e: btn_del.config(fg=C_CARD))
 
-        for w in [self.surface, lbl, self.chk]:
+        for w in [self.surface, self.lbl, self.chk]:
             w.bind("<Button-1>", lambda e: self.on_toggle(self.g_id, self.completed))
             w.bind("<Enter>", lambda e: self.surface.config(bg=C_CARD_HOVER))
             w.bind("<Leave>", lambda e: self.surface.config(bg=C_CARD))
 
+    def set_completed(self, completed):
+        self.completed = completed
+        col = C_SUCCESS if completed else "#475569"
+        self.chk.itemconfig(self.chk_ring, outline=col, fill=col if completed else "")
+        self.chk.itemconfig(self.chk_tick, state="normal" if completed else "hidden")
+        self.lbl.config(fg="#64748b" if completed else C_TEXT_MAIN,
+                        font=get_font(12, "overstrike" if completed else "normal"))
+
+    def set_title(self, title):
+        if title != self.title:
+            self.title = title
+            self.lbl.config(text=title)
+
+    def show(self, goal, show_date=False):
+        """Rebinds a recycled card to another goal."""
+        self.g_id = goal.id
+        self.set_title(goal.title)
+        if goal.completed != self.completed: self.set_completed(goal.completed)
+        date_text = goal.target_date if show_date else ""
+        if self.date_lbl["text"] != date_text: self.date_lbl.config(text=date_text)
+
+class VirtualGoalList(tk.Frame):
+    """Scrolling goal list that keeps only enough GoalCards alive to fill the
+    viewport and rebinds them to goals as the view moves."""
+    ROW_H = 82        # card height incl. the 10px gap below it
+    ROW_W = 800
+
+    def __init__(self, parent, on_toggle, on_delete):
+        super().__init__(parent, bg=C_BG_MAIN)
+        self.on_toggle, self.on_delete = on_toggle, on_delete
+        self.canvas = tk.Canvas(self, bg=C_BG_MAIN, highlightthickness=0, yscrollincrement=self.ROW_H // 4)
+        self.scroll = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_view_change)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scroll.pack(side="right", fill="y")
+        self.canvas.bind("<Configure>", lambda e: self.layout())
+
+        self.goals = []    # Goals in display order
+        self.index = {}    # goal id -> position in self.goals
+        self.pool = []     # recycled (GoalCard, canvas window item)
+        self.height = None # scrollregion height, only reset when it changes
+        self.show_dates = False
+        self.on_near_end = None  # called when the view gets close to the last row, e.g. to load another page
+        self.empty = self.canvas.create_text(self.ROW_W / 2, 60, text="No goals for today.", font=get_font(14), fill=C_TEXT_SUB)
+
+    # --- data ---
+    def set_goals(self, goals):
+        self.goals = list(goals)
+        self._reindex()
+        self.layout()
+
+    def set_mode(self, show_dates, empty_text):
+        self.show_dates = show_dates
+        self.canvas.itemconfig(self.empty, text=empty_text)
+
+    def extend(self, goals):
+        for goal in goals:
+            self.index[goal.id] = len(self.goals)
+            self.goals.append(goal)
+        self.layout()
+
+    def append(self, goal):
+        self.index[goal.id] = len(self.goals)
+        self.goals.append(goal)
+        self.layout()
+
+    def remove(self, gid):
+        pos = self.index.pop(gid, None)
+        if pos is None: return
+        del self.goals[pos]
+        self._reindex()
+        self.layout()
+
+    def upsert(self, goal):
+        """Shows goal in place of the listed one with its id, or at the end."""
+        pos = self.index.get(goal.id)
+        if pos is None:
+            self.append(goal)
+            return
+        self.goals[pos] = goal
+        self.layout()
+
+    def replace_id(self, old, new):
+        """Swaps a placeholder id for the real one once the insert has landed."""
+        pos = self.index.pop(old, None)
+        if pos is None: return
+        self.goals[pos].id = new
+        self.index[new] = pos
+        for card, _ in self.pool:
+            if card.g_id == old: card.g_id = new
+
+    def set_completed(self, gid, completed):
+        pos = self.index.get(gid)
+        if pos is None: return
+        self.goals[pos].completed = completed
+        for card, _ in self.pool:
+            if card.g_id == gid: card.set_completed(completed)
+
+    def _reindex(self):
+        self.index = {g.id: i for i, g in enumerate(self.goals)}
+
+    # --- view ---
+    def _on_view_change(self, lo, hi):
+        self.scroll.set(lo, hi)
+        self.layout()
+
+    @perf.timed("ui.list_layout")
+    def layout(self):
+        n = len(self.goals)
+        if self.height != n * self.ROW_H:
+            self.height = n * self.ROW_H
+            self.canvas.configure(scrollregion=(0, 0, self.ROW_W, max(self.height, 1)))
+            self.canvas.itemconfig(self.empty, state="hidden" if n else "normal")
+
+        first = max(0, int(self.canvas.canvasy(0)) // self.ROW_H)
+        visible = min(n, self.canvas.winfo_height() // self.ROW_H + 2)
+        while len(self.pool) < visible:
+            card = GoalCard(self.canvas, self.goals[0], self.on_toggle, self.on_delete)
+            item = self.canvas.create_window(0, 0, window=card, anchor="nw", width=self.ROW_W, height=self.ROW_H - 10)
+            self.pool.append((card, item))
+
+        for k, (card, item) in enumerate(self.pool):
+            i = first + k
+            if i < n:
+                card.show(self.goals[i], self.show_dates)
+                self.canvas.coords(item, 0, i * self.ROW_H)
+                self.canvas.itemconfig(item, state="normal")
+            else:
+                self.canvas.itemconfig(item, state="hidden")
+        if self.on_near_end and n and first + visible >= n - 5:
+            self.on_near_end()
+
+class Heatmap(tk.Canvas):
+    """A year of days as a week-column grid. Each day is one rectangle, created
+    once; refreshes only recolor the cells whose level changed."""
+    CELL, GAP, WEEKS, TOP = 12, 3, 53, 16
+    COLORS = ("#243044", "#0c4a6e", "#0369a1", "#0ea5e9", C_SUCCESS)  # no goals .. 100% done
+
+    def __init__(self, parent, bg_color=C_CARD, on_hover=None):
+        step = self.CELL + self.GAP
+        super().__init__(parent, width=self.WEEKS * step, height=self.TOP + 7 * step, bg=bg_color, highlightthickness=0)
+        self.on_hover = on_hover
+        self.first = None
+        self.days = {}     # cell index -> (date, total, completed)
+        self.levels = []   # cell index -> current color index, -1 when hidden
+        self.cells = []
+        for week in range(self.WEEKS):
+            for weekday in range(7):
+                x, y = week * step, self.TOP + weekday * step
+                self.cells.append(self.create_rectangle(x, y, x + self.CELL, y + self.CELL, fill=self.COLORS[0],
+                                                        width=0, tags="cell"))
+                self.levels.append(0)
+        self.cell_index = {item: i for i, item in enumerate(self.cells)}
+        self.month_labels = [self.create_text(0, 0, anchor="nw", text="", fill=C_TEXT_SUB, font=get_font(8))
+                             for _ in range(13)]
+        self.tag_bind("cell", "<Enter>", self._hover)
+        self.tag_bind("cell", "<Leave>", lambda e: self.on_hover and self.on_hover(""))
+
+    @classmethod
+    def first_day(cls, today):
+        """Monday of the leftmost column when today is in the rightmost one."""
+        return date.fromordinal(today.toordinal() - today.weekday() - (cls.WEEKS - 1) * 7)
+
+    @classmethod
+    def level(cls, total, completed):
+        if not total: return 0
+        if completed == total: return 4
+        return 1 + min(2, 3 * completed // total)
+
+    @perf.timed("ui.heatmap")
+    def set_days(self, days, today):
+        """days: analytics.range_summary()["days"] from first_day(today) to today."""
+        first = self.first_day(today)
+        by_date = {d: (t, c) for d, t, c, _ in days}
+        self.days = {}
+        for i, item in enumerate(self.cells):
+            d = date.fromordinal(first.toordinal() + i)
+            if d > today:
+                level = -1
+            else:
+                total, completed = by_date.get(d.isoformat(), (0, 0))
+                self.days[i] = (d.isoformat(), total, completed)
+                level = self.level(total, completed)
+            if level != self.levels[i]:
+                if level < 0: self.itemconfig(item, state="hidden")
+                else: self.itemconfig(item, fill=self.COLORS[level], state="normal")
+                self.levels[i] = level
+
+        if first != self.first:
+            self.first = first
+            step = self.CELL + self.GAP
+            labels = iter(self.month_labels)
+            for week in range(self.WEEKS):
+                monday = date.fromordinal(first.toordinal() + week * 7)
+                if monday.day <= 7 and week < self.WEEKS - 1:  # first Monday of a month
+                    label = next(labels, None)
+                    if label is None: break
+                    self.coords(label, week * step, 0)
+                    self.itemconfig(label, text=monday.strftime("%b"))
+            for label in labels:
+                self.itemconfig(label, text="")
+
+    def _hover(self, e):
+        i = self.cell_index.get(self.find_withtag("current")[0])
+        if self.on_hover and i in self.days:
+            d, total, completed = self.days[i]
+            self.on_hover(f"{d}   {completed}/{total} done" if total else f"{d}   no goals")
+
 class UltraApp:
     def __init__(self, root):
         self.root = root
@@ -130,13 +482,78 @@ class UltraApp:
         except:
             pass     # Ignores error if app.ico file is missing
         
+        self.profile = profiles.use_active()
         db.init_db()
         self.current_date = date.today().isoformat()
+        self.service = service.Service(root)
+        self.transfer_progress = None
+        self.closing = False
+        self.shown_stats = None
+        self.animator = FrameScheduler(root)
+        self.chart_range = "7D"
+        self.search_text, self.search_job = "", None
+        self.search_loading = self.search_done = False
+        self.repeat = None  # (every, weekdays) while the next goal should recur
+        self.all_profiles = False  # Analytics scope: this profile or every profile combined
+        self.writes = service.WriteBehind(self.service, on_inserted=self.on_goal_inserted, on_error=self.on_write_failed)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind_all("<Control-Shift-D>", lambda e: self.show_page("Diagnostics"))
+        self.diag_job = None
+        self.current_page = None
+        self.seen_seq = db.get_changes()[0]  # newest change-log number applied (see poll_changes)
+        perf.enable_from_env()
         
         self.nav_buttons = {}
         self.setup_styles()
         self.build_layout()
         self.show_page("Dashboard")
+        self.tidy_up()
+        self.poll_changes()
+
+    def tidy_up(self):
+        """Archives old goals / refreshes statistics / vacuums when due, behind
+        the first page. Failures stay quiet: the next start tries again."""
+        self.service.write(archive.maintain, on_error=lambda exc: None)
+
+    # --- LIVE SYNC ---
+    # Other processes writing the same profile (a second window, cli.py,
+    # server.py) show up within SYNC_MS: only the goals they changed are read
+    # and patched into the page; our own writes are left out by get_changes.
+    def poll_changes(self):
+        if self.closing: return
+        self.root.after(SYNC_MS, self.poll_changes)
+        profile = self.profile
+        self.service.read(db.get_changes, self.seen_seq, key="sync", on_error=lambda exc: None,
+                          on_done=lambda result: self.apply_changes(profile, result))
+
+    def apply_changes(self, profile, result):
+        seq, changed = result
+        if profile != self.profile:
+            return
+        self.seen_seq = seq
+        if changed == {}:
+            return
+        if self.current_page == "Analytics":
+            self.refresh_analytics()
+        elif self.current_page != "Dashboard":
+            return
+        elif changed is None:
+            self.refresh_dashboard()
+        else:
+            for gid, goal in changed.items():
+                if gid in self.writes.deletes:
+                    continue  # our queued delete lands after theirs
+                if goal is not None and gid in self.writes.statuses:
+                    goal.completed = self.writes.statuses[gid]
+                if self.search_text:
+                    # Results stay as searched; listed goals follow their edits.
+                    if gid not in self.goal_list.index: continue
+                    if goal is None: self.goal_list.remove(gid)
+                    else: self.goal_list.upsert(goal)
+                elif goal is not None and goal.target_date == self.current_date:
+                    self.goal_list.upsert(goal)
+                else:
+                    self.goal_list.remove(gid)
 
     def setup_styles(self):
         style = ttk.Style()
@@ -152,6 +569,16 @@ class UltraApp:
 
         tk.Label(self.sidebar, text="FOCUS", font=get_font(22, "bold"), bg=C_BG_SIDE, fg=C_TEXT_MAIN).pack(padx=30, pady=(50,5), anchor="w")
 
+        # Profile switcher: each profile is its own goals database.
+        self.profile_btn = tk.Menubutton(self.sidebar, font=get_font(10, "bold"), bg=C_BG_SIDE, fg=C_ACCENT, anchor="w",
+                                         activebackground=C_BG_SIDE, activeforeground=C_TEXT_MAIN, relief="flat",
+                                         cursor="hand2")
+        self.profile_menu = tk.Menu(self.profile_btn, tearoff=0, bg=C_CARD, fg=C_TEXT_MAIN, activebackground=C_ACCENT,
+                                    activeforeground="#0f172a", postcommand=self.fill_profile_menu)
+        self.profile_btn.config(menu=self.profile_menu)
+        self.profile_btn.pack(padx=24, pady=(0, 25), anchor="w")
+        self.show_profile_name()
+
         self.create_nav_item("Dashboard")
         self.create_nav_item("Analytics")
         self.create_nav_item("Settings")
@@ -160,13 +587,93 @@ class UltraApp:
         self.main_container.pack(side="right", fill="both", expand=True)
 
         self.frames = {}
-        for PageName in ["Dashboard", "Analytics", "Settings"]:
+        for PageName in ["Dashboard", "Analytics", "Settings", "Diagnostics"]:
             frame = tk.Frame(self.main_container, bg=C_BG_MAIN)
             self.frames[PageName] = frame
 
-        self.build_dashboard(self.frames["Dashboard"])
-        self.build_analytics(self.frames["Analytics"])
-        self.build_settings(self.frames["Settings"])
+        # Only the dashboard is needed for the first paint; the other pages
+        # are built the first time they are shown.
+        self.page_builders = {"Dashboard": self.build_dashboard, "Analytics": self.build_analytics, "Settings": self.build_settings,
+                              "Diagnostics": self.build_diagnostics}
+        self.built_pages = set()
+        self.ensure_page("Dashboard")
+
+    # --- PROFILES ---
+    def show_profile_name(self):
+        name = self.profile if len(self.profile) <= 22 else self.profile[:21] + "…"
+        self.profile_btn.config(text=f"● {name} ▾")
+
+    def fill_profile_menu(self):
+        menu = self.profile_menu
+        menu.delete(0, "end")
+        for name in profiles.names():
+            menu.add_command(label=("✓ " if name == self.profile else "   ") + name,
+                             command=lambda n=name: self.switch_profile(n))
+        menu.add_separator()
+        menu.add_command(label="New profile…", command=self.new_profile)
+        menu.add_command(label="Open database file…", command=self.open_profile_file)
+        if self.profile != profiles.DEFAULT:
+            menu.add_command(label=f"Remove \"{self.profile}\" from list", command=self.remove_profile)
+
+    def switch_profile(self, name):
+        if name == self.profile:
+            return
+        # Queued changes belong to the old profile: hand them over first
+        # (service jobs keep the store they were submitted with). Opening and
+        # upgrading the new file runs on the writer too; the UI moves over
+        # once it is ready.
+        self.writes.flush()
+        def prepare():
+            target = profiles.prepare(name)
+            with db.get_store(target).use():
+                return target, db.get_changes()[0]
+        self.service.write(prepare, on_done=lambda result: self.on_profile_ready(name, *result),
+                           on_error=lambda exc: messagebox.showerror("Profiles", f"Could not open {name}:\n{exc}"))
+
+    def on_profile_ready(self, name, target, seq):
+        db.DB_NAME = target
+        self.profile = name
+        self.show_profile_name()
+        self.shown_stats = None
+        self.seen_seq = seq
+        if self.search_text:
+            self.search_entry.delete(0, tk.END)
+            self.search_text = ""
+            self.goal_list.set_mode(False, "No goals for today.")
+        play_click()
+        self.show_page(self.current_page or "Dashboard")
+        self.tidy_up()
+
+    def new_profile(self):
+        name = simpledialog.askstring("New profile", "Name (e.g. Work):", parent=self.root)
+        if not name or not name.strip(): return
+        self.service.write(profiles.add, name, on_done=lambda _: self.switch_profile(name.strip()),
+                           on_error=self.on_profile_failed)
+
+    def open_profile_file(self):
+        path = filedialog.askopenfilename(title="Open a goals database", filetypes=[("SQLite database", "*.db"), ("All files", "*")])
+        if not path: return
+        name = simpledialog.askstring("Open database", "Profile name:", parent=self.root,
+                                      initialvalue=os.path.splitext(os.path.basename(path))[0].capitalize())
+        if not name or not name.strip(): return
+        # Adding an existing file upgrades it, which can take a while: writer thread.
+        self.service.write(profiles.add, name, path, on_done=lambda _: self.switch_profile(name.strip()),
+                           on_error=self.on_profile_failed)
+
+    def remove_profile(self):
+        name = self.profile
+        if messagebox.askyesno("Remove profile", f"Remove \"{name}\" from the list?\nIts database file is kept."):
+            self.switch_profile(profiles.DEFAULT)
+            # After the switch on the writer, so the two registry saves don't race.
+            self.service.write(profiles.remove, name, on_error=self.on_profile_failed)
+
+    def on_profile_failed(self, exc):
+        messagebox.showerror("Profiles", str(exc))
+
+    def ensure_page(self, page_name):
+        if page_name not in self.built_pages:
+            self.built_pages.add(page_name)
+            self.page_builders[page_name](self.frames[page_name])
 
     def create_nav_item(self, name):
         container = tk.Frame(self.sidebar, bg=C_BG_SIDE, height=50)
@@ -180,8 +687,9 @@ class UltraApp:
         container.bind("<Button-1>", lambda e: self.show_page(name))
 
     def show_page(self, page_name):
+        self.writes.flush()
         for name, (cont, ind, lbl) in self.nav_buttons.items():
-            if name == page_name:
+            if name == NAV_PARENT.get(page_name, page_name):
                 cont.config(bg="#1e293b")
                 ind.config(bg=C_ACCENT)
                 lbl.config(bg="#1e293b", fg=C_ACCENT, font=get_font(11, "bold"))
@@ -190,6 +698,8 @@ class UltraApp:
                 ind.config(bg=C_BG_SIDE)
                 lbl.config(bg=C_BG_SIDE, fg=C_TEXT_SUB, font=get_font(11))
 
+        self.current_page = page_name
+        self.ensure_page(page_name)
         for frame in self.frames.values():
             frame.pack_forget()
         
@@ -197,6 +707,8 @@ class UltraApp:
         
         if page_name == "Dashboard": self.refresh_dashboard()
         elif page_name == "Analytics": self.refresh_analytics()
+        elif page_name == "Settings": self.refresh_templates()
+        elif page_name == "Diagnostics": self.refresh_diagnostics()
 
     # --- DASHBOARD ---
     def build_dashboard(self, parent):
@@ -220,30 +732,116 @@ class UltraApp:
         self.entry.pack(side="left", fill="x", expand=True, ipady=8, padx=(0, 15))
         self.entry.bind("<Return>", self.add_goal)
         RoundedButton(input_frame, 120, 45, 20, C_ACCENT, "+ ADD", self.add_goal, "#0f172a").pack(side="right")
+        # Recurring goals: pick a repeat before adding; it resets to once after.
+        self.repeat_btn = tk.Menubutton(input_frame, text="ONCE ▾", font=("Arial", 9, "bold"), bg=C_CARD, fg=C_TEXT_SUB,
+                                        activebackground=C_CARD, activeforeground=C_ACCENT, relief="flat", width=14,
+                                        cursor="hand2")
+        menu = tk.Menu(self.repeat_btn, tearoff=0, bg=C_CARD, fg=C_TEXT_MAIN, activebackground=C_ACCENT,
+                       activeforeground="#0f172a")
+        menu.add_command(label="Once", command=lambda: self.set_repeat(None))
+        for text in ("Daily", "Weekdays", "Weekends"):
+            menu.add_command(label=text, command=lambda t=text: self.set_repeat(db.parse_repeat(t)))
+        menu.add_command(label="Every N days…", command=self.ask_repeat_every)
+        menu.add_command(label="On certain days…", command=self.ask_repeat_days)
+        self.repeat_btn.config(menu=menu)
+        self.repeat_btn.pack(side="right", padx=(0, 15), ipady=8)
 
-        list_frame = tk.Frame(parent, bg=C_BG_MAIN)
-        list_frame.pack(fill="both", expand=True)
-        self.dash_canvas = tk.Canvas(list_frame, bg=C_BG_MAIN, highlightthickness=0)
-        self.dash_scroll = ttk.Scrollbar(list_frame, orient="vertical", command=self.dash_canvas.yview)
-        self.dash_content = tk.Frame(self.dash_canvas, bg=C_BG_MAIN)
-        
-        self.dash_content.bind("<Configure>", lambda e: self.dash_canvas.configure(scrollregion=self.dash_canvas.bbox("all")))
-        self.dash_canvas.create_window((0, 0), window=self.dash_content, anchor="nw", width=800)
-        self.dash_canvas.configure(yscrollcommand=self.dash_scroll.set)
-        
-        self.dash_canvas.pack(side="left", fill="both", expand=True)
-        self.dash_scroll.pack(side="right", fill="y")
+        # Search past goals; results replace today's list until the box is cleared.
+        search_frame = tk.Frame(parent, bg=C_BG_MAIN)
+        search_frame.pack(fill="x", pady=(0, 15))
+        tk.Label(search_frame, text="SEARCH", font=get_font(9, "bold"), bg=C_BG_MAIN, fg=C_TEXT_SUB).pack(side="left", padx=(0, 10))
+        self.search_entry = tk.Entry(search_frame, font=get_font(11), bg=C_BG_MAIN, fg=C_TEXT_MAIN, insertbackground=C_ACCENT,
+                                     bd=0, highlightthickness=1, highlightcolor=C_ACCENT, highlightbackground=C_CARD)
+        self.search_entry.pack(side="left", fill="x", expand=True, ipady=4)
+        self.search_entry.bind("<KeyRelease>", self.on_search_key)
+        self.search_entry.bind("<Escape>", lambda e: self.clear_search())
+
+        self.goal_list = VirtualGoalList(parent, self.toggle_goal, self.delete_goal)
+        self.goal_list.on_near_end = self.load_more_results
+        self.goal_list.pack(fill="both", expand=True)
+        self.dash_canvas, self.dash_scroll = self.goal_list.canvas, self.goal_list.scroll
         self.dash_canvas.bind_all("<MouseWheel>", lambda e: self.dash_canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
 
+    @perf.timed("ui.refresh_dashboard")
     def refresh_dashboard(self):
-        for w in self.dash_content.winfo_children(): w.destroy()
-        goals = db.get_goals_by_date(self.current_date)
-        if not goals: tk.Label(self.dash_content, text="No goals for today.", font=get_font(14), bg=C_BG_MAIN, fg=C_TEXT_SUB).pack(pady=40)
-        for g in goals: GoalCard(self.dash_content, g, self.toggle_goal, self.delete_goal).pack(fill="x", pady=(0, 10))
+        # Visible cards are rebound in place; nothing is rebuilt.
+        self.writes.flush()
+        if self.search_text:
+            self.run_search(force=True)
+            return
+        # Recurring/archived goals are written on the writer first; a failure
+        # just shows the day without them, and the next refresh tries again.
+        self.service.write(db.prepare_day, self.current_date, on_error=lambda exc: None)
+        self.service.read(db.get_goals_by_date, self.current_date, key="dashboard", on_done=self.show_day)
+
+    @perf.timed("ui.show_day")
+    def show_day(self, goals):
+        if not self.search_text:  # a search started while this was loading
+            self.goal_list.set_goals(goals)
+
+    # --- SEARCH ---
+    # Keystrokes are debounced; each query supersedes the one before it (the
+    # service drops results for an older "search" key), and results arrive
+    # one page at a time as the list is scrolled.
+    def on_search_key(self, e=None):
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.run_search)
+
+    @perf.timed("ui.run_search")
+    def run_search(self, force=False):
+        self.search_job = None
+        text = self.search_entry.get().strip()
+        if text == self.search_text and not force:
+            return
+        self.search_text = text
+        if not text:
+            self.goal_list.set_mode(False, "No goals for today.")
+            self.refresh_dashboard()
+            return
+        self.writes.flush()
+        self.search_loading, self.search_done = True, False
+        self.service.read(db.search_goals, text, SEARCH_PAGE, key="search",
+                          on_done=lambda rows: self.show_results(text, rows, first_page=True))
+
+    @perf.timed("ui.show_results")
+    def show_results(self, text, rows, first_page=False):
+        if text != self.search_text:
+            return
+        self.search_loading = False
+        self.search_done = len(rows) < SEARCH_PAGE
+        if first_page:
+            self.goal_list.set_mode(True, "No matching goals.")
+            self.goal_list.set_goals(rows)
+        else:
+            self.goal_list.extend(rows)
+
+    def load_more_results(self):
+        if not self.search_text or self.search_done or self.search_loading or not self.goal_list.goals:
+            return
+        self.search_loading = True
+        text = self.search_text
+        self.service.read(db.search_goals, text, SEARCH_PAGE, self.goal_list.goals[-1].id, key="search",
+                          on_done=lambda rows: self.show_results(text, rows))
+
+    def clear_search(self):
+        self.search_entry.delete(0, tk.END)
+        self.run_search()
 
     # --- ANALYTICS ---
     def build_analytics(self, parent):
-        tk.Label(parent, text="Analytics Overview", font=get_font(24, "bold"), bg=C_BG_MAIN, fg=C_TEXT_MAIN).pack(anchor="w", pady=(0,20))
+        head = tk.Frame(parent, bg=C_BG_MAIN)
+        head.pack(fill="x", pady=(0, 20))
+        tk.Label(head, text="Analytics Overview", font=get_font(24, "bold"), bg=C_BG_MAIN, fg=C_TEXT_MAIN).pack(side="left")
+        # Scope: the active profile, or every profile's database combined.
+        self.scope_buttons = {}
+        for all_profiles, text in ((True, "ALL PROFILES"), (False, "THIS PROFILE")):
+            btn = tk.Label(head, text=text, font=get_font(9, "bold"), bg=C_BG_MAIN, fg=C_TEXT_SUB,
+                           padx=10, pady=3, cursor="hand2")
+            btn.pack(side="right", padx=(6, 0))
+            btn.bind("<Button-1>", lambda e, a=all_profiles: self.set_analytics_scope(a))
+            self.scope_buttons[all_profiles] = btn
+        self.set_analytics_scope(self.all_profiles, refresh=False)
         
         # Main Grid
         grid = tk.Frame(parent, bg=C_BG_MAIN)
@@ -252,7 +850,7 @@ class UltraApp:
         # --- LEFT: Daily Ring ---
         card_p = tk.Frame(grid, bg=C_CARD, padx=30, pady=30)
         card_p.pack(side="left", padx=(0, 20))
-        self.ana_progress = CircularProgress(card_p, size=140, bg_color=C_CARD)
+        self.ana_progress = CircularProgress(card_p, size=140, bg_color=C_CARD, animator=self.animator)
         self.ana_progress.pack()
         
         # --- RIGHT: Stats Column ---
@@ -288,47 +886,108 @@ class UltraApp:
         self.ana_perfect.pack(anchor="w")
         tk.Label(row2, text="Consecutive days where you crushed every single goal.", font=get_font(9), bg=C_CARD, fg="#64748b").pack(anchor="w")
 
-        # Chart Section
-        tk.Label(parent, text="Last 7 Days", font=get_font(14, "bold"), bg=C_BG_MAIN, fg=C_TEXT_MAIN).pack(anchor="w", pady=(30, 10))
-        
+        # Chart Section (with a range selector)
+        chart_head = tk.Frame(parent, bg=C_BG_MAIN)
+        chart_head.pack(fill="x", pady=(30, 10))
+        self.chart_title = tk.Label(chart_head, text="Last 7 Days", font=get_font(14, "bold"), bg=C_BG_MAIN, fg=C_TEXT_MAIN)
+        self.chart_title.pack(side="left")
+        self.range_buttons = {}
+        for name in reversed(list(CHART_RANGES)):
+            btn = tk.Label(chart_head, text=name, font=get_font(9, "bold"), bg=C_BG_MAIN, fg=C_TEXT_SUB,
+                           padx=10, pady=3, cursor="hand2")
+            btn.pack(side="right", padx=(6, 0))
+            btn.bind("<Button-1>", lambda e, n=name: self.set_chart_range(n))
+            self.range_buttons[name] = btn
+        self.set_chart_range(self.chart_range, refresh=False)
+
         chart_frame = tk.Frame(parent, bg=C_CARD, padx=20, pady=20)
         chart_frame.pack(fill="x")
-        self.chart_canvas = tk.Canvas(chart_frame, bg=C_CARD, height=130, highlightthickness=0)
+        self.chart_canvas = BarChart(chart_frame, height=150, animator=self.animator)
         self.chart_canvas.pack(fill="x")
 
+        # Heatmap Section
+        heat_head = tk.Frame(parent, bg=C_BG_MAIN)
+        heat_head.pack(fill="x", pady=(30, 10))
+        tk.Label(heat_head, text="Past Year", font=get_font(14, "bold"), bg=C_BG_MAIN, fg=C_TEXT_MAIN).pack(side="left")
+        self.heat_info = tk.Label(heat_head, text="", font=get_font(9), bg=C_BG_MAIN, fg=C_TEXT_SUB)
+        self.heat_info.pack(side="right")
+
+        heat_frame = tk.Frame(parent, bg=C_CARD, padx=20, pady=20)
+        heat_frame.pack(fill="x")
+        self.heatmap = Heatmap(heat_frame, on_hover=lambda text: self.heat_info.config(text=text))
+        self.heatmap.pack(anchor="w")
+
+    @perf.timed("ui.refresh_analytics")
     def refresh_analytics(self):
-        all_goals = db.get_all_goals()
-        goals_today = db.get_goals_by_date(self.current_date)
-        
+        # Aggregates come straight from SQL on a worker thread; rapid tab
+        # switches only ever paint the newest result.
+        self.writes.flush()
+        self.read_analytics(db.get_analytics, db.get_combined_analytics, self.current_date, key="analytics",
+                            on_done=self.show_analytics)
+        self.refresh_chart()
+        today = date.today()
+        self.read_analytics(db.get_range_analytics, db.get_combined_range_analytics, Heatmap.first_day(today).isoformat(),
+                            today.isoformat(), key="heatmap", on_done=lambda summary: self.heatmap.set_days(summary["days"], today))
+
+    def read_analytics(self, single, combined, *args, **kw):
+        """Reads single(*args) for this profile, or combined(paths, *args) over every profile."""
+        if self.all_profiles:
+            self.service.read(combined, profiles.paths(), *args, on_error=self.on_analytics_failed, **kw)
+        else:
+            self.service.read(single, *args, **kw)
+
+    def on_analytics_failed(self, exc):
+        messagebox.showerror("All profiles", f"Could not combine the profiles:\n{exc}")
+        self.set_analytics_scope(False)
+
+    def set_analytics_scope(self, all_profiles, refresh=True):
+        self.all_profiles = all_profiles
+        for a, btn in self.scope_buttons.items():
+            btn.config(bg=C_CARD if a == all_profiles else C_BG_MAIN, fg=C_ACCENT if a == all_profiles else C_TEXT_SUB)
+        if refresh:
+            self.shown_stats = None
+            self.refresh_analytics()
+
+    def set_chart_range(self, name, refresh=True):
+        self.chart_range = name
+        for n, btn in self.range_buttons.items():
+            btn.config(bg=C_CARD if n == name else C_BG_MAIN, fg=C_ACCENT if n == name else C_TEXT_SUB)
+        self.chart_title.config(text=f"Last {CHART_RANGES[name][0]} Days")
+        if refresh: self.refresh_chart()
+
+    def refresh_chart(self):
+        days, bucket = CHART_RANGES[self.chart_range]
+        today = date.today()
+        start = date.fromordinal(today.toordinal() - days + 1).isoformat()
+        self.read_analytics(db.get_range_analytics, db.get_combined_range_analytics, start, today.isoformat(), key="chart",
+                            on_done=lambda summary: self.draw_chart(summary[bucket], bucket))
+
+    @perf.timed("ui.show_analytics")
+    def show_analytics(self, stats):
+        # Revisiting the tab without any change since: the page is already right.
+        if stats == self.shown_stats:
+            return
+        self.shown_stats = stats
+
         # 1. Update Daily Ring
-        self.ana_progress.set_progress(analytics.calculate_daily_completion(goals_today))
+        self.ana_progress.set_progress(stats["daily_completion"])
         
         # 2. Update Stats
-        streak_active = analytics.calculate_streak(all_goals)
-        streak_perfect = analytics.calculate_perfect_streak(all_goals) # New Logic
-        missed = analytics.get_most_missed(all_goals)
-        
-        self.ana_streak.config(text=f"{streak_active} Days")
-        self.ana_perfect.config(text=f"{streak_perfect} Days")
+        missed = stats["most_missed"]
+        self.ana_streak.config(text=f"{stats['streak']} Days")
+        self.ana_perfect.config(text=f"{stats['perfect_streak']} Days")
         self.ana_missed.config(text=missed if missed != "None" else "None")
-        
-        # 3. Draw Chart
-        self.draw_chart(analytics.get_weekly_summary(all_goals))
-       
-
-    def draw_chart(self, summary):
-        self.chart_canvas.delete("all")
-        dates = sorted(list(summary.keys()))
-        bar_w, gap = 50, 30
-        start_x = 20
-        for i, d in enumerate(dates):
-            pct = summary[d]
-            x = start_x + i * (bar_w + gap)
-            bar_h = (pct / 100) * 120
-            self.chart_canvas.create_rectangle(x, 0, x+bar_w, 120, fill="#334155", outline="")
-            col = C_SUCCESS if pct == 100 else C_ACCENT
-            if pct > 0: self.chart_canvas.create_rectangle(x, 120-bar_h, x+bar_w, 120, fill=col, outline="")
-            self.chart_canvas.create_text(x+bar_w/2, 135, text=d.split("-")[-1], fill=C_TEXT_SUB, font=get_font(9))
+
+    @perf.timed("ui.draw_chart")
+    def draw_chart(self, series, bucket="days"):
+        """series: (bucket start, total, completed, percent) rows from analytics.range_summary."""
+        every = -(-len(series) // 14)  # at most ~14 labels
+        labels = []
+        for i, (d, _, _, _) in enumerate(series):
+            day = date.fromisoformat(d)
+            text = day.strftime("%b") if bucket == "months" else d.split("-")[-1] if bucket == "days" else f"{day:%b} {day.day}"
+            labels.append(text if i % every == 0 else "")
+        self.chart_canvas.set_series([pct for _, _, _, pct in series], labels)
 
     # --- SETTINGS ---
     def build_settings(self, parent):
@@ -347,7 +1006,37 @@ class UltraApp:
                                    bg=C_ACCENT, fg="#0f172a", font=("Arial", 9, "bold"), width=6, relief="flat")
         self.btn_sound.pack(side="right")
 
-        # --- Section 2: Danger Zone ---
+        # Animations Row
+        row_anim = tk.Frame(card_pref, bg=C_CARD)
+        row_anim.pack(fill="x", pady=(15, 0))
+        tk.Label(row_anim, text="Animations", font=get_font(12), bg=C_CARD, fg=C_TEXT_MAIN).pack(side="left")
+        self.btn_anim = tk.Button(row_anim, text="ON" if ANIMATIONS_ON else "OFF", command=self.toggle_animations,
+                                  bg=C_ACCENT, fg="#0f172a", font=("Arial", 9, "bold"), width=6, relief="flat")
+        self.btn_anim.pack(side="right")
+
+        # --- Section 2: Recurring goals ---
+        tk.Label(parent, text="RECURRING GOALS", font=get_font(10, "bold"), bg=C_BG_MAIN, fg=C_TEXT_SUB).pack(anchor="w", pady=(0, 10))
+        self.templates_card = tk.Frame(parent, bg=C_CARD, padx=20, pady=20)
+        self.templates_card.pack(fill="x", pady=(0, 30))
+
+        # --- Section 3: Data ---
+        tk.Label(parent, text="DATA", font=get_font(10, "bold"), bg=C_BG_MAIN, fg=C_TEXT_SUB).pack(anchor="w", pady=(0, 10))
+        card_data = tk.Frame(parent, bg=C_CARD, padx=20, pady=20)
+        card_data.pack(fill="x", pady=(0, 30))
+
+        row_data = tk.Frame(card_data, bg=C_CARD)
+        row_data.pack(fill="x")
+        text_frame = tk.Frame(row_data, bg=C_CARD)
+        text_frame.pack(side="left")
+        tk.Label(text_frame, text="Import / Export", font=get_font(12), bg=C_CARD, fg=C_TEXT_MAIN).pack(anchor="w")
+        self.transfer_status = tk.Label(text_frame, text="Move goal history in or out as .csv or .jsonl files.", font=get_font(10), bg=C_CARD, fg=C_TEXT_SUB)
+        self.transfer_status.pack(anchor="w")
+        tk.Button(row_data, text="EXPORT", command=self.export_goals, bg="#334155", fg=C_TEXT_MAIN,
+                  font=("Arial", 9, "bold"), width=10, relief="flat").pack(side="right")
+        tk.Button(row_data, text="IMPORT", command=self.import_goals, bg=C_ACCENT, fg="#0f172a",
+                  font=("Arial", 9, "bold"), width=10, relief="flat").pack(side="right", padx=(0, 10))
+
+        # --- Section 4: Danger Zone ---
         tk.Label(parent, text="DANGER ZONE", font=get_font(10, "bold"), bg=C_BG_MAIN, fg=C_DANGER).pack(anchor="w", pady=(0, 10))
         card_danger = tk.Frame(parent, bg=C_CARD, padx=20, pady=20)
         card_danger.pack(fill="x", pady=(0, 30))
@@ -359,13 +1048,13 @@ class UltraApp:
         text_frame = tk.Frame(row_clear, bg=C_CARD)
         text_frame.pack(side="left")
         tk.Label(text_frame, text="Clear All Data", font=get_font(12, "bold"), bg=C_CARD, fg=C_DANGER).pack(anchor="w")
-        tk.Label(text_frame, text="Permanently delete all goals and statistics.", font=get_font(10), bg=C_CARD, fg=C_TEXT_SUB).pack(anchor="w")
+        tk.Label(text_frame, text="Permanently delete all goals and statistics in this profile.", font=get_font(10), bg=C_CARD, fg=C_TEXT_SUB).pack(anchor="w")
 
         btn_del = tk.Button(row_clear, text="DELETE", command=self.clear_all_data, 
                             bg=C_DANGER, fg="white", font=("Arial", 9, "bold"), width=10, relief="flat")
         btn_del.pack(side="right")
 
-        # --- Section 3: About Us  ---
+        # --- Section 5: About Us  ---
         tk.Label(parent, text="ABOUT", font=get_font(10, "bold"), bg=C_BG_MAIN, fg=C_TEXT_SUB).pack(anchor="w", pady=(0, 10))
         card_about = tk.Frame(parent, bg=C_CARD, padx=20, pady=25)
         card_about.pack(fill="x")
@@ -379,41 +1068,276 @@ class UltraApp:
         # Version info 
         tk.Label(card_about, text="v1.0 • Offline Edition", font=get_font(9), bg=C_CARD, fg="#64748b").pack(anchor="center", pady=(10, 0))
 
+    def refresh_templates(self):
+        self.service.read(db.get_templates, key="templates", on_done=self.show_templates)
+
+    def show_templates(self, templates):
+        for child in self.templates_card.winfo_children():
+            child.destroy()
+        if not templates:
+            tk.Label(self.templates_card, text="Nothing repeats yet. Pick a repeat next to + ADD on the dashboard.",
+                     font=get_font(10), bg=C_CARD, fg=C_TEXT_SUB).pack(anchor="w")
+        for i, (tid, title, every, weekdays, start, _) in enumerate(templates):
+            row = tk.Frame(self.templates_card, bg=C_CARD)
+            row.pack(fill="x", pady=(0 if i == 0 else 12, 0))
+            tk.Label(row, text=title, font=get_font(12), bg=C_CARD, fg=C_TEXT_MAIN).pack(side="left")
+            tk.Label(row, text=f"{db.describe_repeat(every, weekdays)} · since {start}", font=get_font(10),
+                     bg=C_CARD, fg=C_TEXT_SUB).pack(side="left", padx=(12, 0))
+            tk.Button(row, text="STOP", command=lambda t=tid, name=title: self.stop_template(t, name), bg="#334155",
+                      fg=C_TEXT_MAIN, font=("Arial", 9, "bold"), width=8, relief="flat").pack(side="right")
+
+    def stop_template(self, template_id, title):
+        if messagebox.askyesno("Stop repeating", f"Stop repeating \"{title}\"?\nFinished ones stay in your history."):
+            self.service.write(db.stop_template, template_id, on_done=lambda _: self.refresh_templates(),
+                               on_error=self.on_write_failed)
+
+    # --- DIAGNOSTICS (hidden: Ctrl+Shift+D) ---
+    def build_diagnostics(self, parent):
+        head = tk.Frame(parent, bg=C_BG_MAIN)
+        head.pack(fill="x", pady=(0, 20))
+        tk.Label(head, text="Diagnostics", font=get_font(24, "bold"), bg=C_BG_MAIN, fg=C_TEXT_MAIN).pack(side="left")
+        back = tk.Label(head, text="← Settings", font=get_font(10), bg=C_BG_MAIN, fg=C_TEXT_SUB, cursor="hand2")
+        back.pack(side="right")
+        back.bind("<Button-1>", lambda e: self.show_page("Settings"))
+
+        card = tk.Frame(parent, bg=C_CARD, padx=20, pady=20)
+        card.pack(fill="x", pady=(0, 20))
+        row = tk.Frame(card, bg=C_CARD)
+        row.pack(fill="x")
+        tk.Label(row, text="Instrumentation", font=get_font(12), bg=C_CARD, fg=C_TEXT_MAIN).pack(side="left")
+        button = lambda text, command, accent=False: tk.Button(
+            row, text=text, command=command, bg=C_ACCENT if accent else "#334155", fg="#0f172a" if accent else C_TEXT_MAIN,
+            font=("Arial", 9, "bold"), width=12, relief="flat")
+        self.btn_perf = button("OFF", self.toggle_perf, accent=True)
+        self.btn_perf.pack(side="right")
+        button("RESET", self.reset_perf).pack(side="right", padx=(0, 10))
+        button("EXPORT JSON", self.export_perf).pack(side="right", padx=(0, 10))
+        self.btn_profile = button("CPU PROFILE", self.toggle_profile)
+        self.btn_profile.pack(side="right", padx=(0, 10))
+        button("MEMORY", self.memory_snapshot).pack(side="right", padx=(0, 10))
+
+        self.diag_text = tk.Text(parent, bg=C_CARD, fg=C_TEXT_MAIN, font=("Consolas", 9), bd=0, padx=15, pady=15,
+                                 highlightthickness=0, wrap="none")
+        self.diag_text.pack(fill="both", expand=True)
+
+    def refresh_diagnostics(self):
+        """Redraws the metrics table, then again every second while the page is open."""
+        if self.diag_job is not None:
+            self.root.after_cancel(self.diag_job)
+            self.diag_job = None
+        if self.current_page != "Diagnostics":
+            return
+        self.btn_perf.config(text="ON" if perf.ENABLED else "OFF", bg=C_ACCENT if perf.ENABLED else "#334155",
+                             fg="#0f172a" if perf.ENABLED else C_TEXT_MAIN)
+        self.btn_profile.config(text="STOP PROFILE" if perf.profiling() else "CPU PROFILE")
+        if perf.ENABLED:
+            lines = [f"{'name':<34}{'calls':>8}{'total ms':>11}{'mean ms':>10}{'p50':>8}{'p95':>8}{'p99':>8}{'max ms':>9}"]
+            for name, m in perf.metrics().items():
+                lines.append(f"{name:<34}{m['count']:>8}{m['total_ms']:>11.1f}{m['mean_ms']:>10.3f}"
+                             f"{m['p50_ms']:>8.2f}{m['p95_ms']:>8.2f}{m['p99_ms']:>8.2f}{m['max_ms']:>9.2f}")
+            cache = db.cache_stats()
+            lines += ["", f"analytics cache: {cache['hits']} hits, {cache['misses']} misses, "
+                          f"{cache['invalidations']} invalidated, {cache['evictions']} evicted, {cache['size']} entries",
+                      f"animation frames: {self.animator.frames}"]
+            self.show_diagnostics_text("\n".join(lines))
+            self.diag_job = self.root.after(1000, self.refresh_diagnostics)
+        elif not perf.profiling():
+            self.show_diagnostics_text("Instrumentation is off. Turn it on, use the app for a while and come back.")
+
+    def show_diagnostics_text(self, text):
+        self.diag_text.config(state="normal")
+        self.diag_text.delete("1.0", tk.END)
+        self.diag_text.insert("1.0", text)
+        self.diag_text.config(state="disabled")
+
+    def toggle_perf(self):
+        if perf.ENABLED: perf.disable()
+        else: perf.enable()
+        self.refresh_diagnostics()
+
+    def reset_perf(self):
+        perf.reset()
+        self.refresh_diagnostics()
+
+    def export_perf(self):
+        path = filedialog.asksaveasfilename(title="Save diagnostics report", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")], initialfile="focus-diagnostics.json")
+        if path:
+            perf.export_report(path, {"cache": db.cache_stats(), "animation_frames": self.animator.frames})
+            messagebox.showinfo("Diagnostics", f"Report saved to {path}")
+
+    def toggle_profile(self):
+        if not perf.profiling():
+            perf.start_profile()
+            self.btn_profile.config(text="STOP PROFILE")
+            self.show_diagnostics_text("Profiling the UI thread… use the app, then press STOP PROFILE.")
+            return
+        path = filedialog.asksaveasfilename(title="Save profile (optional)", defaultextension=".prof",
+                                            filetypes=[("cProfile stats", "*.prof")], initialfile="focus.prof")
+        self.btn_profile.config(text="CPU PROFILE")
+        self.show_diagnostics_text(perf.stop_profile(path or None))
+
+    def memory_snapshot(self):
+        if self.diag_job is not None:
+            self.root.after_cancel(self.diag_job)  # keep the snapshot on screen
+            self.diag_job = None
+        self.show_diagnostics_text(perf.memory_snapshot())
+
     def toggle_sound(self):
         global SOUND_ON
         SOUND_ON = not SOUND_ON
         self.btn_sound.config(text="ON" if SOUND_ON else "OFF", bg=C_ACCENT if SOUND_ON else "#334155")
         play_click()
 
+    def toggle_animations(self):
+        global ANIMATIONS_ON
+        ANIMATIONS_ON = not ANIMATIONS_ON
+        self.btn_anim.config(text="ON" if ANIMATIONS_ON else "OFF", bg=C_ACCENT if ANIMATIONS_ON else "#334155")
+        if not ANIMATIONS_ON: self.animator.finish()
+        play_click()
+
     def clear_all_data(self):
         play_click()
         confirm = messagebox.askyesno("Confirm Data Wipe", 
-                                      "Are you strictly sure?\n\nThis will permanently delete ALL goals and history.\nThis action cannot be undone.", 
+                                      f"Are you strictly sure?\n\nThis will permanently delete ALL goals and history in {self.profile}.\nThis action cannot be undone.", 
                                       icon='warning')
         if confirm:
-            db.clear_all_data()
-            messagebox.showinfo("Success", "All data has been cleared.")
-            self.refresh_dashboard()
+            self.writes.flush()
+            self.service.write(db.clear_all_data, on_done=lambda _: self.on_data_cleared(), on_error=self.on_write_failed)
+
+    # --- IMPORT / EXPORT ---
+    # Transfers run on the service threads; the worker only writes plain
+    # numbers into self.transfer_progress and a timer copies them to the label.
+    # Setting its "cancel" makes the next progress report stop the transfer.
+    FILE_TYPES = [("Goal files", "*.csv *.jsonl"), ("CSV", "*.csv"), ("JSON Lines", "*.jsonl")]
+
+    def import_goals(self):
+        path = filedialog.askopenfilename(title="Import goals", filetypes=self.FILE_TYPES)
+        if not path: return
+        self.writes.flush()
+        progress = self.transfer_progress = {"text": "Importing...", "cancel": False}
+        def report(read, imported):
+            if progress["cancel"]: raise transfer.Cancelled()
+            progress["text"] = f"Importing... {read:,} rows read, {imported:,} imported"
+        self.service.write(lambda: transfer.import_goals(path, progress=report),
+                           on_done=self.on_imported, on_error=self.on_transfer_failed)
+        self.show_transfer_progress()
+
+    def on_imported(self, stats):
+        self.transfer_progress = None
+        self.transfer_status.config(text=f"Imported {stats['imported']:,} goals "
+                                         f"({stats['duplicates']:,} duplicates, {stats['invalid']:,} invalid rows skipped).")
+        self.refresh_dashboard()
+
+    def export_goals(self):
+        path = filedialog.asksaveasfilename(title="Export goals", defaultextension=".csv", filetypes=self.FILE_TYPES)
+        if not path: return
+        self.writes.flush()
+        progress = self.transfer_progress = {"text": "Exporting...", "cancel": False}
+        def report(written):
+            if progress["cancel"]: raise transfer.Cancelled()
+            progress["text"] = f"Exporting... {written:,} goals written"
+        self.service.read(lambda: transfer.export_goals(path, progress=report),
+                          on_done=self.on_exported, on_error=self.on_transfer_failed)
+        self.show_transfer_progress()
+
+    def on_exported(self, written):
+        self.transfer_progress = None
+        self.transfer_status.config(text=f"Exported {written:,} goals.")
+
+    def on_transfer_failed(self, exc):
+        self.transfer_progress = None
+        if isinstance(exc, transfer.Cancelled):
+            self.transfer_status.config(text="Transfer cancelled.")
+            return
+        self.transfer_status.config(text="Transfer failed.")
+        messagebox.showerror("Import / Export", str(exc))
+
+    def show_transfer_progress(self):
+        progress = self.transfer_progress
+        if progress is not None:
+            self.transfer_status.config(text=progress["text"])
+            self.root.after(200, self.show_transfer_progress)
+
+    def on_data_cleared(self):
+        messagebox.showinfo("Success", "All data has been cleared.")
+        self.refresh_dashboard()
 
     # --- ACTIONS ---
+    # The UI updates immediately; writes are batched by self.writes and
+    # committed on the service's writer thread. A failed write re-reads the
+    # day from the database.
+    def set_repeat(self, rule):
+        self.repeat = rule
+        label = db.describe_repeat(*rule) if rule else "Once"
+        self.repeat_btn.config(text=(label if len(label) <= 12 else label[:11] + "…").upper() + " ▾",
+                               fg=C_ACCENT if rule else C_TEXT_SUB)
+
+    def ask_repeat_every(self):
+        n = simpledialog.askinteger("Repeat", "Every how many days?", minvalue=1, maxvalue=365, parent=self.root)
+        if n: self.set_repeat((n, db.ALL_DAYS))
+
+    def ask_repeat_days(self):
+        text = simpledialog.askstring("Repeat", "On which days? (e.g. mon wed fri)", parent=self.root)
+        if text:
+            try:
+                self.set_repeat(db.parse_repeat(text))
+            except ValueError as exc:
+                messagebox.showerror("Repeat", str(exc))
+
     def add_goal(self, e=None):
         text = self.entry.get().strip()
-        if text:
-            db.add_goal(text, self.current_date)
+        if text and self.repeat:
+            # Stored once as a template; today's instance comes from the refresh.
             self.entry.delete(0, tk.END)
             play_click()
-            self.refresh_dashboard()
+            self.service.write(db.add_template, text, *self.repeat, self.current_date,
+                               on_done=lambda _: self.refresh_dashboard(), on_error=self.on_write_failed)
+            self.set_repeat(None)
+        elif text:
+            placeholder = self.writes.add(text, self.current_date)
+            self.entry.delete(0, tk.END)
+            play_click()
+            if self.search_text:
+                self.clear_search()  # back to today's list, which now includes the new goal
+            else:
+                self.goal_list.append(db.Goal(placeholder, text, self.current_date))
 
     def toggle_goal(self, gid, status):
-        db.toggle_goal_status(gid, status)
         if not status: play_success()
         else: play_click()
-        self.refresh_dashboard()
+        self.goal_list.set_completed(gid, 0 if status else 1)
+        self.writes.set_status(gid, 0 if status else 1)
 
     def delete_goal(self, gid):
         if messagebox.askyesno("Confirm", "Delete this goal?"):
-            db.delete_goal(gid)
-            self.refresh_dashboard()
+            self.goal_list.remove(gid)
+            self.writes.delete(gid)
+
+    def on_goal_inserted(self, placeholder, gid):
+        self.goal_list.replace_id(placeholder, gid)
+
+    def on_write_failed(self, exc):
+        messagebox.showerror("Couldn't save", f"Your last change wasn't saved:\n{exc}")
+        self.refresh_dashboard()
+
+    def on_close(self):
+        if self.closing: return
+        self.closing = True
+        self.animator.finish()
+        self.writes.flush()
+        if self.transfer_progress is not None:
+            self.transfer_progress["cancel"] = True  # stops after the chunk it is on
+            self.transfer_progress["text"] = "Stopping the transfer..."
+        self.close_when_idle()
+
+    def close_when_idle(self):
+        # Queued writes land before exit; Tk keeps drawing while they do.
+        if self.service.pending:
+            self.root.after(50, self.close_when_idle)
+            return
+        self.service.shutdown()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,262 @@
+"""Lightweight timing for Focus Ultra: counts, latency histograms and a ring
+buffer of recent calls, plus cProfile / tracemalloc snapshots on demand.
+
+Off by default. While off, module functions are not wrapped at all and
+@timed / span() cost one flag check. Turn it on with enable() (Settings →
+Diagnostics, Ctrl+Shift+D) or the FOCUS_PERF environment variable:
+
+    FOCUS_PERF=1 python main.py
+    FOCUS_PERF=report.json python cli.py stats   # also writes the report on exit
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENABLED = False
+RING_SIZE = 2048
+# Histogram buckets: upper bounds in microseconds, doubling from 16 us to ~67 s.
+BUCKETS_US = [16 << i for i in range(23)]
+
+_lock = threading.Lock()
+_metrics = {}                   # name -> Metric
+_recent = deque(maxlen=RING_SIZE)  # (wall time, name, seconds, thread name)
+_started = None
+_wrapped = {}                   # (module name, attr) -> original function
+_modules = []                   # modules enable() wraps
+_profiler = None
+_last_snapshot = None
+
+now = time.perf_counter
+
+class Metric:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_US) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max: self.max = seconds
+        us = seconds * 1e6
+        i = 0
+        while i < len(BUCKETS_US) and us > BUCKETS_US[i]:
+            i += 1
+        self.buckets[i] += 1
+
+    def percentile(self, q):
+        """Upper bound (ms) of the bucket holding the q-th fraction of calls."""
+        target, seen = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                return (BUCKETS_US[i] if i < len(BUCKETS_US) else self.max * 1e6) / 1000
+        return 0.0
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 4) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "histogram_us": {(f"<={b}" if i < len(BUCKETS_US) else f">{BUCKETS_US[-1]}"): n
+                             for i, (b, n) in enumerate(zip(BUCKETS_US + [None], self.buckets)) if n},
+        }
+
+# --- RECORDING ---
+def record(name, seconds):
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Metric()
+        metric.add(seconds)
+        _recent.append((time.time(), name, seconds, threading.current_thread().name))
+
+def timed(name=None):
+    """Decorator: records every call while instrumentation is on."""
+    def wrap(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            t = now()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, now() - t)
+        return wrapper
+    return wrap
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = now()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, now() - self.start)
+
+class _NullSpan:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name):
+    """Context manager timing a block: with perf.span("ui.layout"): ..."""
+    return _Span(name) if ENABLED else _NULL_SPAN
+
+# --- ON / OFF ---
+def register(*modules):
+    """Modules whose public functions enable() should time (e.g. database, analytics)."""
+    for module in modules:
+        if module not in _modules:
+            _modules.append(module)
+            if ENABLED: _wrap(module)
+
+def _wrap(module):
+    short = module.__name__.rsplit(".", 1)[-1]
+    for attr, value in list(vars(module).items()):
+        if attr.startswith("_") or not callable(value) or isinstance(value, type):
+            continue
+        if getattr(value, "__module__", None) != module.__name__ or (module.__name__, attr) in _wrapped:
+            continue
+        if hasattr(value, "__wrapped__"):  # already decorated, e.g. @contextmanager
+            continue
+        _wrapped[(module.__name__, attr)] = value
+        setattr(module, attr, timed(f"{short}.{attr}")(value))
+
+def _unwrap(module):
+    for (mod_name, attr), original in list(_wrapped.items()):
+        if mod_name == module.__name__:
+            setattr(module, attr, original)
+            del _wrapped[(mod_name, attr)]
+
+def enable():
+    global ENABLED, _started
+    if not ENABLED:
+        ENABLED = True
+        _started = _started or time.time()
+        for module in _modules:
+            _wrap(module)
+
+def disable():
+    global ENABLED
+    ENABLED = False
+    for module in _modules:
+        _unwrap(module)
+
+def reset():
+    with _lock:
+        _metrics.clear()
+        _recent.clear()
+
+def enable_from_env():
+    """Turns instrumentation on when FOCUS_PERF is set; a path value also gets
+    the JSON report written there when the process exits."""
+    value = os.environ.get("FOCUS_PERF")
+    if not value or value == "0":
+        return
+    enable()
+    if value != "1":
+        import atexit
+        atexit.register(export_report, value)
+
+# --- REPORTS ---
+def metrics():
+    """name -> summary dict, slowest total first."""
+    with _lock:
+        items = [(name, m.summary()) for name, m in _metrics.items()]
+    return dict(sorted(items, key=lambda kv: -kv[1]["total_ms"]))
+
+def recent(n=100):
+    with _lock:
+        events = list(_recent)[-n:]
+    return [{"at": round(at, 3), "name": name, "ms": round(s * 1000, 3), "thread": thread}
+            for at, name, s, thread in events]
+
+def report(extra=None):
+    data = {
+        "enabled": ENABLED,
+        "since": _started,
+        "generated": time.time(),
+        "metrics": metrics(),
+        "recent": recent(RING_SIZE),
+    }
+    if extra: data.update(extra)
+    return data
+
+def export_report(path, extra=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(extra), f, indent=2)
+    return path
+
+# --- PROFILING ---
+def start_profile():
+    """Starts cProfile on the calling thread (the Tk thread from the UI)."""
+    global _profiler
+    import cProfile
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def stop_profile(path=None, top=20):
+    """Stops the profiler, saves the raw stats to path (.prof) if given and
+    returns the top functions by cumulative time as text."""
+    global _profiler
+    if _profiler is None:
+        return "Profiler is not running."
+    _profiler.disable()  # before the imports below, so they stay out of the stats
+    profiler, _profiler = _profiler, None
+    import io
+    import pstats
+    if path: profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    return out.getvalue()
+
+def profiling():
+    return _profiler is not None
+
+def memory_snapshot(path=None, top=15):
+    """First call starts tracemalloc; later calls return the top allocation
+    sites and the growth since the previous snapshot. path saves the raw snapshot."""
+    global _last_snapshot
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(10)
+        _last_snapshot = None
+        return "tracemalloc started; take another snapshot to see allocations."
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    if path: snapshot.dump(path)
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"traced {current / 1e6:.1f} MB now, {peak / 1e6:.1f} MB peak", "", "Top allocation sites:"]
+    lines += [f"  {stat}" for stat in snapshot.statistics("lineno")[:top]]
+    if _last_snapshot is not None:
+        lines += ["", "Growth since last snapshot:"]
+        lines += [f"  {stat}" for stat in snapshot.compare_to(_last_snapshot, "lineno")[:top]]
+    _last_snapshot = snapshot
+    return "\n".join(lines)
+
+def stop_memory():
+    global _last_snapshot
+    import tracemalloc
+    tracemalloc.stop()
+    _last_snapshot = None
@@ -0,0 +1,117 @@
+"""Profiles: named goal databases, e.g. Personal, Work or one per project.
+
+Personal is goals.db next to the app, so existing installs keep their data.
+Other profiles are listed in profiles.json beside it, with the last used
+one; new ones get a file in the profiles folder, and any existing .db file
+(a project's own store) can be added by path. Relative paths in the
+registry are resolved against the app folder, so the whole folder can move.
+
+switch() only repoints database.DB_NAME: the stores of recently used
+profiles stay hot in database.py, so switching back is instant.
+"""
+import json
+import os
+import re
+
+import database as db
+
+DEFAULT = "Personal"
+REGISTRY = os.path.join(db.APP_DIR, "profiles.json")
+FOLDER = os.path.join(db.APP_DIR, "profiles")
+
+def load() -> dict:
+    """{"active": name, "profiles": {name: path}}, Personal always included."""
+    try:
+        with open(REGISTRY, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {}
+    profiles = {DEFAULT: "goals.db"}
+    profiles.update(data.get("profiles") or {})
+    active = data.get("active")
+    return {"active": active if active in profiles else DEFAULT, "profiles": profiles}
+
+def save(data):
+    tmp = REGISTRY + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, REGISTRY)
+
+def names() -> list:
+    return list(load()["profiles"])
+
+def active() -> str:
+    return load()["active"]
+
+def path(name: str) -> str:
+    profiles = load()["profiles"]
+    if name not in profiles:
+        raise KeyError(f"No profile named {name!r}")
+    return os.path.join(db.APP_DIR, profiles[name])
+
+def paths() -> list:
+    """Database file of every profile that exists on disk, for the all-profiles view."""
+    return [p for p in (path(name) for name in names()) if os.path.exists(p)]
+
+def add(name: str, file: str = None) -> str:
+    """Registers a profile and creates its database; without file it gets a
+    new one in the profiles folder. Returns the database path."""
+    name = name.strip()
+    data = load()
+    if not name or name in data["profiles"]:
+        raise ValueError(f"Profile name {name!r} is empty or taken")
+    if file is None:
+        os.makedirs(FOLDER, exist_ok=True)
+        slug = re.sub(r"[^\w-]+", "-", name.lower()).strip("-") or "profile"
+        file, n = os.path.join(FOLDER, f"{slug}.db"), 1
+        while os.path.exists(file):
+            n += 1
+            file = os.path.join(FOLDER, f"{slug}-{n}.db")
+    file = os.path.abspath(file)
+    with db.get_store(file).use():
+        db.init_db()
+    inside = os.path.relpath(file, db.APP_DIR)
+    data["profiles"][name] = file if inside.startswith("..") else inside
+    save(data)
+    return file
+
+def remove(name: str):
+    """Forgets a profile; its database file is left where it is."""
+    data = load()
+    if name == DEFAULT:
+        raise ValueError("The Personal profile can't be removed")
+    data["profiles"].pop(name, None)
+    if data["active"] == name:
+        data["active"] = DEFAULT
+    save(data)
+
+def switch(name: str) -> str:
+    """Makes name the profile database.py works on and remembers it for next time."""
+    target = prepare(name)
+    db.DB_NAME = target
+    return target
+
+def prepare(name: str) -> str:
+    """switch() up to repointing database.DB_NAME: opens name's database,
+    upgrades it if it is new or old, and remembers name as the active
+    profile. That can take a while on a big file, so the app runs it on its
+    writer thread and repoints DB_NAME itself afterwards. Returns the path."""
+    target = path(name)
+    if name != DEFAULT and not os.path.exists(target):
+        raise FileNotFoundError(f"{target} is gone; remove the profile or put the file back")
+    with db.get_store(target).use():
+        if db.schema_version() < len(db.MIGRATIONS):
+            db.init_db()  # new or from an older version
+    data = load()
+    if data["active"] != name:
+        data["active"] = name
+        save(data)
+    return target
+
+def use_active() -> str:
+    """Points database.py at the last used profile (at startup); returns its name."""
+    name = active()
+    if not os.path.exists(path(name)):
+        name = DEFAULT  # its file was moved away; don't create an empty one
+    db.DB_NAME = path(name)
+    return name
@@ -0,0 +1,368 @@
+"""Local HTTP/JSON API over goals.db, for scripts, editor plugins and phones.
+
+    python server.py [--host 127.0.0.1] [--port 8765] [--token SECRET] [--profile NAME]
+
+Endpoints (JSON in and out):
+    GET    /goals?date=YYYY-MM-DD      goals for a day (default today)
+    GET    /goals/ID
+    GET    /search?q=WORDS&before=ID   title search, newest first, 50 per page
+    POST   /goals                      {"title": ..., "target_date": ..., "completed": 0}
+    PATCH  /goals/ID                   {"completed": 0 | 1}
+    DELETE /goals/ID
+    GET    /analytics?date=YYYY-MM-DD  the Analytics page numbers (ETag aware)
+    GET    /analytics/days?start=&end= per-day totals (ETag aware)
+    GET    /analytics/range?start=&end= day/week/month completion series (ETag aware)
+
+Writes from all clients are queued and committed in batches by a single
+writer thread; reads run on a small pool of reader threads (GET /goals
+first has the writer create the day's recurring goals). Both use database.py's
+per-thread connections. Listening beyond localhost exposes
+your goals to the network, so pass --token there (clients then send
+"Authorization: Bearer SECRET").
+
+FOCUS_PERF=report.json times every route and database call and writes the
+numbers there on exit (see perf.py).
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import urlsplit, parse_qs
+
+import database as db
+import perf
+
+MAX_BODY = 1 << 20
+MAX_BATCH = 256
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+           401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+def _goal_json(g):
+    return {"id": g.id, "title": g.title, "target_date": g.target_date, "completed": g.completed}
+
+def _date_param(query, name, default=None):
+    value = query.get(name, [None])[0]
+    if value is None:
+        return default
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):  # TypeError: a JSON number or list, not a string
+        raise HTTPError(400, f"'{name}' must be a date like 2024-05-01")
+
+def _completed_value(body):
+    value = body.get("completed", 0)
+    if value not in (0, 1, True, False):
+        raise HTTPError(400, "'completed' must be 0 or 1")
+    return int(value)
+
+# --- WRITES ---
+def _apply_ops(ops):
+    """Runs on the writer thread: one transaction for a whole batch of requests."""
+    targets = [op[1] for op in ops if op[0] in ("status", "delete")]
+    found = db.existing_ids(targets) if targets else set()
+    inserts, statuses, deletes, results = [], {}, [], []
+    for day in {op[1] for op in ops if op[0] == "prepare"}:
+        db.prepare_day(day)
+    for op in ops:
+        if op[0] == "prepare":
+            results.append(True)
+        elif op[0] == "add":
+            inserts.append(op[1:])
+            results.append(None)  # filled with the new id below
+        elif op[1] not in found:
+            results.append(False)
+        elif op[0] == "status":
+            statuses[op[1]] = op[2]
+            results.append(True)
+        else:
+            found.discard(op[1])  # a second delete of the same goal is a 404
+            statuses.pop(op[1], None)
+            deletes.append(op[1])
+            results.append(True)
+    new_ids = iter(db.apply_batch(inserts, statuses, deletes))
+    return [next(new_ids) if r is None else r for r in results]
+
+class WriteBatcher:
+    """Queues write requests and commits everything waiting as one batch."""
+    def __init__(self, executor):
+        self.executor = executor
+        self.queue = asyncio.Queue()
+        self.batches = self.batched_ops = 0
+
+    async def submit(self, *op):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((op, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < MAX_BATCH and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self.executor, _apply_ops, [op for op, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done(): future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.batched_ops += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done(): future.set_result(result)
+
+# --- SERVER ---
+class GoalServer:
+    def __init__(self, host="127.0.0.1", port=8765, token=None, readers=4):
+        self.host, self.port, self.token = host, port, token
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-write")
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="api-read")
+        self.batcher = None
+        self.server = None
+        self.connections = {}  # writer -> handler task
+        self.routes = [
+            ("GET", re.compile(r"/goals"), self.list_goals),
+            ("POST", re.compile(r"/goals"), self.create_goal),
+            ("GET", re.compile(r"/goals/(\d+)"), self.get_goal),
+            ("PATCH", re.compile(r"/goals/(\d+)"), self.update_goal),
+            ("DELETE", re.compile(r"/goals/(\d+)"), self.delete_goal),
+            ("GET", re.compile(r"/analytics"), self.get_analytics),
+            ("GET", re.compile(r"/analytics/days"), self.get_days),
+            ("GET", re.compile(r"/analytics/range"), self.get_range),
+            ("GET", re.compile(r"/search"), self.search),
+            ("GET", re.compile(r"/health"), self.health),
+        ]
+
+    async def start(self):
+        db.init_db()
+        self.batcher = WriteBatcher(self.writer)
+        self._batch_task = asyncio.create_task(self.batcher.run())
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self.server.close()
+        handlers = list(self.connections.values())
+        for writer in list(self.connections):
+            writer.close()  # ends idle keep-alive connections
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self.server.wait_closed()
+        self._batch_task.cancel()
+        self.readers.shutdown(wait=True)
+        self.writer.submit(db.close_db)
+        self.writer.shutdown(wait=True)
+
+    async def read(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.readers, fn, *args)
+
+    def etag(self, *parts):
+        # data_version is read on the event loop thread only, so values compare.
+        raw = repr((db.data_version(),) + parts).encode()
+        return '"' + hashlib.blake2s(raw, digest_size=8).hexdigest() + '"'
+
+    # --- handlers: return (status, payload, extra headers) ---
+    async def health(self, req):
+        return 200, {"ok": True}, {}
+
+    async def list_goals(self, req):
+        target_date = _date_param(req["query"], "date", date.today().isoformat())
+        await self.batcher.submit("prepare", target_date)
+        goals = await self.read(db.get_goals_by_date, target_date)
+        return 200, {"date": target_date, "goals": [_goal_json(g) for g in goals]}, {}
+
+    async def get_goal(self, req, gid):
+        goal = await self.read(db.get_goal, int(gid))
+        if goal is None: raise HTTPError(404, "No such goal")
+        return 200, _goal_json(goal), {}
+
+    async def create_goal(self, req):
+        body = req["json"]
+        title = body.get("title")
+        if not isinstance(title, str) or not title.strip() or len(title) > 500:
+            raise HTTPError(400, "'title' must be a non-empty string")
+        target_date = _date_param({"target_date": [body.get("target_date")]}, "target_date",
+                                  date.today().isoformat())
+        completed = _completed_value(body)
+        gid = await self.batcher.submit("add", title.strip(), target_date, completed)
+        return 201, {"id": gid, "title": title.strip(), "target_date": target_date, "completed": completed}, {}
+
+    async def update_goal(self, req, gid):
+        if "completed" not in req["json"]: raise HTTPError(400, "Nothing to update: send 'completed'")
+        completed = _completed_value(req["json"])
+        if not await self.batcher.submit("status", int(gid), completed):
+            raise HTTPError(404, "No such goal")
+        return 200, {"id": int(gid), "completed": completed}, {}
+
+    async def delete_goal(self, req, gid):
+        if not await self.batcher.submit("delete", int(gid)):
+            raise HTTPError(404, "No such goal")
+        return 204, None, {}
+
+    async def search(self, req):
+        text = req["query"].get("q", [""])[0]
+        before = req["query"].get("before", [None])[0]
+        if before is not None and not before.isdigit():
+            raise HTTPError(400, "'before' must be a goal id")
+        goals = await self.read(db.search_goals, text, 50, int(before) if before else None)
+        return 200, {"goals": [_goal_json(g) for g in goals]}, {}
+
+    async def get_analytics(self, req):
+        target_date = _date_param(req["query"], "date", date.today().isoformat())
+        tag = self.etag("analytics", target_date, date.today())
+        if req["headers"].get("if-none-match") == tag:
+            return 304, None, {"ETag": tag}
+        return 200, await self.read(db.get_analytics, target_date), {"ETag": tag}
+
+    async def get_days(self, req):
+        start = _date_param(req["query"], "start")
+        end = _date_param(req["query"], "end")
+        tag = self.etag("days", start, end, date.today())  # template misses grow at midnight
+        if req["headers"].get("if-none-match") == tag:
+            return 304, None, {"ETag": tag}
+        days = await self.read(db.get_daily_totals, start, end)
+        return 200, {"days": [{"date": d, "total": t, "completed": c} for d, t, c in days]}, {"ETag": tag}
+
+    async def get_range(self, req):
+        end = _date_param(req["query"], "end", date.today().isoformat())
+        start = _date_param(req["query"], "start",
+                            date.fromordinal(date.fromisoformat(end).toordinal() - 29).isoformat())
+        if start > end: raise HTTPError(400, "'start' is after 'end'")
+        tag = self.etag("range", start, end)
+        if req["headers"].get("if-none-match") == tag:
+            return 304, None, {"ETag": tag}
+        return 200, await self.read(db.get_range_analytics, start, end), {"ETag": tag}
+
+    # --- HTTP plumbing ---
+    async def handle(self, reader, writer):
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # Without a length the body can't be told from the next request: answer and hang up.
+                    await self.respond(writer, 400, {"error": "Content-Length must be a number of bytes"}, {}, False)
+                    return
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Body too large"}, {}, False)
+                    return
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except asyncio.IncompleteReadError:
+                    # Shorter than its Content-Length: the client stopped sending or hung up.
+                    try:
+                        await self.respond(writer, 400, {"error": "Body shorter than Content-Length"}, {}, False)
+                    except ConnectionError:
+                        pass
+                    return
+                except ConnectionError:
+                    return
+                status, payload, extra = await self.dispatch(method, target, headers, body)
+                await self.respond(writer, status, payload, extra, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        req = {"headers": headers, "query": parse_qs(url.query), "json": {}}
+        try:
+            if self.token and not hmac.compare_digest(headers.get("authorization", "").encode(),
+                                                      f"Bearer {self.token}".encode()):
+                raise HTTPError(401, "Missing or wrong token")
+            if body:
+                try:
+                    req["json"] = json.loads(body)
+                except ValueError:
+                    raise HTTPError(400, "Body must be JSON")
+                if not isinstance(req["json"], dict):
+                    raise HTTPError(400, "Body must be a JSON object")
+            path = url.path.rstrip("/") or "/"
+            allowed = False
+            for route_method, pattern, handler in self.routes:
+                match = pattern.fullmatch(path)
+                if match:
+                    allowed = True
+                    if route_method == method:
+                        with perf.span("http." + handler.__name__):
+                            return await handler(req, *match.groups())
+            raise HTTPError(405 if allowed else 404, "Method not allowed" if allowed else "Not found")
+        except HTTPError as exc:
+            return exc.status, {"error": str(exc)}, {}
+        except Exception as exc:
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}, {}
+
+    async def respond(self, writer, status, payload, extra, keep_alive):
+        data = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode()
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                f"Content-Length: {len(data)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if data: head.append("Content-Type: application/json; charset=utf-8")
+        head += [f"{k}: {v}" for k, v in extra.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+async def serve(host, port, token):
+    server = await GoalServer(host, port, token).start()
+    print(f"Focus Ultra API on http://{host}:{server.port}  (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="server.py", description="Serve goals.db as a local JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="use 0.0.0.0 to accept LAN clients (set --token!)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", help="require 'Authorization: Bearer TOKEN' on every request")
+    parser.add_argument("--profile", help="serve this profile's goals instead of Personal (goals.db)")
+    args = parser.parse_args(argv)
+    if args.profile:
+        import profiles
+        try:
+            db.DB_NAME = profiles.path(args.profile)
+        except KeyError as exc:
+            parser.error(exc.args[0])
+    perf.register(db)
+    perf.enable_from_env()
+    if args.host not in ("127.0.0.1", "localhost", "::1") and not args.token:
+        parser.error("refusing to listen beyond localhost without --token")
+    try:
+        asyncio.run(serve(args.host, args.port, args.token))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
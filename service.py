@@ -0,0 +1,195 @@
+"""Runs database and analytics work off the Tk main loop.
+
+Writes go to a single worker thread so they land in the order they were
+made. Reads run on a small pool and wait for any write submitted before
+them. Every worker thread gets its own sqlite connection from database.py,
+and every job runs against the store (profile) that was active when it was
+submitted, so a profile switch never redirects queued work. Results are
+handed back to Tk on the main thread through root.after.
+"""
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database as db
+import perf
+
+class Service:
+    def __init__(self, root, readers=2, poll_ms=15):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="focus-write")
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="focus-read")
+        self.results = queue.SimpleQueue()
+        self.pending = 0
+        self.polling = False
+        self.latest = {}        # coalescing key -> newest generation
+        self.generation = 0
+        self.last_write = None  # future of the newest write
+
+    # --- submitting (main thread only) ---
+    def write(self, fn, *args, on_done=None, on_error=None):
+        """Queues a database write; writes always run one at a time, in order."""
+        self.last_write = self._submit(self.writer, fn, args, on_done, on_error, None, None)
+        return self.last_write
+
+    def read(self, fn, *args, key=None, on_done=None, on_error=None):
+        """Runs fn on a reader thread once earlier writes have landed.
+
+        With a key, only the newest request per key is delivered: older ones
+        are skipped if they haven't started, and their results are dropped if
+        they have."""
+        return self._submit(self.readers, fn, args, on_done, on_error, key, self.last_write)
+
+    def _submit(self, pool, fn, args, on_done, on_error, key, wait_for):
+        self.generation += 1
+        generation = self.generation
+        if key is not None:
+            self.latest[key] = generation
+        store = db.current_store()
+
+        def run():
+            if key is not None and self.latest.get(key) != generation:
+                return None, None, True  # superseded before it started
+            if wait_for is not None:
+                try: wait_for.result()
+                except Exception: pass  # the write reports its own error
+            try:
+                with store.use():
+                    return fn(*args), None, False
+            except Exception as exc:
+                return None, exc, False
+
+        # With perf on, the time from submit to delivery on the Tk thread is
+        # recorded as "roundtrip.<fn>": queueing, waiting for writes and running.
+        started = (getattr(fn, "__name__", "job"), perf.now()) if perf.ENABLED else None
+
+        def finished(future):
+            self.results.put((future.result(), on_done, on_error, key, generation, started))
+
+        self.pending += 1
+        future = pool.submit(run)
+        future.add_done_callback(finished)
+        self._start_polling()
+        return future
+
+    # --- delivering (main thread) ---
+    def _start_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._deliver()
+        if self.pending:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self.polling = False
+
+    def _deliver(self):
+        while True:
+            try:
+                (result, exc, skipped), on_done, on_error, key, generation, started = self.results.get_nowait()
+            except queue.Empty:
+                return
+            self.pending -= 1
+            if started is not None:
+                perf.record("roundtrip." + started[0], perf.now() - started[1])
+            if skipped or (key is not None and self.latest.get(key) != generation):
+                continue
+            if exc is not None:
+                if on_error: on_error(exc)
+                else: self.root.report_callback_exception(type(exc), exc, exc.__traceback__)
+            elif on_done:
+                on_done(result)
+
+    def drain(self):
+        """Blocks until every queued job has finished and delivers the results."""
+        while self.pending:
+            self._deliver()
+            if self.pending:
+                time.sleep(0.001)
+
+    def shutdown(self):
+        """Waits for queued writes and closes the worker connections."""
+        self.readers.shutdown(wait=True)
+        self.writer.submit(db.close_db)
+        self.writer.shutdown(wait=True)
+
+class WriteBehind:
+    """Collects goal mutations for a short window and commits them as one batch.
+
+    Repeated status changes to a goal collapse to the last one, changes to a
+    goal that hasn't been inserted yet are folded into its insert, and all
+    inserts go through a single executemany. Callers flush() before reading
+    and on page switch / window close; otherwise a timer flushes the batch.
+    A placeholder id from add() is good until on_inserted reports its real id.
+    """
+    def __init__(self, service, window_ms=250, on_inserted=None, on_error=None):
+        self.service = service
+        self.window_ms = window_ms
+        self.on_inserted = on_inserted  # (placeholder id, real id), on the Tk thread
+        self.on_error = on_error
+        self.inserts = {}    # placeholder id -> [title, target_date, completed]
+        self.statuses = {}   # goal id -> completed
+        self.deletes = []
+        self.real_ids = {}   # placeholder id -> real id, filled on the writer thread
+        self.retired = []    # placeholders the Tk side no longer uses, dropped from real_ids next batch
+        self.timer = None
+        self.last_placeholder = 0
+
+    # --- queueing (Tk thread) ---
+    def add(self, title, target_date, completed=0):
+        """Queues an insert and returns the placeholder id to show until it lands."""
+        self.last_placeholder -= 1
+        self.inserts[self.last_placeholder] = [title, target_date, completed]
+        self._schedule()
+        return self.last_placeholder
+
+    def set_status(self, gid, completed):
+        if gid in self.inserts: self.inserts[gid][2] = completed
+        else: self.statuses[gid] = completed
+        self._schedule()
+
+    def delete(self, gid):
+        if self.inserts.pop(gid, None) is None:
+            self.statuses.pop(gid, None)
+            self.deletes.append(gid)
+        self._schedule()
+
+    def _schedule(self):
+        if self.timer is None:
+            self.timer = self.service.root.after(self.window_ms, self.flush)
+
+    def flush(self):
+        """Hands everything queued so far to the writer thread as one transaction."""
+        if self.timer is not None:
+            self.service.root.after_cancel(self.timer)
+            self.timer = None
+        if not (self.inserts or self.statuses or self.deletes):
+            return None
+        inserts, statuses, deletes, retired = self.inserts, self.statuses, self.deletes, self.retired
+        self.inserts, self.statuses, self.deletes, self.retired = {}, {}, [], []
+
+        def write():
+            # Placeholders from an earlier batch resolve here, after it has run.
+            real = lambda gid: self.real_ids.get(gid, gid)
+            ids = db.apply_batch(list(inserts.values()), {real(g): c for g, c in statuses.items()},
+                                 [real(g) for g in deletes])
+            self.real_ids.update(zip(inserts, ids))
+            for placeholder in retired:  # every batch that could name it has run
+                self.real_ids.pop(placeholder, None)
+            return list(zip(inserts, ids))
+
+        def landed(pairs):
+            # From here on callers use the real ids; changes still queued
+            # under a placeholder move over, so no later batch names it.
+            for placeholder, gid in pairs:
+                if placeholder in self.statuses:
+                    self.statuses[gid] = self.statuses.pop(placeholder)
+                if placeholder in self.deletes:
+                    self.deletes[self.deletes.index(placeholder)] = gid
+                if self.on_inserted: self.on_inserted(placeholder, gid)
+            self.retired.extend(placeholder for placeholder, _ in pairs)
+
+        return self.service.write(write, on_done=landed, on_error=self.on_error)
@@ -0,0 +1,52 @@
+"""Behaviour tests for Focus Ultra, each on its own tiny throwaway goals.db.
+
+Run with:  python -m pytest
+Timings live in bench/ (python -m bench); these only check results.
+"""
+import os
+import sqlite3
+
+import pytest
+
+import database as db
+import profiles
+import service
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # the project folder
+
+class FakeRoot:
+    """Just enough of Tk for service.py without a display; timers never fire,
+    Service.drain() delivers results instead."""
+    def after(self, ms, fn): return fn
+    def after_cancel(self, token): pass
+    def report_callback_exception(self, kind, exc, tb): raise exc
+
+def other_process(path, sql, params=()):
+    """Commits sql from outside database.py: another app instance, as far as it can tell."""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(sql, params)
+    conn.close()
+
+@pytest.fixture
+def goals_db(tmp_path, monkeypatch):
+    db.close_db()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "goals.db"))
+    db.init_db()
+    yield db.DB_NAME
+    db.close_db()
+
+@pytest.fixture
+def app_dir(goals_db, tmp_path, monkeypatch):
+    """goals_db as Personal, with profiles.json and the profiles folder beside it."""
+    monkeypatch.setattr(db, "APP_DIR", str(tmp_path))
+    monkeypatch.setattr(profiles, "REGISTRY", str(tmp_path / "profiles.json"))
+    monkeypatch.setattr(profiles, "FOLDER", str(tmp_path / "profiles"))
+    yield tmp_path
+    db.close_db()
+
+@pytest.fixture
+def svc(goals_db):
+    s = service.Service(FakeRoot())
+    yield s
+    s.shutdown()
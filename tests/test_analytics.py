@@ -0,0 +1,106 @@
+"""SQL aggregates and the columnar engine against plain row-walking."""
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+
+import analytics
+import database as db
+from conftest import other_process
+
+TODAY = date.today()
+
+def days_ago(n):
+    return (TODAY - timedelta(days=n)).isoformat()
+
+# --- reference: analytics.py's original row-by-row definitions ---
+def by_day(goals):
+    days = {}
+    for g in goals: days.setdefault(g.target_date, []).append(g)
+    return days
+
+def ref_streak(goals):
+    days, check, streak = by_day(goals), TODAY, 0
+    while True:
+        day = days.get(check.isoformat())
+        if day and any(g.completed == 1 for g in day): streak += 1
+        elif check != TODAY: break
+        check -= timedelta(days=1)
+    return streak
+
+def ref_perfect_streak(goals):
+    days, streak = by_day(goals), 0
+    for d in sorted(days, reverse=True):
+        if all(g.completed == 1 for g in days[d]): streak += 1
+        elif d != TODAY.isoformat(): break
+    return streak
+
+def ref_weekly_summary(goals):
+    days = by_day(goals)
+    return {d: sum(g.completed == 1 for g in days[d]) / len(days[d]) * 100 if d in days else 0.0
+            for d in (days_ago(i) for i in range(6, -1, -1))}
+
+def ref_most_missed(goals):
+    counts = Counter(g.title.lower() for g in goals if g.completed == 0)
+    return counts.most_common(1)[0][0].capitalize() if counts else "None"
+
+def reference(goals):
+    today = [g for g in goals if g.target_date == TODAY.isoformat()]
+    return {"daily_completion": analytics.calculate_daily_completion(today), "streak": ref_streak(goals),
+            "perfect_streak": ref_perfect_streak(goals), "most_missed": ref_most_missed(goals),
+            "weekly_summary": ref_weekly_summary(goals)}
+
+@pytest.fixture
+def history(goals_db):
+    rnd = random.Random(3)
+    rows = [(f"Goal {rnd.randrange(8)}", days_ago(rnd.randrange(5, 40)), int(rnd.random() < 0.7)) for _ in range(600)]
+    rows += [("Read", days_ago(n), 1) for n in range(1, 5)]  # a perfect run up to yesterday
+    rows += [("Read", days_ago(0), 1), ("Walk", days_ago(0), 0)]
+    db.add_goals(rows)
+    return db.get_all_goals()
+
+def test_sql_aggregates_match_row_walking(history):
+    expected = reference(history)
+    assert expected["streak"] and expected["perfect_streak"]
+    assert db.get_analytics(TODAY.isoformat()) == expected
+
+def test_columnar_engine_matches_row_walking(history):
+    assert analytics.analyze(history) == reference(history)
+
+def test_daily_totals_match_goals(history):
+    counts = Counter((g.target_date, g.completed) for g in history)
+    expected = tuple((d, counts[d, 0] + counts[d, 1], counts[d, 1]) for d in sorted(by_day(history)))
+    assert db.get_daily_totals() == expected
+
+def test_empty_history(goals_db):
+    assert db.get_analytics(TODAY.isoformat()) == reference([])
+
+def test_combined_top_missed_breaks_ties_like_get_top_missed(goals_db):
+    # Same misses and first day: the lower id wins, not the title.
+    db.add_goals([("Walk", days_ago(3), 0), ("Read", days_ago(3), 0), ("Read", days_ago(1), 0),
+                  ("Walk", days_ago(2), 0), ("Write", days_ago(3), 0)])
+    expected = db.get_top_missed(3)
+    assert [key for key, _ in expected] == ["walk", "read", "write"]
+    assert db._combined_top_missed([goals_db], TODAY, 3) == expected
+
+def test_goals_written_by_other_programs_get_a_title_key(goals_db):
+    # Another program that knows only the original columns.
+    other_process(goals_db, "INSERT INTO goals (title, target_date, completed) VALUES ('Stretch', ?, 0)", (days_ago(1),))
+    assert db.get_analytics(TODAY.isoformat())["most_missed"] == "Stretch"
+    other_process(goals_db, "UPDATE goals SET title = 'Yoga' WHERE title = 'Stretch'")
+    assert db.get_analytics(TODAY.isoformat())["most_missed"] == "Yoga"
+    assert db._query("SELECT title_key FROM goals") == [("yoga",)]
+
+def test_most_missed_ties_go_to_the_first_miss_by_date(goals_db):
+    # Ids out of date order, as imports and back-dated goals leave them:
+    # both titles are first missed on 01-01, b (id 5) before a (id 10).
+    for gid, title, day in ((2, "a", "2024-01-05"), (5, "b", "2024-01-01"), (10, "a", "2024-01-01"),
+                            (20, "b", "2024-01-06")):
+        other_process(goals_db, "INSERT INTO goals (id, title, target_date, completed) VALUES (?, ?, ?, 0)",
+                      (gid, title, day))
+    goals = db.get_all_goals()
+    assert ref_most_missed(goals) == analytics.get_most_missed(goals) == "B"
+    assert db.get_top_missed() == db._combined_top_missed([goals_db], TODAY) == (("b", 2),)
+    assert db.archive_goals("2024-01-03") == 2  # the 01-01 misses now count from archived_missed
+    assert db.get_top_missed() == db._combined_top_missed([goals_db], TODAY) == (("b", 2),)
@@ -0,0 +1,24 @@
+"""Yearly archives: lookups that reach into them."""
+import os
+
+import database as db
+
+def test_a_missing_archive_file_is_skipped_not_created(goals_db):
+    db.add_goals([("old", "2019-03-01", 0), ("older", "2018-03-01", 0)])
+    assert db.archive_goals("2020-01-01") == 2
+    os.remove(db.archive_path(2019))
+    assert db.import_rows([("old", "2019-03-01", 0), ("older", "2018-03-01", 0)]) == 1  # 2018 still dedupes
+    assert [g[1] for g in db.iter_goals()] == ["older", "old"]
+    assert not os.path.exists(db.archive_path(2019))
+
+def test_search_reaches_archived_goals(goals_db):
+    db.add_goals([("Read old book", "2019-03-01", 0), ("Read news", "2019-04-01", 1), ("Walk", "2019-04-01", 0)])
+    db.add_goals([("Read more", "2024-01-01", 0)])
+    assert db.archive_goals("2020-01-01") == 3
+    titles = lambda goals: [g.title for g in goals]
+    assert titles(db.search_goals("read")) == ["Read more", "Read news", "Read old book"]
+    first = db.search_goals("read", limit=2)
+    assert titles(first) == ["Read more", "Read news"]
+    assert titles(db.search_goals("read", limit=2, before=first[-1].id)) == ["Read old book"]
+    db.prepare_day("2019-04-01")  # thawed: listed once, from goals.db
+    assert titles(db.search_goals("read")) == ["Read more", "Read news", "Read old book"]
@@ -0,0 +1,43 @@
+"""The analytics cache drops what a write could have changed, whoever made it."""
+from datetime import date
+
+import database as db
+from conftest import other_process
+
+TODAY = date.today().isoformat()
+INSERT = "INSERT INTO goals (title, title_key, target_date, completed) VALUES ('theirs', 'theirs', ?, ?)"
+
+def test_own_write_invalidates_its_day_only(goals_db):
+    db.add_goal("mine", TODAY)
+    assert db.get_day_totals(TODAY) == (1, 0)
+    assert db.get_day_totals("2020-01-01") == (0, 0)
+    db.add_goal("old", "2020-01-01")
+    assert db.cache_stats()["size"] == 1  # today's entry survived
+    assert db.get_day_totals(TODAY) == (1, 0) and db.get_day_totals("2020-01-01") == (1, 0)
+
+def test_external_commit_is_seen(goals_db):
+    db.add_goal("mine", TODAY)
+    assert db.get_day_totals(TODAY) == (1, 0)
+    other_process(goals_db, INSERT, (TODAY, 1))
+    assert db.get_day_totals(TODAY) == (2, 1)
+
+def test_external_commit_followed_by_an_unrelated_local_write(goals_db):
+    db.add_goal("mine", TODAY)
+    assert db.get_day_totals(TODAY) == (1, 0)
+    assert db.get_streaks() == (0, 0)
+    other_process(goals_db, INSERT, (TODAY, 1))
+    db.add_goal("old", "2020-01-01")
+    assert db.get_day_totals(TODAY) == (2, 1)
+    assert db.get_streaks() == (1, 0)
+
+def test_external_rebuild_followed_by_a_local_write(goals_db):
+    db.add_goals([("a", TODAY, 1)])
+    with db.transaction() as cursor:
+        cursor.execute("UPDATE daily_stats SET completed = 0")  # drifted
+    db._forget_cache()
+    assert db.get_day_totals(TODAY) == (1, 0)
+    # Another process's rebuild_daily_stats: no goal changes, one reload entry.
+    other_process(goals_db, "UPDATE daily_stats SET completed = 1")
+    other_process(goals_db, "INSERT INTO changes (goal_id, target_date) VALUES (0, '')")
+    db.add_goal("old", "2020-01-01")
+    assert db.get_day_totals(TODAY) == (1, 1)
@@ -0,0 +1,19 @@
+"""cli.py commands that touch more than the goals: profiles."""
+import pytest
+
+import cli
+import profiles
+
+def test_unknown_profile_is_reported_not_created(app_dir):
+    with pytest.raises(SystemExit, match="No profile named 'Wrok'"):
+        cli.main(["profile", "Wrok"])
+    assert profiles.names() == ["Personal"]
+
+def test_profile_add_creates_and_switches(app_dir, capsys):
+    cli.main(["profile", "add", "Work"])
+    assert profiles.names() == ["Personal", "Work"] and profiles.active() == "Work"
+    assert "Created profile Work." in capsys.readouterr().out
+    with pytest.raises(SystemExit, match="empty or taken"):
+        cli.main(["profile", "add", "Work"])
+    cli.main(["profile", "Personal"])
+    assert profiles.active() == "Personal"
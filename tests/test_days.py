@@ -0,0 +1,30 @@
+"""prepare_day writes what a day owes; get_goals_by_date only reads."""
+from datetime import date
+
+import archive
+import database as db
+
+def test_reading_a_day_writes_nothing(goals_db):
+    db.add_template("Read", start_date="2024-01-01")
+    version = db.data_version()
+    assert db.get_goals_by_date("2024-01-05") == []
+    assert db.data_version() == version
+    assert db.prepare_day("2024-01-05") == 1
+    assert [g.title for g in db.get_goals_by_date("2024-01-05")] == ["Read"]
+    assert db.prepare_day("2024-01-05") == 0
+
+def test_deleted_instances_stay_deleted(goals_db):
+    db.add_template("Read", start_date="2024-01-01")
+    db.prepare_day("2024-01-05")
+    db.delete_goal(db.get_goals_by_date("2024-01-05")[0].id)
+    assert db.prepare_day("2024-01-05") == 0 and db.get_goals_by_date("2024-01-05") == []
+
+def test_archived_day_comes_back_when_prepared(goals_db):
+    db.add_goals([("old", "2019-03-01", 1), ("old too", "2019-03-01", 0), ("new", date.today().isoformat(), 0)])
+    kept = db.get_goals_by_date("2019-03-01")
+    assert archive.maintain(force=True)["archived"] == 2
+    assert db.get_goals_by_date("2019-03-01") == []
+    assert db.get_day_totals("2019-03-01") == (2, 1)  # analytics never lost them
+    assert db.prepare_day("2019-03-01") == 2
+    assert db.get_goals_by_date("2019-03-01") == kept
+    assert db.verify_daily_stats() == []
@@ -0,0 +1,22 @@
+"""Profiles: switching the way the app does it, off the Tk thread."""
+import sqlite3
+
+import database as db
+import profiles
+
+def test_prepare_upgrades_and_remembers_without_repointing(app_dir, svc):
+    old = str(app_dir / "old.db")
+    with sqlite3.connect(old) as conn:  # a goals.db from before any migration
+        conn.execute("CREATE TABLE goals (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                     "target_date TEXT NOT NULL, completed INTEGER DEFAULT 0)")
+        conn.execute("INSERT INTO goals (title, target_date) VALUES ('Read', '2024-01-01')")
+    conn.close()
+    profiles.save({"active": profiles.DEFAULT, "profiles": {"Old": old}})
+    personal, done = db.DB_NAME, []
+    svc.write(profiles.prepare, "Old", on_done=done.append)
+    svc.drain()
+    assert done == [old]
+    assert db.DB_NAME == personal and profiles.active() == "Old"
+    db.DB_NAME = old
+    assert db.schema_version() == len(db.MIGRATIONS)
+    assert [g.title for g in db.get_goals_by_date("2024-01-01")] == ["Read"]
@@ -0,0 +1,23 @@
+"""The hot queries database.py runs are answered from indexes."""
+from datetime import date
+
+import pytest
+
+import database as db
+
+CASES = {  # name: (database.py's SQL, params, sorted by the index)
+    "get_goals_by_date": (db._DAY_SQL, (date.today().isoformat(),), True),
+    "get_all_goals": (db._ALL_GOALS_SQL, (), True),
+    "get_top_missed": (db._TOP_MISSED_SQL, (1,), False),  # ranks per-title counts: that sort stays
+}
+
+@pytest.mark.parametrize("name", CASES)
+def test_plan_uses_an_index(goals_db, name):
+    sql, params, ordered = CASES[name]
+    plan = db.explain(sql, params)
+    assert any("USING" in step and "INDEX" in step for step in plan), plan
+    assert not any(step.startswith("SCAN goals") and "INDEX" not in step for step in plan), plan
+    assert not ordered or not any("TEMP B-TREE" in step for step in plan), plan
+
+def test_fresh_and_migrated_files_end_on_the_same_version(goals_db):
+    assert db.schema_version() == len(db.MIGRATIONS)
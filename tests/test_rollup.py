@@ -0,0 +1,46 @@
+"""daily_stats: kept in step by triggers, checked and rebuilt on demand."""
+import random
+from datetime import date, timedelta
+
+import database as db
+
+def test_triggers_follow_random_writes(goals_db):
+    rnd = random.Random(7)
+    today, ids = date.today(), []
+    for _ in range(300):
+        op = rnd.random()
+        if op < 0.45 or not ids:
+            ids.append(db.add_goal("g", (today - timedelta(days=rnd.randint(0, 10))).isoformat()))
+        elif op < 0.6:
+            ids += db.add_goals([("h", (today - timedelta(days=rnd.randint(0, 10))).isoformat(), rnd.randint(0, 1))
+                                 for _ in range(3)])
+        elif op < 0.85:
+            db.toggle_goal_status(rnd.choice(ids), rnd.randint(0, 1))
+        else:
+            db.delete_goal(ids.pop(rnd.randrange(len(ids))))
+    assert db.verify_daily_stats() == []
+    assert db.get_streaks() == (db._scan_streak("active", today), db._scan_streak("perfect", today))
+
+def test_moving_a_goal_moves_its_count(goals_db):
+    gid = db.add_goal("g", "2024-01-01")
+    db.set_goal_status(gid, 1)
+    with db.transaction() as cursor:
+        cursor.execute("UPDATE goals SET target_date = '2024-01-02' WHERE id = ?", (gid,))
+    assert db._query("SELECT date, total, completed FROM daily_stats") == [("2024-01-02", 1, 1)]
+    assert db.verify_daily_stats() == []
+
+def test_rebuild_repairs_drift(goals_db):
+    db.add_goals([("g", "2024-01-01", 1), ("g", "2024-01-01", 0), ("g", "2024-01-03", 0)])
+    with db.transaction() as cursor:
+        cursor.execute("UPDATE daily_stats SET completed = 2 WHERE date = '2024-01-01'")
+        cursor.execute("INSERT INTO daily_stats VALUES ('2024-01-02', 4, 1)")
+    assert {bad[0] for bad in db.verify_daily_stats()} == {"2024-01-01", "2024-01-02"}
+    db.rebuild_daily_stats()
+    assert db.verify_daily_stats() == []
+    assert db.get_day_totals("2024-01-01") == (2, 1)
+
+def test_clear_all_data_empties_the_rollup(goals_db):
+    db.add_goals([("g", "2024-01-01", 1)] * 3)
+    db.clear_all_data()
+    assert db._query("SELECT COUNT(*) FROM daily_stats") == [(0,)]
+    assert db.get_day_totals("2024-01-01") == (0, 0)
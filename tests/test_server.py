@@ -0,0 +1,75 @@
+"""server.py over a real socket: bad requests get a 400 with a JSON error."""
+import asyncio
+import json
+from datetime import date, timedelta
+
+import pytest
+
+import server
+
+async def exchange(srv, raw, eof=False):
+    reader, writer = await asyncio.open_connection("127.0.0.1", srv.port)
+    writer.write(raw)
+    if eof: writer.write_eof()  # done sending, whatever the headers promised
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+    body = await reader.readexactly(length)
+    writer.close()
+    return int(head.split(b" ")[1]), json.loads(body) if body else None
+
+def post(body, headers=""):
+    data = json.dumps(body).encode()
+    return (f"POST /goals HTTP/1.1\r\nContent-Length: {len(data)}\r\n{headers}\r\n").encode() + data
+
+def run(*requests, token=None, eof=False):
+    async def go():
+        srv = await server.GoalServer(port=0, token=token).start()
+        try:
+            return [await exchange(srv, raw, eof) for raw in requests]
+        finally:
+            await srv.close()
+    return asyncio.run(go())
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1.5", "\xb2"])
+def test_bad_content_length(goals_db, length):
+    (status, payload), = run(f"POST /goals HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode("latin-1"))
+    assert status == 400 and "Content-Length" in payload["error"]
+
+@pytest.mark.parametrize("target_date", [20240501, ["2024-05-01"], "", "tomorrow", "2024-02-30"])
+def test_bad_target_date(goals_db, target_date):
+    (status, payload), = run(post({"title": "x", "target_date": target_date}))
+    assert status == 400 and "target_date" in payload["error"]
+
+def test_good_requests_still_work(goals_db):
+    (created, goal), (listed, day), (health, _) = run(
+        post({"title": "Read", "target_date": "2024-05-01"}),
+        b"GET /goals?date=2024-05-01 HTTP/1.1\r\n\r\n",
+        b"GET /health HTTP/1.1\r\n\r\n")
+    assert created == 201 and [g["id"] for g in day["goals"]] == [goal["id"]]
+    assert listed == health == 200
+
+def test_short_body(goals_db):
+    (status, payload), = run(b"POST /goals HTTP/1.1\r\nContent-Length: 50\r\n\r\n{}", eof=True)
+    assert status == 400 and "shorter" in payload["error"]
+
+def test_token(goals_db):
+    health = b"GET /health HTTP/1.1\r\nAuthorization: Bearer %s\r\n\r\n"
+    (wrong, _), (none, _), (right, _) = run(health % b"nope", b"GET /health HTTP/1.1\r\n\r\n", health % b"s3cret",
+                                            token="s3cret")
+    assert (wrong, none, right) == (401, 401, 200)
+
+def test_day_totals_tag_changes_at_midnight(goals_db, monkeypatch):
+    srv = server.GoalServer()
+    try:
+        status, _, headers = asyncio.run(srv.get_days({"query": {}, "headers": {}}))
+        cached = {"query": {}, "headers": {"if-none-match": headers["ETag"]}}
+        assert status == 200 and asyncio.run(srv.get_days(cached))[0] == 304
+
+        class Tomorrow(date):
+            @classmethod
+            def today(cls): return date.today() + timedelta(days=1)
+        monkeypatch.setattr(server, "date", Tomorrow)
+        assert asyncio.run(srv.get_days(cached))[0] == 200  # unopened days became misses
+    finally:
+        srv.readers.shutdown()
+        srv.writer.shutdown()
@@ -0,0 +1,102 @@
+"""Change log (get_changes) and writers sharing one file across processes."""
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import database as db
+from conftest import ROOT, other_process
+
+DAY = "2024-01-01"
+
+def test_own_writes_are_left_out(goals_db):
+    seq = db.get_changes()[0]
+    gid = db.add_goal("mine", DAY)
+    db.set_goal_status(gid, 1)
+    assert db.get_changes(seq) == (seq + 2, {})
+
+def test_other_writers_changes_come_back_as_goals(goals_db):
+    gid = db.add_goal("edited", DAY)
+    gone = db.add_goal("deleted", DAY)
+    seq = db.get_changes()[0]
+    other_process(goals_db, "INSERT INTO goals (title, title_key, target_date) VALUES ('new', 'new', ?)", (DAY,))
+    other_process(goals_db, "UPDATE goals SET completed = 1 WHERE id = ?", (gid,))
+    other_process(goals_db, "DELETE FROM goals WHERE id = ?", (gone,))
+    seq, changed = db.get_changes(seq)
+    assert changed[gid].completed == 1 and changed[gone] is None
+    assert [g.title for g in changed.values() if g is not None] == ["new", "edited"]  # in log order
+    assert db.get_changes(seq) == (seq, {})
+
+def test_clear_trim_and_floods_ask_for_a_reload(goals_db):
+    seq = db.get_changes()[0]
+    for i in range(5):
+        other_process(goals_db, "INSERT INTO goals (title, title_key, target_date) VALUES ('x', 'x', ?)", (DAY,))
+    assert db.get_changes(seq, limit=4)[1] is None
+    assert len(db.get_changes(seq, limit=5)[1]) == 5
+    db.clear_all_data()
+    assert db.get_changes(seq + 5)[1] == {}          # our own clear
+    db.current_store().own.clear()                   # as another process sees it
+    assert db.get_changes(seq + 5)[1] is None
+    assert db.trim_changes(keep=1) == 5
+    assert db.get_changes(seq)[1] is None            # older than the log
+    assert db.get_changes(seq + 100)[1] is None      # a different file than we followed
+
+def test_busy_writer_retries(goals_db, monkeypatch):
+    db.close_db()
+    monkeypatch.setattr(db, "BUSY_TIMEOUT", 0.01)
+    holder = sqlite3.connect(goals_db, isolation_level=None, check_same_thread=False)
+    holder.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.05, holder.execute, ("COMMIT",)).start()
+    db.add_goal("waited", DAY)
+    assert db.current_store().retries > 0
+    assert [g.title for g in db.get_goals_by_date(DAY)] == ["waited"]
+    holder.close()
+
+SYNC_CHILD = """
+import sys, database as db
+db.DB_NAME, worker, rounds = sys.argv[1], sys.argv[2], int(sys.argv[3])
+db.BUSY_TIMEOUT, db.LOCK_RETRIES = 0.005, 10   # give up waiting early so the retries get used
+for i in range(rounds):
+    gid = db.add_goal(f"{worker} goal {i}", "2024-01-01")
+    if i % 2 == 0: db.set_goal_status(gid, 1)
+    if i % 5 == 4: db.delete_goal(gid)
+    with db.transaction() as cursor:   # read-modify-write: lost if two processes interleave
+        n = int(cursor.execute("SELECT title FROM goals WHERE id = 1").fetchone()[0])
+        cursor.execute("UPDATE goals SET title = ? WHERE id = 1", (str(n + 1),))
+"""
+
+def test_processes_lose_no_updates_and_pollers_converge(goals_db, workers=3, rounds=60):
+    counter = db.add_goal("0", DAY)
+    seq = db.get_changes()[0]
+    model = {g.id: g for g in db.get_goals_by_date(DAY)}
+
+    def poll():
+        nonlocal seq
+        seq, changed = db.get_changes(seq)
+        if changed is None:
+            model.clear()
+            model.update((g.id, g) for g in db.get_goals_by_date(DAY))
+            return
+        for gid, goal in changed.items():
+            if goal is None: model.pop(gid, None)
+            else: model[gid] = goal
+
+    children = [subprocess.Popen([sys.executable, "-c", SYNC_CHILD, goals_db, f"w{w}", str(rounds)],
+                                 stderr=subprocess.PIPE, text=True, cwd=ROOT) for w in range(workers)]
+    while any(c.poll() is None for c in children):
+        poll()
+        time.sleep(0.002)
+    for c in children:
+        assert c.wait() == 0, c.stderr.read()
+    poll()
+
+    total = workers * rounds
+    goals = db.get_goals_by_date(DAY)
+    assert db.get_goal(counter).title == str(total)
+    assert len(goals) == total - total // 5 + 1
+    assert sum(g.completed for g in goals) == workers * (rounds // 2 - rounds // 10)
+    assert db.verify_daily_stats() == []
+    logged, first, last = db._query("SELECT COUNT(*), MIN(seq), MAX(seq) FROM changes")[0]
+    assert logged == last - first + 1 == 1 + total + total // 2 + total // 5 + total
+    assert model == {g.id: g for g in goals}
@@ -0,0 +1,39 @@
+"""transfer.py: a progress callback can stop an import or export."""
+import os
+
+import pytest
+
+import database as db
+import transfer
+
+DAY = "2024-01-01"
+
+def stop_after(n):
+    calls = []
+    def progress(*counts):
+        calls.append(counts)
+        if len(calls) >= n: raise transfer.Cancelled()
+    return progress
+
+def test_cancelled_export_leaves_no_file(goals_db, tmp_path):
+    db.add_goals([(f"g{i}", DAY, 0) for i in range(10)])
+    path = str(tmp_path / "out.csv")
+    with pytest.raises(transfer.Cancelled):
+        transfer.export_goals(path, progress=stop_after(1), every=3)
+    assert not os.path.exists(path)
+
+def test_cancelled_import_keeps_the_chunks_it_committed(goals_db, tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text("title,target_date,completed\n" + "".join(f"g{i},{DAY},0\n" for i in range(10)))
+    with pytest.raises(transfer.Cancelled):
+        transfer.import_goals(str(path), chunk_size=4, progress=stop_after(1))
+    assert len(db.get_goals_by_date(DAY)) == 4
+
+def test_non_text_fields_count_as_invalid_rows(goals_db, tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text('{"title": 42, "target_date": "2024-01-01"}\n'
+                    '{"title": "Read", "target_date": 20240101}\n'
+                    '{"title": "Walk", "target_date": "2024-01-01", "completed": 1}\n')
+    stats = transfer.import_goals(str(path))
+    assert (stats["read"], stats["imported"], stats["invalid"]) == (3, 1, 2)
+    assert [(g.title, g.completed) for g in db.get_goals_by_date(DAY)] == [("Walk", 1)]
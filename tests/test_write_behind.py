@@ -0,0 +1,116 @@
+"""WriteBehind: batches land in order, placeholders resolve, nothing
+acknowledged is lost when the writer is killed."""
+import os
+import subprocess
+import sys
+import time
+
+import database as db
+import service
+from conftest import ROOT
+
+DAY = "2024-01-01"
+
+def goals():
+    return [(g.title, g.completed) for g in db.get_goals_by_date(DAY)]
+
+def test_changes_to_a_pending_insert_fold_into_it(svc):
+    writes = service.WriteBehind(svc)
+    a, b = writes.add("a", DAY), writes.add("b", DAY)
+    writes.set_status(a, 1)
+    writes.delete(b)
+    assert writes.inserts == {a: ["a", DAY, 1]} and not writes.statuses and not writes.deletes
+    writes.flush()
+    svc.drain()
+    assert goals() == [("a", 1)]
+
+def test_status_changes_collapse_to_the_last(svc):
+    gid = db.add_goal("a", DAY)
+    writes = service.WriteBehind(svc)
+    for completed in (1, 0, 1, 0, 1):
+        writes.set_status(gid, completed)
+    assert writes.statuses == {gid: 1}
+    writes.flush()
+    svc.drain()
+    assert goals() == [("a", 1)]
+
+def test_later_batches_resolve_earlier_placeholders(svc):
+    landed = []
+    writes = service.WriteBehind(svc, on_inserted=lambda p, g: landed.append((p, g)))
+    a, b = writes.add("a", DAY), writes.add("b", DAY)
+    writes.flush()  # not landed yet: the next batch still names the placeholders
+    writes.set_status(a, 1)
+    writes.delete(b)
+    writes.add("c", DAY)
+    writes.flush()
+    svc.drain()
+    assert goals() == [("a", 1), ("c", 0)]
+    assert [p for p, _ in landed] == [a, b, a - 2]
+    assert dict(landed)[a] == db.get_goals_by_date(DAY)[0].id
+
+def test_batches_land_in_submission_order(svc):
+    gid = db.add_goal("a", DAY)
+    writes = service.WriteBehind(svc)
+    for i in range(20):
+        writes.set_status(gid, i % 2)
+        writes.flush()
+    writes.delete(gid)
+    writes.flush()
+    svc.drain()
+    assert goals() == [] and db.verify_daily_stats() == []
+
+CRASH_CHILD = """
+import sys, database as db, service
+class Root:
+    def after(self, ms, fn): return fn
+    def after_cancel(self, token): pass
+db.DB_NAME = sys.argv[1]
+db.init_db()
+svc = service.Service(Root())
+writes = service.WriteBehind(svc)
+batch = 0
+while True:
+    for i in range(20): writes.add(f"batch {batch} goal {i}", "2024-01-01", i % 2)
+    writes.flush()
+    svc.drain()
+    print(batch, flush=True)   # acknowledged: the batch has committed
+    batch += 1
+"""
+
+def test_acknowledged_batches_survive_a_kill(tmp_path, monkeypatch):
+    for r in range(3):
+        path = str(tmp_path / f"crash{r}.db")
+        child = subprocess.Popen([sys.executable, "-c", CRASH_CHILD, path], stdout=subprocess.PIPE,
+                                 text=True, cwd=ROOT)
+        acked, deadline = -1, time.perf_counter() + 0.2 + r * 0.1
+        for line in child.stdout:
+            acked = int(line)
+            if time.perf_counter() > deadline: break
+        child.kill()
+        child.wait()
+        assert acked >= 0 and os.path.exists(path)
+        db.close_db()
+        monkeypatch.setattr(db, "DB_NAME", path)
+        db.init_db()
+        counts = dict(db._query("SELECT substr(title, 1, instr(title, ' goal') - 1), COUNT(*) FROM goals GROUP BY 1"))
+        assert all(counts.get(f"batch {b}") == 20 for b in range(acked + 1))
+        assert set(counts.values()) == {20}  # batches are all-or-nothing
+        assert db.verify_daily_stats() == []
+        db.close_db()
+
+def test_placeholders_are_forgotten_once_swapped(svc):
+    writes = service.WriteBehind(svc)
+    a = writes.add("a", DAY)
+    writes.flush()
+    writes.set_status(a, 1)  # queued under the placeholder while the insert lands
+    svc.drain()
+    gid = writes.real_ids[a]
+    assert writes.statuses == {gid: 1}
+    writes.flush()
+    svc.drain()
+    assert goals() == [("a", 1)] and writes.real_ids == {}
+    for i in range(50):
+        writes.add(f"more {i}", DAY)
+        writes.flush()
+        svc.drain()
+    assert len(writes.real_ids) == 1  # just the newest batch's, until the next one runs
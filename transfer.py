@@ -0,0 +1,145 @@
+"""Bulk import/export of goals as CSV or JSONL.
+
+Both directions stream: files are read through generators and written
+straight from a database cursor, in fixed-size chunks, so memory use does
+not grow with the file.
+
+    python transfer.py import history.csv [--no-dedupe]
+    python transfer.py export backup.jsonl
+"""
+import csv
+import json
+import os
+import sys
+from datetime import date
+from itertools import islice
+
+import database as db
+
+FIELDS = ("title", "target_date", "completed")
+CHUNK_SIZE = 5000
+
+class Cancelled(Exception):
+    """Raised by a progress callback to stop a transfer. Chunks already
+    imported stay; a cancelled export removes its half-written file."""
+
+def _format(path, fmt=None):
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unsupported format '{fmt}', use .csv or .jsonl")
+    return fmt
+
+def _parse_flag(value) -> int:
+    if isinstance(value, str):
+        return 1 if value.strip().lower() in ("1", "true", "yes", "y", "done", "x") else 0
+    return 1 if value else 0
+
+def _clean(record):
+    """(title, target_date, completed) from a CSV/JSON record, or None if unusable."""
+    title = record.get("title")
+    target_date = record.get("target_date") or record.get("date")
+    if not isinstance(title, str) or not isinstance(target_date, str):
+        return None  # missing, or a JSON number/list where text belongs
+    title, target_date = title.strip(), target_date.strip()
+    if not title:
+        return None
+    try:
+        target_date = date.fromisoformat(target_date).isoformat()
+    except ValueError:
+        return None
+    return title, target_date, _parse_flag(record.get("completed", 0))
+
+# --- READING ---
+def read_goals(path, fmt=None):
+    """Yields (title, target_date, completed) from a file; None for rows that can't be read."""
+    fmt = _format(path, fmt)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            for record in csv.DictReader(f):
+                yield _clean(record)
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield None
+                    continue
+                yield _clean(record) if isinstance(record, dict) else None
+
+def import_goals(path, fmt=None, dedupe=True, chunk_size=CHUNK_SIZE, progress=None):
+    """Imports a goal file in chunked transactions.
+
+    progress(read, imported) is called after every chunk. Returns a dict with
+    the rows read, imported, skipped as duplicates and rejected as invalid."""
+    stats = {"read": 0, "imported": 0, "duplicates": 0, "invalid": 0}
+    rows = read_goals(path, fmt)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        valid = [r for r in chunk if r is not None]
+        inserted = db.import_rows(valid, dedupe=dedupe)
+        stats["read"] += len(chunk)
+        stats["invalid"] += len(chunk) - len(valid)
+        stats["imported"] += inserted
+        stats["duplicates"] += len(valid) - inserted
+        if progress: progress(stats["read"], stats["imported"])
+    return stats
+
+# --- WRITING ---
+def export_goals(path, fmt=None, progress=None, every=CHUNK_SIZE):
+    """Writes every goal to a file straight from a database cursor. Returns rows written."""
+    fmt = _format(path, fmt)
+    try:
+        written = _write_goals(path, fmt, progress, every)
+    except Cancelled:
+        os.remove(path)
+        raise
+    if progress: progress(written)
+    return written
+
+def _write_goals(path, fmt, progress, every):
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            out = csv.writer(f)
+            out.writerow(FIELDS)
+            write = lambda g: out.writerow((g[1], g[2], g[3]))
+        else:
+            write = lambda g: f.write(json.dumps({"title": g[1], "target_date": g[2], "completed": g[3]},
+                                                 ensure_ascii=False) + "\n")
+        for g in db.iter_goals():
+            write(g)
+            written += 1
+            if progress and written % every == 0: progress(written)
+    return written
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="transfer.py", description="Import or export Focus Ultra goals.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="import goals from a .csv or .jsonl file")
+    p_import.add_argument("path")
+    p_import.add_argument("--format", choices=("csv", "jsonl"))
+    p_import.add_argument("--no-dedupe", action="store_true", help="keep rows whose title and date already exist")
+    p_export = sub.add_parser("export", help="export all goals to a .csv or .jsonl file")
+    p_export.add_argument("path")
+    p_export.add_argument("--format", choices=("csv", "jsonl"))
+    args = parser.parse_args(argv)
+
+    db.init_db()
+    if args.command == "import":
+        report = lambda read, imported: print(f"\r{read:,} read, {imported:,} imported", end="", file=sys.stderr)
+        stats = import_goals(args.path, args.format, dedupe=not args.no_dedupe, progress=report)
+        print(file=sys.stderr)
+        print(f"Imported {stats['imported']:,} goals ({stats['duplicates']:,} duplicates, {stats['invalid']:,} invalid rows skipped).")
+    else:
+        report = lambda written: print(f"\r{written:,} written", end="", file=sys.stderr)
+        written = export_goals(args.path, args.format, progress=report)
+        print(file=sys.stderr)
+        print(f"Exported {written:,} goals to {args.path}.")
+
+if __name__ == "__main__":
+    main()